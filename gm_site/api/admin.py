@@ -1,11 +1,32 @@
 from django.contrib import admin
-from .models import Artist, Genre, Painting, Place, Event, Article, Comment, Main
+from .models import Artist, Genre, Painting, Gallery, GalleryPainting, Place, Event, Article, Comment, Main, ImageJob
 
 admin.site.register(Artist)
 admin.site.register(Genre)
 admin.site.register(Painting)
+
+
+class GalleryPaintingInline(admin.TabularInline):
+    model = GalleryPainting
+    raw_id_fields = ('painting',)
+    extra = 0
+
+
+@admin.register(Gallery)
+class GalleryAdmin(admin.ModelAdmin):
+    inlines = (GalleryPaintingInline,)
+
+
 admin.site.register(Place)
 admin.site.register(Event)
 admin.site.register(Article)
-admin.site.register(Main)
+
+
+@admin.register(Main)
+class MainAdmin(admin.ModelAdmin):
+    def has_add_permission(self, request):
+        return not Main.objects.exists()
+
+
 admin.site.register(Comment)
+admin.site.register(ImageJob)
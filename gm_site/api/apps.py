@@ -3,3 +3,22 @@ from django.apps import AppConfig
 
 class ApiConfig(AppConfig):
     name = 'api'
+
+    def ready(self):
+        from django.core import checks
+        from django.db.backends.signals import connection_created
+        from django.db.models.signals import post_save, post_delete, m2m_changed
+        from .db import configure_sqlite
+        from .cache import check_shared_cache, invalidate_on_save, invalidate_on_m2m_change
+        from .jobs import enqueue_on_save
+        from .search import check_supported, update_on_save, update_on_delete
+
+        connection_created.connect(configure_sqlite, dispatch_uid='api_configure_sqlite')
+        post_save.connect(invalidate_on_save, dispatch_uid='api_cache_post_save')
+        post_delete.connect(invalidate_on_save, dispatch_uid='api_cache_post_delete')
+        m2m_changed.connect(invalidate_on_m2m_change, dispatch_uid='api_cache_m2m_changed')
+        post_save.connect(enqueue_on_save, dispatch_uid='api_image_jobs')
+        post_save.connect(update_on_save, dispatch_uid='api_search_post_save')
+        post_delete.connect(update_on_delete, dispatch_uid='api_search_post_delete')
+        checks.register(check_shared_cache, checks.Tags.caches, deploy=True)
+        checks.register(check_supported)
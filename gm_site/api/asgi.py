@@ -0,0 +1,136 @@
+"""Асинхронный путь чтения API под ASGI.
+
+В Django 3.0 нет асинхронных представлений и ORM, поэтому обычный ASGIHandler
+выполняет каждое представление в пуле потоков. Обёртка из этого модуля отвечает
+на GET list/retrieve представлений с кэшем ответов (CachedResponseMixin) прямо
+в цикле событий, если ответ уже есть в кэше: ни потока, ни соединения с БД
+такой запрос не занимает. Промахи и все остальные запросы уходят в ASGIHandler.
+Включается настройкой API_ASYNC_READS.
+
+Потоковые ответы (выгрузка export/) ASGIHandler Django 3.0 перебирает в цикле событий,
+а их части читаются из БД по ходу отправки; ApiASGIHandler получает каждую часть в потоке."""
+import io
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import SynchronousOnlyOperation
+from django.core.handlers.asgi import ASGIHandler, ASGIRequest
+from django.core.handlers.base import BaseHandler
+from django.urls import Resolver404, resolve, set_script_prefix
+from rest_framework.exceptions import APIException
+
+from .mixins import CachedResponseMixin
+
+
+class ApiASGIHandler(ASGIHandler):
+    """ASGIHandler, который получает части потокового ответа через sync_to_async
+    в том же потоке, где выполнялось представление: иначе запросы iterator() падали бы
+    с SynchronousOnlyOperation уже после отправленных заголовков 200."""
+
+    async def send_response(self, response, send):
+        if not response.streaming:
+            return await super().send_response(response, send)
+        headers = [(str(name).encode('ascii'), str(value).encode('latin1')) for name, value in response.items()]
+        headers += [(b'Set-Cookie', cookie.output(header='').encode('ascii').strip())
+                    for cookie in response.cookies.values()]
+        await send({'type': 'http.response.start', 'status': response.status_code, 'headers': headers})
+        parts, end = iter(response), object()
+        next_part = sync_to_async(next, thread_sensitive=True)
+        while True:
+            part = await next_part(parts, end)
+            if part is end:
+                break
+            for chunk, _ in self.chunk_bytes(part):
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+        await send({'type': 'http.response.body'})
+        # close() шлёт request_finished: соединения с БД закрываются в потоке запросов.
+        await sync_to_async(response.close, thread_sensitive=True)()
+
+
+class CachedReadHandler(BaseHandler):
+    """Цепочка middleware вокруг уже готового ответа из кэша, чтобы заголовки
+    (CORS, безопасность) совпадали с ответом, прошедшим через представление."""
+
+    def __init__(self):
+        super().__init__()
+        self.load_middleware()
+
+    def _get_response(self, request):
+        return request.cached_response
+
+
+def get_cached_read(request):
+    """Ответ из кэша на GET list/retrieve или None, если запрос надо отдать представлению."""
+    try:
+        match = resolve(request.path_info)
+    except Resolver404:
+        return None
+    view_class = getattr(match.func, 'cls', None)
+    actions = getattr(match.func, 'actions', None)
+    if view_class is None or not actions or not issubclass(view_class, CachedResponseMixin):
+        return None
+
+    view = view_class(**match.func.initkwargs)
+    view.action_map = actions
+    view.action = actions.get('get')
+    view.args, view.kwargs = match.args, match.kwargs
+    view.headers = view.default_response_headers
+    request.api_view_labels = (view_class.__name__, view.action)  # Для api.metrics.
+    if view.get_permissions() or view.get_throttles():
+        # Проверки могут требовать пользователя из сессии, т.е. запроса к БД.
+        return None
+    drf_request = view.initialize_request(request, *match.args, **match.kwargs)
+    view.request = drf_request
+    try:
+        view.format_kwarg = view.get_format_suffix(**match.kwargs)
+        drf_request.accepted_renderer, drf_request.accepted_media_type = \
+            view.perform_content_negotiation(drf_request)
+        if not view.is_cacheable(drf_request):
+            return None
+        response = view.get_cached_hit(drf_request, view.get_response_cache_key(drf_request))
+    except (APIException, SynchronousOnlyOperation):
+        # Ошибку запроса или обращение к БД из цикла событий обработает представление.
+        return None
+    if response is None:
+        return None
+    return view.finalize_response(drf_request, response)
+
+
+class AsyncReadApplication:
+    """ASGI-приложение: попадания в кэш чтения обслуживаются в цикле событий,
+    остальное передаётся django_application (ASGIHandler)."""
+
+    def __init__(self, django_application):
+        self.django_application = django_application
+        self.handler = CachedReadHandler()
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or scope['method'] != 'GET':
+            return await self.django_application(scope, receive, send)
+
+        messages = []
+        while True:
+            message = await receive()
+            messages.append(message)
+            if message['type'] == 'http.disconnect':
+                return
+            if not message.get('more_body', False):
+                break
+
+        set_script_prefix(self.django_application.get_script_prefix(scope))
+        request = ASGIRequest(scope, io.BytesIO(b''.join(m.get('body', b'') for m in messages)))
+        response = get_cached_read(request)
+        if response is None:
+            async def replay():
+                return messages.pop(0) if messages else await receive()
+            return await self.django_application(scope, replay, send)
+
+        request.cached_response = response
+        response = self.handler.get_response(request)
+        await self.django_application.send_response(response, send)
+
+
+def get_api_application(django_application):
+    if getattr(settings, 'API_ASYNC_READS', False):
+        return AsyncReadApplication(django_application)
+    return django_application
@@ -0,0 +1,131 @@
+"""Пакетная запись объектов: bulk_create/bulk_update и строки промежуточных таблиц
+ManyToMany пачками. Сигналы post_save и m2m_changed при этом не отправляются,
+поэтому версии кэша и полнотекстовый индекс обновляются здесь же."""
+from django.core.exceptions import ValidationError
+from django.db import connections
+from django.db.models import Max
+from django.utils import timezone
+from rest_framework.relations import ManyRelatedField, PrimaryKeyRelatedField
+
+from . import search
+from .cache import bump_generation
+
+BATCH_SIZE = 500
+
+
+class PreloadedRelation:
+    """Замена queryset поля связи на время проверки пакета: get(pk=...) берёт объект
+    из заранее загруженного словаря вместо отдельного запроса на каждый элемент."""
+
+    def __init__(self, model, objects):
+        self.model = model
+        self.objects = objects
+
+    def get(self, pk):
+        try:
+            key = self.model._meta.pk.to_python(pk)
+        except ValidationError:
+            raise ValueError(pk)
+        try:
+            return self.objects[key]
+        except KeyError:
+            raise self.model.DoesNotExist()
+
+
+def _relations(serializer):
+    for name, field in serializer.fields.items():
+        if field.read_only:
+            continue
+        relation = field.child_relation if isinstance(field, ManyRelatedField) else field
+        if isinstance(relation, PrimaryKeyRelatedField) and relation.pk_field is None:
+            yield name, relation
+
+
+def preload_relations(serializer, items):
+    """Все объекты, на которые ссылаются элементы пакета, - один запрос на поле связи."""
+    preloaded = {}
+    for name, relation in _relations(serializer):
+        model = relation.queryset.model
+        keys = set()
+        for item in items:
+            value = item.get(name) if isinstance(item, dict) else None
+            for pk in value if isinstance(value, list) else [value]:
+                try:
+                    keys.add(model._meta.pk.to_python(pk))
+                except (ValidationError, TypeError):
+                    continue
+        keys.discard(None)
+        preloaded[name] = PreloadedRelation(model, relation.get_queryset().in_bulk(keys) if keys else {})
+    return preloaded
+
+
+def use_preloaded(serializer, preloaded):
+    for name, relation in _relations(serializer):
+        if name in preloaded:
+            relation.queryset = preloaded[name]
+    return serializer
+
+
+def split_m2m(model, validated_data):
+    """validated_data сериализатора -> (поля строки, {имя ManyToMany: объекты})."""
+    plain, m2m = {}, {}
+    for name, value in validated_data.items():
+        field = model._meta.get_field(name)
+        (m2m if field.many_to_many else plain)[name] = value
+    return plain, m2m
+
+
+def insert(model, objects, using='default'):
+    """bulk_create с заполнением pk. Бэкенды без RETURNING (SQLite) получают pk
+    как новые строки после максимального pk: запись идёт под блокировкой
+    транзакции, поэтому чужих строк между ними нет."""
+    manager = model._default_manager.db_manager(using)
+    if connections[using].features.can_return_rows_from_bulk_insert:
+        return manager.bulk_create(objects, batch_size=BATCH_SIZE)
+    last = manager.aggregate(last=Max('pk'))['last'] or 0
+    manager.bulk_create(objects, batch_size=BATCH_SIZE)
+    pks = list(manager.filter(pk__gt=last).order_by('pk').values_list('pk', flat=True))
+    if len(pks) != len(objects):
+        raise RuntimeError(f'{model.__name__}: ожидалось {len(objects)} новых строк, найдено {len(pks)}.')
+    for instance, pk in zip(objects, pks):
+        instance.pk = pk
+        instance._state.adding = False
+        instance._state.db = using
+    return objects
+
+
+def update(model, objects, fields, using='default'):
+    """bulk_update. auto_now-поля bulk_update сам не заполняет - они добавляются здесь."""
+    fields = list(fields)
+    now = timezone.now()
+    for field in model._meta.concrete_fields:
+        if getattr(field, 'auto_now', False):
+            for instance in objects:
+                setattr(instance, field.attname, now)
+            if field.name not in fields:
+                fields.append(field.name)
+    if fields:
+        model._default_manager.db_manager(using).bulk_update(objects, fields, batch_size=BATCH_SIZE)
+
+
+def set_m2m(model, name, links, replace=False, using='default'):
+    """Связи ManyToMany пачкой. links: [(объект, [связанные объекты])].
+    replace - сначала удалить прежние связи этих объектов."""
+    field = model._meta.get_field(name)
+    through = field.remote_field.through
+    source = field.m2m_field_name() + '_id'
+    target = field.m2m_reverse_field_name() + '_id'
+    manager = through._default_manager.db_manager(using)
+    if replace:
+        manager.filter(**{source + '__in': [instance.pk for instance, _ in links]}).delete()
+    rows = [through(**{source: instance.pk, target: related.pk})
+            for instance, related_objects in links for related in related_objects]
+    manager.bulk_create(rows, batch_size=BATCH_SIZE, ignore_conflicts=True)
+    bump_generation(field.related_model)
+
+
+def finish(model, objects):
+    """Действия, которые обычно делают обработчики post_save."""
+    bump_generation(model)
+    if search.get_kind(model) is not None and search.is_supported():
+        search.index_instances(objects)
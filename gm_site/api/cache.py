@@ -0,0 +1,112 @@
+import hashlib
+import threading
+import uuid
+from collections import Counter
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+
+GENERATION_KEY = 'api:generation:{}'
+RESPONSE_KEY = 'api:response:{}'
+
+
+def get_cache():
+    """Бэкенд кэша ответов API: алиас из settings.API_CACHE_ALIAS (по умолчанию 'default')."""
+    return caches[getattr(settings, 'API_CACHE_ALIAS', 'default')]
+
+
+def get_timeout():
+    return getattr(settings, 'API_CACHE_TIMEOUT', 300)
+
+
+def model_label(model):
+    return model._meta.label_lower
+
+
+def get_generations(labels):
+    """Возвращает текущие версии моделей. Версия - случайный токен, который меняется
+    при любом изменении данных модели; ключи ответов включают версии всех моделей,
+    от которых зависит маршрут, поэтому устаревшие записи просто перестают находиться."""
+    cache = get_cache()
+    keys = {GENERATION_KEY.format(label): label for label in sorted(labels)}
+    found = cache.get_many(keys)
+    generations = {}
+    for key, label in keys.items():
+        if key not in found:
+            cache.add(key, uuid.uuid4().hex, None)
+            found[key] = cache.get(key)
+        generations[label] = found[key]
+    return generations
+
+
+def bump_generation(model):
+    key = GENERATION_KEY.format(model_label(model))
+    get_cache().set(key, uuid.uuid4().hex, None)
+    # Повторная смена версии после коммита: иначе параллельный запрос успевает
+    # положить в кэш данные, прочитанные до фиксации транзакции.
+    transaction.on_commit(lambda: get_cache().set(key, uuid.uuid4().hex, None))
+
+
+def make_response_key(route, renderer_format, origin, path, query_params, generations):
+    """origin - схема и хост запроса: ссылки в ответе (photo, Link) абсолютные."""
+    query = sorted((key, value) for key in query_params for value in query_params.getlist(key))
+    parts = [route, renderer_format or '', origin, path, repr(query), repr(sorted(generations.items()))]
+    return RESPONSE_KEY.format(hashlib.md5('|'.join(parts).encode()).hexdigest())
+
+
+def check_shared_cache(app_configs, **kwargs):
+    """Проверка check --deploy: версии моделей должны быть общими для всех процессов,
+    иначе запись в одном процессе не сбрасывает кэш ответов остальных до API_CACHE_TIMEOUT."""
+    if not isinstance(get_cache(), LocMemCache):
+        return []
+    return [checks.Warning(
+        'Кэш ответов API (API_CACHE_ALIAS) хранится в памяти процесса: при нескольких '
+        'процессах изменения видны остальным только через API_CACHE_TIMEOUT секунд.',
+        hint='Задайте общий кэш через CACHE_BACKEND и CACHE_LOCATION, например Memcached.',
+        id='api.W002')]
+
+
+class CacheStats:
+    """Счётчики попаданий и промахов кэша ответов по маршрутам в пределах процесса."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = Counter()
+        self.misses = Counter()
+
+    def hit(self, route):
+        with self._lock:
+            self.hits[route] += 1
+
+    def miss(self, route):
+        with self._lock:
+            self.misses[route] += 1
+
+    def snapshot(self):
+        with self._lock:
+            routes = sorted(set(self.hits) | set(self.misses))
+            return {route: {'hits': self.hits[route], 'misses': self.misses[route]}
+                    for route in routes}
+
+    def reset(self):
+        with self._lock:
+            self.hits.clear()
+            self.misses.clear()
+
+
+stats = CacheStats()
+
+
+def invalidate_on_save(sender, **kwargs):
+    if sender._meta.app_label == 'api':
+        bump_generation(sender)
+
+
+def invalidate_on_m2m_change(sender, instance, action, model, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear') \
+            and instance._meta.app_label == 'api':
+        bump_generation(type(instance))
+        bump_generation(model)
@@ -0,0 +1,219 @@
+"""Выгрузка и загрузка всего каталога (export_catalogue / import_catalogue).
+
+Формат - поток JSON-строк: заголовок {"catalogue": 1}, затем для каждой таблицы
+строка {"model": "api.painting", "columns": [...]} и по строке-массиву на запись.
+Значения - колонки как есть (внешние ключи - id), промежуточные таблицы ManyToMany
+выгружаются отдельными таблицами после своей модели. Файл с расширением .gz сжимается.
+
+Загрузка идёт одной транзакцией пачками bulk_create. Внешние ключи Django создаёт
+DEFERRABLE INITIALLY DEFERRED, поэтому порядок строк внутри транзакции не важен
+(комментарий может ссылаться на родителя ниже по файлу); перед фиксацией ограничения
+проверяются явно, как в loaddata."""
+import datetime
+import decimal
+import gzip
+import json
+import os
+import shutil
+import sys
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.apps import apps
+from django.core.files.storage import default_storage
+from django.core.management.color import no_style
+from django.db import connection, models, transaction
+
+from . import search
+from .cache import bump_generation
+from .images import variant_names
+
+FORMAT_VERSION = 1
+CATALOGUE_MODELS = ('Artist', 'Genre', 'Painting', 'Gallery', 'Place', 'Event', 'Article', 'Comment', 'Main')
+
+
+class CatalogueError(Exception):
+    """Файл каталога повреждён или не подходит к текущей схеме."""
+
+
+def get_tables():
+    """Модели в порядке выгрузки: модели каталога, за каждой - её промежуточные таблицы."""
+    tables = []
+    for name in CATALOGUE_MODELS:
+        model = apps.get_model('api', name)
+        tables.append(model)
+        for field in model._meta.local_many_to_many:
+            if field.remote_field.through not in tables:
+                tables.append(field.remote_field.through)
+    return tables
+
+
+def open_catalogue(path, mode):
+    if path == '-':
+        return sys.stdout if mode == 'w' else sys.stdin
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+def _encode(value):
+    # Не DjangoJSONEncoder: он обрезает микросекунды у datetime.
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, (decimal.Decimal, uuid.UUID)):
+        return str(value)
+    raise TypeError(f'{type(value).__name__} не сериализуется в JSON')
+
+
+def _dump(data):
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'), default=_encode) + '\n'
+
+
+def export_catalogue(stream, chunk_size=2000):
+    """Пишет каталог в поток. Возвращает {метка модели: число записей}."""
+    counts = {}
+    stream.write(_dump({'catalogue': FORMAT_VERSION}))
+    for model in get_tables():
+        columns = [field.attname for field in model._meta.concrete_fields]
+        stream.write(_dump({'model': model._meta.label_lower, 'columns': columns}))
+        rows = model._default_manager.order_by('pk').values_list(*columns)
+        count = 0
+        for row in rows.iterator(chunk_size=chunk_size):
+            stream.write(_dump(row))
+            count += 1
+        counts[model._meta.label_lower] = count
+    return counts
+
+
+@contextmanager
+def preserve_timestamps(models_list):
+    """На время загрузки отключает auto_now/auto_now_add: bulk_create иначе
+    заменил бы сохранённые даты текущим временем."""
+    changed = []
+    for model in models_list:
+        for field in model._meta.concrete_fields:
+            if isinstance(field, (models.DateField, models.TimeField)) and (field.auto_now or field.auto_now_add):
+                changed.append((field, field.auto_now, field.auto_now_add))
+                field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in changed:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def _read(stream):
+    for number, line in enumerate(stream, 1):
+        if line.strip():
+            try:
+                yield number, json.loads(line)
+            except ValueError:
+                raise CatalogueError(f'Строка {number}: неверный JSON.')
+
+
+def import_catalogue(stream, clear=False, batch_size=1000):
+    """Загружает каталог из потока одной транзакцией. clear - сначала удалить
+    существующие записи каталога. Возвращает {метка модели: число записей}."""
+    tables = {model._meta.label_lower: model for model in get_tables()}
+    lines = _read(stream)
+    header = next(lines, (0, None))[1]
+    if not isinstance(header, dict) or header.get('catalogue') != FORMAT_VERSION:
+        raise CatalogueError('Это не файл каталога или версия формата не поддерживается.')
+
+    counts = {}
+    with transaction.atomic(), preserve_timestamps(tables.values()):
+        if clear:
+            for model in reversed(list(tables.values())):
+                model._default_manager.all()._raw_delete(model._default_manager.db)
+
+        model, fields, batch = None, [], []
+        for number, item in lines:
+            if isinstance(item, dict):
+                if model is not None:
+                    model._default_manager.bulk_create(batch, batch_size=batch_size)
+                model = tables.get(item.get('model'))
+                if model is None:
+                    raise CatalogueError(f'Строка {number}: неизвестная таблица {item.get("model")}.')
+                try:
+                    fields = [model._meta.get_field(column) for column in item['columns']]
+                except Exception:
+                    raise CatalogueError(f'Строка {number}: колонки не совпадают со схемой {model._meta.label}.')
+                batch = []
+                counts[model._meta.label_lower] = 0
+                continue
+            if model is None or not isinstance(item, list) or len(item) != len(fields):
+                raise CatalogueError(f'Строка {number}: запись вне таблицы или неверной длины.')
+            batch.append(model(**{field.attname: field.to_python(value) for field, value in zip(fields, item)}))
+            counts[model._meta.label_lower] += 1
+            if len(batch) >= batch_size:
+                model._default_manager.bulk_create(batch, batch_size=batch_size)
+                batch = []
+        if model is not None:
+            model._default_manager.bulk_create(batch, batch_size=batch_size)
+
+        connection.check_constraints(table_names=[model._meta.db_table for model in tables.values()])
+        sequences = connection.ops.sequence_reset_sql(no_style(), list(tables.values()))
+        if sequences:
+            with connection.cursor() as cursor:
+                for sql in sequences:
+                    cursor.execute(sql)
+        # bulk_create не шлёт сигналов: поисковый индекс и версии кэша обновляются здесь.
+        if search.is_supported():
+            search.rebuild()
+
+    for model in tables.values():
+        bump_generation(model)
+    return counts
+
+
+def media_names():
+    """Файлы хранилища, на которые ссылается каталог: фото и их варианты."""
+    names = set()
+    for model in get_tables():
+        for field in model._meta.concrete_fields:
+            if isinstance(field, models.FileField):
+                for name in model._default_manager.exclude(**{field.name: ''}) \
+                        .values_list(field.name, flat=True).iterator():
+                    if name:
+                        names.add(name)
+                        names.update(path for formats in variant_names(name).values()
+                                     for path in formats.values())
+    return sorted(names)
+
+
+def _copy_out(name, directory):
+    target = os.path.join(directory, name)
+    if not default_storage.exists(name):
+        return False
+    if os.path.exists(target) and os.path.getsize(target) == default_storage.size(name):
+        return False
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    with default_storage.open(name, 'rb') as source, open(target, 'wb') as destination:
+        shutil.copyfileobj(source, destination)
+    return True
+
+
+def _copy_in(name, directory):
+    source_path = os.path.join(directory, name)
+    if default_storage.exists(name):
+        if default_storage.size(name) == os.path.getsize(source_path):
+            return False
+        default_storage.delete(name)
+    with open(source_path, 'rb') as source:
+        default_storage.save(name, source)
+    return True
+
+
+def export_media(directory, workers=8):
+    """Копирует файлы каталога из хранилища в directory параллельно. Возвращает число скопированных."""
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return sum(executor.map(lambda name: _copy_out(name, directory), media_names()))
+
+
+def import_media(directory, workers=8):
+    """Копирует все файлы из directory в хранилище параллельно (одинаковые по размеру пропускаются)."""
+    names = [os.path.relpath(os.path.join(root, filename), directory).replace(os.sep, '/')
+             for root, _, filenames in os.walk(directory) for filename in filenames]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return sum(executor.map(lambda name: _copy_in(name, directory), names))
@@ -0,0 +1,48 @@
+from django.db import connection
+
+from .models import Comment
+
+
+def _tree_sql(parent_id):
+    """Рекурсивный CTE: страница комментариев верхнего уровня (или ответов на parent_id)
+    и все их потомки до заданной глубины. На уровень глубже выбираются только
+    для подсчёта ответов у листьев."""
+    table = connection.ops.quote_name(Comment._meta.db_table)
+    columns = 'id, article_id, parent_id, content, datetime'
+    anchor_parent = 'parent_id IS NULL' if parent_id is None else 'parent_id = %s'
+    return f"""
+        WITH RECURSIVE tree ({columns}, depth) AS (
+            SELECT {columns}, 0 FROM (
+                SELECT {columns} FROM {table}
+                WHERE article_id = %s AND {anchor_parent} AND id > %s
+                ORDER BY id LIMIT %s
+            ) roots
+            UNION ALL
+            SELECT c.id, c.article_id, c.parent_id, c.content, c.datetime, tree.depth + 1
+            FROM {table} c JOIN tree ON c.parent_id = tree.id
+            WHERE tree.depth < %s
+        )
+        SELECT {columns}, depth FROM tree ORDER BY depth, id
+    """
+
+
+def fetch_comment_tree(article_id, parent_id=None, max_depth=10, limit=50, after=0):
+    """Загружает ветку обсуждения одним запросом. Возвращает комментарии уровня 0
+    с атрибутом `depth`; дети лежат в атрибуте `replies` каждого узла,
+    `replies_count` - полное число ответов (включая не попавшие на глубину)."""
+    params = [article_id] + ([] if parent_id is None else [parent_id]) + [after, limit, max_depth + 1]
+    nodes = {}
+    roots = []
+    for comment in Comment.objects.raw(_tree_sql(parent_id), params):
+        comment.replies = []
+        comment.replies_count = 0
+        nodes[comment.pk] = comment
+        if comment.depth == 0:
+            roots.append(comment)
+            continue
+        parent = nodes.get(comment.parent_id)
+        if parent is not None:
+            parent.replies_count += 1
+            if comment.depth <= max_depth:
+                parent.replies.append(comment)
+    return roots
@@ -0,0 +1,119 @@
+"""Сжатие ответов API (Brotli, gzip) по заголовку Accept-Encoding.
+
+Brotli доступен, если установлен пакет Brotli или brotlicffi; без него отдаётся только gzip.
+Ответы короче API_COMPRESSION_MIN_SIZE байт не сжимаются: выигрыш меньше накладных расходов.
+Закэшированные ответы (CachedResponseMixin) сжимаются один раз при записи в кэш,
+с более высоким уровнем; попадание в кэш отдаёт готовые байты."""
+import gzip
+import re
+import zlib
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+DEFAULT_MIN_SIZE = 1024
+DEFAULT_URLS_REGEX = r'^/api/v1/'
+# Уровни для сжатия на лету и для однократного сжатия перед записью в кэш.
+LEVELS = {'br': 5, 'gzip': 6}
+CACHED_LEVELS = {'br': 9, 'gzip': 9}
+
+
+def get_encodings():
+    """Поддерживаемые кодировки в порядке предпочтения сервера."""
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def get_min_size():
+    return getattr(settings, 'API_COMPRESSION_MIN_SIZE', DEFAULT_MIN_SIZE)
+
+
+def is_compressed_path(path):
+    return re.match(getattr(settings, 'API_COMPRESSION_URLS_REGEX', DEFAULT_URLS_REGEX), path) is not None
+
+
+def parse_accept_encoding(header):
+    """'gzip;q=0.8, br' -> {'gzip': 0.8, 'br': 1.0}"""
+    accepted = {}
+    for item in header.split(','):
+        coding, _, params = item.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        match = re.search(r'q\s*=\s*([0-9.]+)', params)
+        if match:
+            try:
+                quality = float(match.group(1))
+            except ValueError:
+                quality = 0.0
+        accepted[coding] = quality
+    return accepted
+
+
+def choose_encoding(header, available=None):
+    """Лучшая кодировка из available, которую принимает клиент, или None."""
+    accepted = parse_accept_encoding(header or '')
+    best, best_quality = None, 0.0
+    for encoding in available if available is not None else get_encodings():
+        quality = accepted.get(encoding, accepted.get('*', 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(content, encoding, level=None):
+    level = level if level is not None else LEVELS[encoding]
+    if encoding == 'br':
+        return brotli.compress(content, quality=level)
+    return gzip.compress(content, compresslevel=level, mtime=0)
+
+
+def compress_stream(chunks, encoding):
+    """Сжатие потокового ответа; каждый кусок сбрасывается сразу, чтобы клиент
+    получал данные по мере выгрузки."""
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=LEVELS['br'])
+        for chunk in chunks:
+            yield compressor.process(chunk) + compressor.flush()
+        yield compressor.finish()
+        return
+    compressor = zlib.compressobj(LEVELS['gzip'], zlib.DEFLATED, 16 + zlib.MAX_WBITS)  # Формат gzip.
+    for chunk in chunks:
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+
+def precompress(content):
+    """Сжатые копии ответа для записи в кэш: {кодировка: байты}. Пусто для коротких ответов."""
+    if len(content) < get_min_size():
+        return {}
+    compressed = {}
+    for encoding in get_encodings():
+        data = compress(content, encoding, CACHED_LEVELS[encoding])
+        if len(data) < len(content):
+            compressed[encoding] = data
+    return compressed
+
+
+def set_encoding(response, encoding):
+    """Заголовки сжатого ответа. Сильный ETag становится слабым: байты тела другие."""
+    response['Content-Encoding'] = encoding
+    patch_vary_headers(response, ('Accept-Encoding',))
+    etag = response.get('ETag')
+    if etag and etag.startswith('"'):
+        response['ETag'] = 'W/' + etag
+
+
+def use_compressed(response, encoding, content):
+    response.content = content
+    response['Content-Length'] = str(len(content))
+    set_encoding(response, encoding)
+    return response
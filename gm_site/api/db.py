@@ -0,0 +1,65 @@
+"""Маршрутизация запросов к БД между основной базой и репликами чтения,
+настройка SQLite для локальной работы."""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+_replica_reads = ContextVar('api_replica_reads', default=False)
+
+
+@contextmanager
+def replica_reads(enabled=True):
+    """Разрешает (или запрещает) чтение с реплик внутри блока."""
+    token = _replica_reads.set(enabled)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def get_replicas():
+    return list(getattr(settings, 'API_READ_REPLICAS', ()))
+
+
+class ReplicaRouter:
+    """Запись - всегда в основную базу. Чтение уходит на случайную реплику только
+    внутри replica_reads() (middleware включает его для GET/HEAD), поэтому команды,
+    воркеры и запросы с изменениями читают то, что сами только что записали."""
+
+    def db_for_read(self, model, **hints):
+        replicas = get_replicas()
+        if replicas and _replica_reads.get():
+            return random.choice(replicas)
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *get_replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in get_replicas():
+            return False
+        return None
+
+
+SQLITE_PRAGMAS = (
+    # Читатели не блокируют писателя и наоборот; при WAL достаточно NORMAL.
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+)
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    # Через соединение sqlite3, не курсор Django: настройка соединения - не запрос
+    # и не должна попадать в счётчики api.metrics и api.querycheck.
+    if connection.vendor == 'sqlite' and getattr(settings, 'API_SQLITE_WAL', False):
+        for pragma in SQLITE_PRAGMAS:
+            connection.connection.execute(pragma)
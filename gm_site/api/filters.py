@@ -0,0 +1,78 @@
+from django.core.exceptions import ValidationError
+from django.db import models
+from rest_framework.exceptions import ValidationError as RequestValidationError
+from rest_framework.filters import BaseFilterBackend
+
+
+class Filter:
+    """Фильтр списка по параметру запроса.
+
+    lookup='exact' - ?name=value, 'in' - ?name=1,2 (любое из значений),
+    'range' - ?name_min=&name_max= (границы включаются). Значения приводятся полем
+    модели, для связей - полем ключа связанной модели; ManyToMany фильтруется
+    подзапросом к промежуточной таблице, без JOIN и DISTINCT."""
+    lookups = ('exact', 'in', 'range')
+    max_values = 100
+
+    def __init__(self, lookup='exact', field_name=None):
+        assert lookup in self.lookups, f'Неизвестный lookup: {lookup}'
+        self.lookup = lookup
+        self.field_name = field_name
+
+    def get_params(self, name):
+        if self.lookup == 'range':
+            return {f'{name}_min': 'gte', f'{name}_max': 'lte'}
+        return {name: self.lookup}
+
+    def to_python(self, field, value):
+        if isinstance(field, models.BooleanField):
+            value = {'true': True, 'false': False}.get(value.lower(), value)
+        return (field.target_field if field.is_relation else field).to_python(value)
+
+    def parse(self, field, lookup, raw):
+        if lookup != 'in':
+            return self.to_python(field, raw)
+        values = [self.to_python(field, item.strip()) for item in raw.split(',') if item.strip()]
+        if not values:
+            raise ValidationError('Не передано ни одного значения.')
+        if len(values) > self.max_values:
+            raise ValidationError(f'Не больше {self.max_values} значений.')
+        return values
+
+    def filter(self, queryset, name, params):
+        field = queryset.model._meta.get_field(self.field_name or name)
+        conditions = {}
+        errors = {}
+        for param, lookup in self.get_params(name).items():
+            if param not in params:
+                continue
+            try:
+                conditions[lookup] = self.parse(field, lookup, params[param])
+            except ValidationError as error:
+                errors[param] = error.messages
+        if errors:
+            raise RequestValidationError(errors)
+
+        for lookup, value in conditions.items():
+            if field.many_to_many:
+                through = field.remote_field.through.objects.filter(
+                    **{f'{field.m2m_reverse_field_name()}__{lookup}': value})
+                queryset = queryset.filter(pk__in=through.values(field.m2m_field_name()))
+            else:
+                queryset = queryset.filter(**{f'{field.name}__{lookup}': value})
+        return queryset
+
+
+class QueryFilterBackend(BaseFilterBackend):
+    """Применяет фильтры из атрибута представления `query_filters` ({параметр: Filter})."""
+
+    def filter_queryset(self, request, queryset, view):
+        errors = {}
+        for name, query_filter in getattr(view, 'query_filters', {}).items():
+            try:
+                queryset = query_filter.filter(queryset, name, request.query_params)
+            except RequestValidationError as error:
+                errors.update(error.detail)
+        if errors:
+            raise RequestValidationError(errors)
+        return queryset
@@ -0,0 +1,53 @@
+"""Состав и порядок картин галереи (GalleryPainting). Запись идёт пачками,
+поэтому сигналы не отправляются и версии кэша обновляются здесь."""
+from django.db import transaction
+
+from .bulk import BATCH_SIZE
+from .cache import bump_generation
+from .models import Gallery, GalleryPainting
+
+
+def _finish():
+    bump_generation(GalleryPainting)
+    bump_generation(Gallery)
+
+
+def set_paintings(gallery, painting_ids):
+    """Заменяет состав галереи: painting_ids - картины в порядке показа, позиция = индекс.
+    Строки уже входящих картин переиспользуются. Возвращает {'added', 'removed', 'moved'}."""
+    positions = {painting_id: index for index, painting_id in enumerate(painting_ids)}
+    with transaction.atomic():
+        rows = list(GalleryPainting.objects.filter(gallery=gallery).only('id', 'painting_id', 'position'))
+        removed = [row.pk for row in rows if row.painting_id not in positions]
+        moved = []
+        for row in rows:
+            position = positions.get(row.painting_id)
+            if position is not None and row.position != position:
+                row.position = position
+                moved.append(row)
+        present = {row.painting_id for row in rows}
+        added = [GalleryPainting(gallery=gallery, painting_id=painting_id, position=position)
+                 for painting_id, position in positions.items() if painting_id not in present]
+        if removed:
+            GalleryPainting.objects.filter(pk__in=removed)._raw_delete(GalleryPainting.objects.db)
+        GalleryPainting.objects.bulk_update(moved, ['position'], batch_size=BATCH_SIZE)
+        GalleryPainting.objects.bulk_create(added, batch_size=BATCH_SIZE)
+    _finish()
+    return {'added': len(added), 'removed': len(removed), 'moved': len(moved)}
+
+
+def move_paintings(gallery, positions):
+    """Новые позиции части картин: {painting_id: position}. Возвращает id картин,
+    которых нет в галерее (тогда ничего не меняется)."""
+    with transaction.atomic():
+        rows = list(GalleryPainting.objects.select_for_update()
+                    .filter(gallery=gallery, painting_id__in=list(positions))
+                    .only('id', 'painting_id', 'position'))
+        missing = sorted(set(positions) - {row.painting_id for row in rows})
+        if missing:
+            return missing
+        for row in rows:
+            row.position = positions[row.painting_id]
+        GalleryPainting.objects.bulk_update(rows, ['position'], batch_size=BATCH_SIZE)
+    _finish()
+    return []
@@ -0,0 +1,106 @@
+import io
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+# Размер варианта - максимальная сторона в пикселях, пропорции сохраняются.
+DEFAULT_VARIANTS = {
+    'thumb': 240,
+    'small': 640,
+    'medium': 1280,
+}
+
+# Формат -> (расширение, параметры сохранения Pillow).
+FORMATS = {
+    'jpeg': ('jpg', {'format': 'JPEG', 'quality': 82, 'optimize': True, 'progressive': True}),
+    'webp': ('webp', {'format': 'WEBP', 'quality': 80, 'method': 4}),
+}
+
+PHOTO_MODELS = ('Artist', 'Painting', 'Place', 'Event')
+
+
+def get_variants():
+    return getattr(settings, 'API_IMAGE_VARIANTS', DEFAULT_VARIANTS)
+
+
+def variant_name(name, variant, image_format):
+    """Имя файла варианта рядом с оригиналом: 'photo.png' -> 'photo.png.thumb.webp'.
+    Расширение оригинала остаётся в имени, чтобы 'photo.png' и 'photo.jpg' не делили варианты."""
+    return f'{name}.{variant}.{FORMATS[image_format][0]}'
+
+
+def variant_names(name):
+    return {variant: {image_format: variant_name(name, variant, image_format) for image_format in FORMATS}
+            for variant in get_variants()}
+
+
+def _prepare(image, image_format):
+    if image_format == 'jpeg' and image.mode != 'RGB':
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        if image.mode in ('RGBA', 'LA', 'P'):
+            image = image.convert('RGBA')
+            background.paste(image, mask=image.split()[-1])
+            return background
+        return image.convert('RGB')
+    if image_format == 'webp' and image.mode not in ('RGB', 'RGBA'):
+        return image.convert('RGBA' if 'A' in image.getbands() or image.mode == 'P' else 'RGB')
+    return image
+
+
+def generate_variants(field_file):
+    """Строит уменьшенные копии изображения во всех форматах и сохраняет их
+    в том же хранилище, что и оригинал. Возвращает словарь имён, как variant_names().
+
+    Картинки меньше целевого размера не увеличиваются, но перекодируются."""
+    storage = field_file.storage
+    names = variant_names(field_file.name)
+    with storage.open(field_file.name, 'rb') as source:
+        original = Image.open(source)
+        original = ImageOps.exif_transpose(original)
+        original.load()
+
+    for variant, size in sorted(get_variants().items(), key=lambda item: -item[1]):
+        image = original.copy()
+        image.thumbnail((size, size), Image.LANCZOS)
+        for image_format, (_, options) in FORMATS.items():
+            buffer = io.BytesIO()
+            _prepare(image, image_format).save(buffer, **options)
+            name = names[variant][image_format]
+            if storage.exists(name):
+                storage.delete(name)
+            storage.save(name, ContentFile(buffer.getvalue()))
+    return names
+
+
+def has_variants(field_file):
+    names = variant_names(field_file.name)
+    return all(field_file.storage.exists(name) for formats in names.values() for name in formats.values())
+
+
+EXIF_TAGS = {
+    0x010F: 'make',
+    0x0110: 'model',
+    0x0132: 'datetime',
+    0x013B: 'artist',
+    0x8298: 'copyright',
+}
+
+
+def extract_metadata(field_file):
+    """Основные сведения об изображении: размеры (с учётом поворота по EXIF), формат,
+    цветовая модель и несколько текстовых тегов EXIF."""
+    with field_file.storage.open(field_file.name, 'rb') as source:
+        image = Image.open(source)
+        width, height = image.size
+        exif = image.getexif()
+        if exif.get(0x0112) in (5, 6, 7, 8):
+            width, height = height, width
+        return {
+            'width': width,
+            'height': height,
+            'format': image.format,
+            'mode': image.mode,
+            'size': field_file.storage.size(field_file.name),
+            'exif': {name: str(exif[tag]).strip() for tag, name in EXIF_TAGS.items() if tag in exif},
+        }
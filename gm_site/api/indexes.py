@@ -0,0 +1,105 @@
+"""Поиск запросов, которым не хватает индекса.
+
+Разбор SQL эвристический и рассчитан на запросы, которые строит ORM Django: колонки
+в WHERE и ORDER BY всегда квалифицированы таблицей ("api_painting"."author_id").
+Для каждой таблицы запроса получается кандидат: колонки, сравниваемые на равенство,
+затем колонки сортировки (или первая колонка диапазона, если сортировки по таблице нет).
+Кандидат покрыт, если у таблицы есть индекс, начинающийся с этих колонок."""
+import re
+from collections import Counter, namedtuple
+
+from django.apps import apps
+
+COLUMN_RE = r'"(\w+)"\."(\w+)"'
+CONDITION_RE = re.compile(COLUMN_RE + r'\s*(IS NULL|IN\b|BETWEEN\b|>=|<=|!=|<>|=|>|<|LIKE\b)', re.I)
+ORDER_COLUMN_RE = re.compile(COLUMN_RE + r'(?:\s+(?:ASC|DESC))?', re.I)
+STATEMENT_RE = re.compile(r'\b(?:SELECT|UPDATE|DELETE)\b.*', re.I)
+EQUALITY_OPS = ('=', 'IN', 'IS NULL')
+
+Candidate = namedtuple('Candidate', 'table equal ordered')
+MissingIndex = namedtuple('MissingIndex', 'candidate count model fields sample')
+
+
+def read_statements(lines):
+    """SQL из строк лога: формат логгера django.db.backends ('(0.001) SELECT ...; args=(...)')
+    или любой другой, где запрос записан в одну строку."""
+    for line in lines:
+        match = STATEMENT_RE.search(line)
+        if match:
+            yield re.sub(r';\s*args=.*$', '', match.group(0).strip())
+
+
+def _clause(sql, start, ends):
+    upper = sql.upper()
+    position = upper.find(start)
+    if position == -1:
+        return ''
+    position += len(start)
+    stop = min([index for index in (upper.rfind(end) for end in ends) if index > position] or [len(sql)])
+    return sql[position:stop]
+
+
+def extract_candidates(sql):
+    where = _clause(sql, ' WHERE ', (' GROUP BY ', ' ORDER BY ', ' LIMIT '))
+    order_by = _clause(sql, ' ORDER BY ', (' LIMIT ', ' OFFSET '))
+
+    equal, ranged = {}, {}
+    for table, column, operator in CONDITION_RE.findall(where):
+        target = equal if operator.upper() in EQUALITY_OPS else ranged
+        target.setdefault(table, [])
+        if column not in target[table]:
+            target[table].append(column)
+
+    ordered = {}
+    for position, (table, column) in enumerate(ORDER_COLUMN_RE.findall(order_by)):
+        # Индекс одной таблицы помогает сортировке, только пока её колонки идут первыми.
+        if position == 0 or table in ordered and len(ordered[table]) == position:
+            ordered.setdefault(table, []).append(column)
+
+    candidates = []
+    for table in dict.fromkeys([*equal, *ranged, *ordered]):
+        tail = ordered.get(table) or ranged.get(table, [])[:1]
+        eq = sorted(column for column in equal.get(table, [])
+                    if column not in tail and column not in ranged.get(table, []))
+        if eq or tail:
+            candidates.append(Candidate(table, tuple(eq), tuple(tail)))
+    return candidates
+
+
+def is_covered(candidate, index_columns):
+    size = len(candidate.equal)
+    return set(index_columns[:size]) == set(candidate.equal) \
+        and tuple(index_columns[size:size + len(candidate.ordered)]) == candidate.ordered
+
+
+def get_index_columns(connection, table):
+    with connection.cursor() as cursor:
+        constraints = connection.introspection.get_constraints(cursor, table)
+    return [info['columns'] for info in constraints.values()
+            if info['columns'] and (info['index'] or info['primary_key'] or info['unique'])]
+
+
+def find_missing_indexes(statements, connection):
+    """Кандидаты без подходящего индекса, самые частые первыми."""
+    counts, samples = Counter(), {}
+    for sql in statements:
+        for candidate in extract_candidates(sql):
+            counts[candidate] += 1
+            samples.setdefault(candidate, sql)
+
+    models = {model._meta.db_table: model for model in apps.get_models(include_auto_created=True)}
+    tables = set(connection.introspection.table_names())
+    indexes = {}
+    missing = []
+    for candidate, count in counts.most_common():
+        if candidate.table not in tables:
+            continue
+        if candidate.table not in indexes:
+            indexes[candidate.table] = get_index_columns(connection, candidate.table)
+        if any(is_covered(candidate, columns) for columns in indexes[candidate.table]):
+            continue
+        model = models.get(candidate.table)
+        names = {field.column: field.name for field in model._meta.concrete_fields} if model else {}
+        fields = [names.get(column, column) for column in candidate.equal + candidate.ordered]
+        missing.append(MissingIndex(candidate, count, model, fields, samples[candidate]))
+    return missing
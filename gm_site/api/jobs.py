@@ -0,0 +1,156 @@
+import json
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from .cache import bump_generation, get_cache, get_generations, get_timeout, model_label
+from .images import PHOTO_MODELS, extract_metadata, generate_variants, has_variants
+from .models import ImageJob
+
+logger = logging.getLogger(__name__)
+
+UNFINISHED_KEY = 'api:image_jobs:unfinished:{}'
+
+
+def get_photo(model_name, name):
+    """FieldFile фото без обращения к БД - достаточно имени модели и имени файла."""
+    return apps.get_model('api', model_name)(photo=name).photo
+
+
+def process_photo(model_name, name):
+    """Работа, выполняемая в дочернем процессе: только файлы, без БД."""
+    photo = get_photo(model_name, name)
+    generate_variants(photo)
+    return extract_metadata(photo)
+
+
+def enqueue(instance):
+    """Ставит фото объекта в очередь, если вариантов ещё нет и задача не поставлена.
+    При API_IMAGE_JOBS_EAGER задача выполняется сразу в текущем процессе."""
+    photo = instance.photo
+    if not photo or has_variants(photo):
+        return None
+    model_name = type(instance).__name__
+    active = ImageJob.objects.filter(photo=photo.name, status__in=(ImageJob.PENDING, ImageJob.RUNNING))
+    if active.exists():
+        return None
+    job = ImageJob.objects.create(model_name=model_name, object_id=instance.pk, photo=photo.name)
+    if getattr(settings, 'API_IMAGE_JOBS_EAGER', False):
+        run_jobs(claim_jobs(job_ids=[job.pk]))
+        job.refresh_from_db()
+    return job
+
+
+def enqueue_on_save(sender, instance, **kwargs):
+    if sender._meta.app_label != 'api' or sender.__name__ not in PHOTO_MODELS or kwargs.get('raw'):
+        return
+    try:
+        enqueue(instance)
+    except OSError:
+        # Хранилище недоступно - сохранение объекта не должно из-за этого падать.
+        logger.exception('Не удалось поставить в очередь фото %s', instance.photo.name)
+
+
+def unfinished_photos():
+    """Имена фото, варианты которых ещё не готовы: есть задача в очереди, в работе
+    или с ошибкой и нет выполненной. Фото без задач (варианты построены командой
+    generate_image_variants) готовыми считаются. Множество кэшируется до смены версии
+    ImageJob (api.cache), поэтому обычный ответ запросов к БД не добавляет."""
+    label = model_label(ImageJob)
+    key = UNFINISHED_KEY.format(get_generations([label])[label])
+    names = get_cache().get(key)
+    if names is None:
+        unfinished = ImageJob.objects.filter(status__in=(ImageJob.PENDING, ImageJob.RUNNING, ImageJob.FAILED))
+        names, done = set(), set()
+        for name, job_status in ImageJob.objects.filter(photo__in=unfinished.values('photo')) \
+                .values_list('photo', 'status'):
+            (done if job_status == ImageJob.DONE else names).add(name)
+        names -= done
+        get_cache().set(key, names, get_timeout())
+    return names
+
+
+def claim_jobs(limit=None, job_ids=None):
+    """Забирает задачи из очереди. Переход pending -> running делается условным
+    UPDATE, поэтому несколько воркеров не возьмут одну задачу дважды."""
+    queryset = ImageJob.objects.filter(status=ImageJob.PENDING).order_by('pk')
+    if job_ids is not None:
+        queryset = queryset.filter(pk__in=job_ids)
+    claimed = []
+    for job in queryset[:limit] if limit else queryset:
+        now = timezone.now()
+        updated = ImageJob.objects.filter(pk=job.pk, status=ImageJob.PENDING) \
+            .update(status=ImageJob.RUNNING, started=now, attempts=job.attempts + 1)
+        if updated:
+            job.status, job.started, job.attempts = ImageJob.RUNNING, now, job.attempts + 1
+            claimed.append(job)
+    return claimed
+
+
+def finish_job(job, metadata=None, error=None):
+    job.finished = timezone.now()
+    if error is None:
+        job.status, job.metadata, job.error = ImageJob.DONE, json.dumps(metadata), None
+    else:
+        job.status, job.error = ImageJob.FAILED, error
+    job.save(update_fields=['status', 'metadata', 'error', 'finished'])
+    # Ответы с фото объекта меняются: варианты появились (или так и не появятся).
+    bump_generation(apps.get_model('api', job.model_name))
+
+
+def run_jobs(jobs, executor=None):
+    """Выполняет задачи в пуле процессов (или в текущем процессе без executor)
+    и записывает результат. Возвращает число обработанных задач."""
+    if executor is None:
+        outcomes = []
+        for job in jobs:
+            try:
+                outcomes.append((job, process_photo(job.model_name, job.photo), None))
+            except Exception as error:
+                outcomes.append((job, None, repr(error)))
+    else:
+        futures = [(job, executor.submit(process_photo, job.model_name, job.photo)) for job in jobs]
+        outcomes = []
+        for job, future in futures:
+            try:
+                outcomes.append((job, future.result(), None))
+            except Exception as error:
+                outcomes.append((job, None, repr(error)))
+    for job, metadata, error in outcomes:
+        finish_job(job, metadata, error)
+    return len(outcomes)
+
+
+def requeue_stale(timeout):
+    """Возвращает в очередь задачи, зависшие в running дольше timeout (упавший воркер)."""
+    border = timezone.now() - timedelta(seconds=timeout)
+    return ImageJob.objects.filter(status=ImageJob.RUNNING, started__lt=border) \
+        .update(status=ImageJob.PENDING, started=None)
+
+
+def run_worker(workers=2, once=False, poll_interval=2.0, stale_timeout=600):
+    """Цикл воркера: забирает пачку задач, раздаёт их пулу процессов, ждёт следующих.
+    workers=0 - обработка в текущем процессе."""
+    executor = ProcessPoolExecutor(max_workers=workers) if workers else None
+    processed = 0
+    try:
+        requeue_stale(stale_timeout)
+        while True:
+            close_old_connections()
+            jobs = claim_jobs(limit=max(workers, 1) * 4)
+            if jobs:
+                processed += run_jobs(jobs, executor)
+            elif once:
+                break
+            else:
+                time.sleep(poll_interval)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    return processed
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ...catalogue import export_catalogue, export_media, open_catalogue
+
+
+class Command(BaseCommand):
+    help = 'Выгружает весь каталог (художники, жанры, картины, галереи, места, события, статьи, ' \
+           'комментарии, главная) в поток JSON-строк; файлы .gz сжимаются.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Файл каталога (.jsonl или .jsonl.gz); '-' - stdout.")
+        parser.add_argument('--media', help='Каталог, куда скопировать изображения и их варианты.')
+        parser.add_argument('--workers', type=int, default=8, help='Потоков копирования файлов.')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        try:
+            stream = open_catalogue(options['path'], 'w')
+        except OSError as error:
+            raise CommandError(str(error))
+        try:
+            counts = export_catalogue(stream, chunk_size=options['chunk_size'])
+        finally:
+            if options['path'] == '-':
+                stream.flush()
+            else:
+                stream.close()
+        if options['media']:
+            copied = export_media(options['media'], workers=options['workers'])
+            self.stderr.write(f'Скопировано файлов: {copied}.')
+        self.stderr.write(self.style.SUCCESS(
+            f'Выгружено записей: {sum(counts.values())} в {len(counts)} таблицах.'))
@@ -0,0 +1,30 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from ...images import PHOTO_MODELS, generate_variants, has_variants
+
+
+class Command(BaseCommand):
+    help = 'Строит уменьшенные копии (JPEG и WebP) для уже загруженных фотографий.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true',
+                            help='Перестроить варианты, даже если они уже есть.')
+
+    def handle(self, *args, **options):
+        done = failed = 0
+        for model_name in PHOTO_MODELS:
+            model = apps.get_model('api', model_name)
+            names = model.objects.exclude(photo='').exclude(photo=None) \
+                .values_list('photo', flat=True).distinct()
+            for name in names.iterator():
+                photo = model(photo=name).photo
+                if not options['force'] and has_variants(photo):
+                    continue
+                try:
+                    generate_variants(photo)
+                    done += 1
+                except OSError as error:
+                    failed += 1
+                    self.stderr.write(f'{model_name} {name}: {error}')
+        self.stdout.write(self.style.SUCCESS(f'Готово: {done}, ошибок: {failed}.'))
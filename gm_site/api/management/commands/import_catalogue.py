@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError
+
+from ...catalogue import CatalogueError, import_catalogue, import_media, open_catalogue
+
+
+class Command(BaseCommand):
+    help = 'Загружает каталог, выгруженный export_catalogue, одной транзакцией.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Файл каталога (.jsonl или .jsonl.gz); '-' - stdin.")
+        parser.add_argument('--clear', action='store_true',
+                            help='Сначала удалить все существующие записи каталога.')
+        parser.add_argument('--media', help='Каталог с изображениями, выгруженными export_catalogue --media.')
+        parser.add_argument('--workers', type=int, default=8, help='Потоков копирования файлов.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        try:
+            stream = open_catalogue(options['path'], 'r')
+        except OSError as error:
+            raise CommandError(str(error))
+        try:
+            counts = import_catalogue(stream, clear=options['clear'], batch_size=options['batch_size'])
+        except (CatalogueError, DatabaseError) as error:
+            raise CommandError(f'Каталог не загружен: {error}')
+        finally:
+            if options['path'] != '-':
+                stream.close()
+        if options['media']:
+            copied = import_media(options['media'], workers=options['workers'])
+            self.stdout.write(f'Скопировано файлов: {copied}.')
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено записей: {sum(counts.values())} в {len(counts)} таблицах.'))
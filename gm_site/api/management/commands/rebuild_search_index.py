@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ... import search
+
+
+class Command(BaseCommand):
+    help = 'Полностью перестраивает полнотекстовый индекс (картины, статьи, художники, события).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        try:
+            total = search.rebuild(batch_size=options['batch_size'])
+        except search.SearchUnavailable as error:
+            raise CommandError(str(error))
+        self.stdout.write(self.style.SUCCESS(f'Проиндексировано объектов: {total}.'))
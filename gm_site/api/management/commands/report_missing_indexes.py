@@ -0,0 +1,63 @@
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+
+from ...indexes import find_missing_indexes, read_statements
+
+
+class Command(BaseCommand):
+    help = 'Ищет в журнале SQL-запросов фильтры и сортировки, которым не хватает индекса.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('logs', nargs='*',
+                            help="Файлы журнала запросов (логгер django.db.backends); '-' - stdin.")
+        parser.add_argument('--url', action='append', default=[],
+                            help='Выполнить GET по адресу в этом процессе и разобрать его запросы '
+                                 '(кэш ответов отключается). Можно указать несколько раз.')
+        parser.add_argument('--min-count', type=int, default=1,
+                            help='Не показывать кандидатов, встретившихся реже.')
+
+    def handle(self, *args, **options):
+        if not options['logs'] and not options['url']:
+            raise CommandError('Укажите файл журнала или --url.')
+        statements = []
+        for path in options['logs']:
+            try:
+                with (sys.stdin if path == '-' else open(path, encoding='utf-8')) as lines:
+                    statements.extend(read_statements(lines))
+            except OSError as error:
+                raise CommandError(str(error))
+        statements.extend(self.capture(options['url']))
+
+        missing = [item for item in find_missing_indexes(statements, connection)
+                   if item.count >= options['min_count']]
+        for item in missing:
+            label = item.model._meta.label if item.model else item.candidate.table
+            self.stdout.write(f'{label}: {item.count} запр., models.Index(fields={item.fields!r})')
+            self.stdout.write(f'    {item.sample}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Разобрано запросов: {len(statements)}, кандидатов без индекса: {len(missing)}.'))
+
+    def capture(self, urls):
+        statements = []
+        if not urls:
+            return statements
+
+        def record(execute, sql, params, many, context):
+            statements.append(sql)
+            return execute(sql, params, many, context)
+
+        caches = dict(settings.CACHES, api_index_report={
+            'BACKEND': 'django.core.cache.backends.dummy.DummyCache'})
+        with override_settings(CACHES=caches, API_CACHE_ALIAS='api_index_report',
+                               ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']), \
+                connection.execute_wrapper(record):
+            client = Client()
+            for url in urls:
+                response = client.get(url)
+                if response.status_code != 200:
+                    self.stderr.write(f'{url}: HTTP {response.status_code}')
+        return statements
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from ...jobs import run_worker
+
+
+class Command(BaseCommand):
+    help = 'Обрабатывает очередь задач изображений (ImageJob) в пуле процессов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2,
+                            help='Число процессов; 0 - обработка в текущем процессе.')
+        parser.add_argument('--once', action='store_true',
+                            help='Разобрать текущую очередь и завершиться.')
+        parser.add_argument('--poll-interval', type=float, default=2.0,
+                            help='Пауза между опросами пустой очереди, в секундах.')
+        parser.add_argument('--stale-timeout', type=int, default=600,
+                            help='Через сколько секунд задача в статусе running считается зависшей.')
+
+    def handle(self, *args, **options):
+        processed = run_worker(workers=options['workers'], once=options['once'],
+                               poll_interval=options['poll_interval'],
+                               stale_timeout=options['stale_timeout'])
+        self.stdout.write(self.style.SUCCESS(f'Обработано задач: {processed}.'))
@@ -0,0 +1,164 @@
+"""Замеры запросов API: время ответа, число и время SQL-запросов, время сериализации
+и рендеринга, размер ответа - по представлению и действию.
+
+Данные собирает MetricsMiddleware (api.middleware) и хранит в гистограммах процесса,
+как и счётчики кэша (api.cache.stats). Между процессами они не объединяются: при
+нескольких процессах за одним адресом каждый опрос попадает в случайный процесс и
+получает только его значения. Поэтому у всех рядов есть метка process (хост:pid), и
+счётчики разных процессов - разные ряды, которые суммирует уже запрос к Prometheus,
+например sum by (viewset, action) (rate(api_requests_total[5m])).
+Текстовый формат - registry.render()."""
+import math
+import os
+import socket
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (512, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+_current = ContextVar('api_request_metrics', default=None)
+
+
+class RequestMetrics:
+    """Замеры одного запроса. Фазы (serialize, render) накапливаются через timed()."""
+
+    def __init__(self):
+        self.start = perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.timings = defaultdict(float)
+        self.active = set()
+
+    def record_query(self, execute, sql, params, many, context):
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_time += perf_counter() - start
+
+
+@contextmanager
+def collect():
+    """Делает RequestMetrics текущими для запроса (и потока или задачи, где он выполняется)."""
+    metrics = RequestMetrics()
+    token = _current.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def timed(phase):
+    """Время фазы текущего запроса. Вложенные замеры той же фазы не суммируются дважды."""
+    metrics = _current.get()
+    if metrics is None or phase in metrics.active:
+        yield
+        return
+    metrics.active.add(phase)
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        metrics.timings[phase] += perf_counter() - start
+        metrics.active.discard(phase)
+
+
+def process_label():
+    # pid читается при каждом выводе: процессы, созданные fork, получают свою метку.
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _format_labels(labels):
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for value in labels.values())
+    return '{' + ','.join(f'{name}="{value}"' for name, value in zip(labels, escaped)) + '}'
+
+
+class Histogram:
+    def __init__(self, name, description, buckets):
+        self.name = name
+        self.description = description
+        self.buckets = tuple(buckets) + (math.inf,)
+        self.series = {}  # метки -> [счётчики корзин..., сумма, количество]
+
+    def observe(self, labels, value):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [0] * len(self.buckets) + [0, 0]
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[index] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def render(self, label_names, const_labels):
+        lines = [f'# HELP {self.name} {self.description}', f'# TYPE {self.name} histogram']
+        for labels, series in sorted(self.series.items()):
+            labels = dict(const_labels, **dict(zip(label_names, labels)))
+            for bound, count in zip(self.buckets, series):
+                bucket_labels = _format_labels(dict(labels, le=_format_value(bound)))
+                lines.append(f'{self.name}_bucket{bucket_labels} {count}')
+            lines.append(f'{self.name}_sum{_format_labels(labels)} {_format_value(series[-2])}')
+            lines.append(f'{self.name}_count{_format_labels(labels)} {series[-1]}')
+        return lines
+
+
+class MetricsRegistry:
+    label_names = ('viewset', 'action')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.requests = defaultdict(int)  # (viewset, action, status) -> количество
+            self.histograms = {
+                'duration': Histogram('api_request_duration_seconds', 'Время ответа.', DURATION_BUCKETS),
+                'queries': Histogram('api_request_db_queries', 'Число SQL-запросов.', QUERY_BUCKETS),
+                'db': Histogram('api_request_db_seconds', 'Время SQL-запросов.', DURATION_BUCKETS),
+                'serialize': Histogram('api_request_serialize_seconds',
+                                       'Время сериализации (сериализаторы и сборка строк).', DURATION_BUCKETS),
+                'render': Histogram('api_request_render_seconds', 'Время рендеринга ответа.', DURATION_BUCKETS),
+                'size': Histogram('api_response_size_bytes', 'Размер тела ответа.', SIZE_BUCKETS),
+            }
+
+    def observe(self, viewset, action, status, metrics, duration, size):
+        labels = (viewset, action)
+        with self._lock:
+            self.requests[labels + (str(status),)] += 1
+            self.histograms['duration'].observe(labels, duration)
+            self.histograms['queries'].observe(labels, metrics.queries)
+            self.histograms['db'].observe(labels, metrics.db_time)
+            self.histograms['serialize'].observe(labels, metrics.timings['serialize'])
+            self.histograms['render'].observe(labels, metrics.timings['render'])
+            if size is not None:
+                self.histograms['size'].observe(labels, size)
+
+    def render(self):
+        """Все метрики в текстовом формате Prometheus (version 0.0.4)."""
+        const_labels = {'process': process_label()}
+        with self._lock:
+            lines = ['# HELP api_requests_total Число запросов.', '# TYPE api_requests_total counter']
+            for labels, count in sorted(self.requests.items()):
+                names = self.label_names + ('status',)
+                labels = dict(const_labels, **dict(zip(names, labels)))
+                lines.append(f'api_requests_total{_format_labels(labels)} {count}')
+            for histogram in self.histograms.values():
+                lines.extend(histogram.render(self.label_names, const_labels))
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
@@ -0,0 +1,131 @@
+import re
+from contextlib import ExitStack
+from time import perf_counter
+
+from django.conf import settings
+from django.db import connections
+from django.utils.cache import patch_vary_headers
+
+from . import compression, metrics, querycheck
+from .db import replica_reads
+
+
+class ReplicaReadsMiddleware:
+    """Запросы только на чтение (GET/HEAD) читают с реплик, см. api.db.ReplicaRouter."""
+    safe_methods = ('GET', 'HEAD')
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with replica_reads(request.method in self.safe_methods):
+            return self.get_response(request)
+
+
+class CompressionMiddleware:
+    """Сжатие ответов API (Brotli, gzip) по Accept-Encoding, см. api.compression.
+    Ответы из кэша приходят уже сжатыми (Content-Encoding задан) и не пересжимаются."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if not compression.is_compressed_path(request.path_info) or response.has_header('Content-Encoding'):
+            return response
+        if not response.streaming and len(response.content) < compression.get_min_size():
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = compression.choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING'))
+        if encoding is None:
+            return response
+        if response.streaming:
+            response.streaming_content = compression.compress_stream(response.streaming_content, encoding)
+            del response['Content-Length']
+            compression.set_encoding(response, encoding)
+            return response
+        content = compression.compress(response.content, encoding)
+        if len(content) >= len(response.content):
+            return response
+        return compression.use_compressed(response, encoding, content)
+
+
+class MetricsMiddleware:
+    """Замеры запросов API по представлению и действию (api.metrics): время ответа,
+    число и время SQL-запросов, время сериализации и рендеринга, размер тела.
+    С API_SERVER_TIMING те же значения уходят клиенту в заголовке Server-Timing."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if re.match(getattr(settings, 'API_METRICS_URLS_REGEX', r'^/api/v1/'), request.path_info) is None:
+            return self.get_response(request)
+        with metrics.collect() as current, ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(current.record_query))
+            response = self.get_response(request)
+        duration = perf_counter() - current.start
+
+        viewset, action = getattr(request, 'api_view_labels', ('', ''))
+        size = None if response.streaming else len(response.content)
+        metrics.registry.observe(viewset, action, response.status_code, current, duration, size)
+        if getattr(settings, 'API_SERVER_TIMING', False):
+            response['Server-Timing'] = ', '.join([
+                f'db;dur={current.db_time * 1000:.1f};desc="{current.queries} queries"',
+                f'serialize;dur={current.timings["serialize"] * 1000:.1f}',
+                f'render;dur={current.timings["render"] * 1000:.1f}',
+                f'total;dur={duration * 1000:.1f}',
+            ])
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class, action = resolve_view(view_func, request.method)
+        request.api_view_labels = (getattr(view_class, '__name__', view_func.__name__), action)
+        return None
+
+
+class QueryCheckMiddleware:
+    """Проверка SQL-запросов к API в разработке и тестах (api.querycheck): N+1 по полям
+    сериализаторов, медленные запросы и бюджет query_budgets представления.
+    Отчёт доступен в response.query_report; в строгом режиме нарушения поднимают QueryCheckFailed."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not querycheck.is_enabled() or not request.path_info.startswith('/api/'):
+            return self.get_response(request)
+        capture = querycheck.QueryCapture()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(capture))
+            response = self.get_response(request)
+
+        report = response.query_report = capture.report()
+        view_class, action = getattr(request, 'api_view', (None, None))
+        label = f'{request.method} {request.path_info}'
+        if view_class is not None:
+            label += f' ({view_class.__name__}.{action})'
+        # Браузерный API строит формы со списками связанных объектов: в бюджет не входит.
+        budget = None
+        if getattr(getattr(response, 'accepted_renderer', None), 'format', None) != 'api':
+            budget = querycheck.get_budget(view_class, action)
+        problems = querycheck.check(report, label, budget)
+        if problems and querycheck.is_strict():
+            raise querycheck.QueryCheckFailed('\n'.join(problems))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.api_view = resolve_view(view_func, request.method)
+        return None
+
+
+def resolve_view(view_func, method):
+    """(класс представления DRF или None, действие): для ViewSet - имя действия, иначе метод."""
+    view_class = getattr(view_func, 'cls', None)
+    actions = getattr(view_func, 'actions', None) or {}
+    method = method.lower()
+    action = actions.get(method) or (actions.get('get') if method == 'head' else None) or method
+    return view_class, action
@@ -0,0 +1,162 @@
+# Generated by Django 3.0.2 on 2026-10-18 11:34
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    replaces = [('api', '0001_initial'), ('api', '0002_auto_20200105_0421'), ('api', '0003_auto_20200107_0234'),
+                ('api', '0004_auto_20200107_0718'), ('api', '0005_painting_description'),
+                ('api', '0006_auto_20200107_0759'), ('api', '0007_auto_20200107_0824'),
+                ('api', '0008_auto_20200108_0437'), ('api', '0009_gallery'), ('api', '0010_auto_20200108_0554'),
+                ('api', '0011_auto_20200110_0938'), ('api', '0012_remove_article_for_main'), ('api', '0013_main')]
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Article',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=250)),
+                ('datetime', models.DateTimeField(auto_now=True)),
+                ('content', models.TextField(null=True)),
+            ],
+            options={
+                'verbose_name': 'Статья',
+                'verbose_name_plural': 'Статьи',
+            },
+        ),
+        migrations.CreateModel(
+            name='Artist',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('is_master', models.BooleanField(default=False)),
+                ('name', models.CharField(max_length=250, unique=True)),
+                ('photo', models.ImageField(blank=True, null=True, upload_to='', verbose_name='Фото')),
+                ('artist_date', models.DateField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Художник',
+                'verbose_name_plural': 'Художники',
+            },
+        ),
+        migrations.CreateModel(
+            name='Genre',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('genre_name', models.CharField(max_length=30, unique=True)),
+            ],
+            options={
+                'verbose_name': 'Жанр',
+                'verbose_name_plural': 'Жанры',
+            },
+        ),
+        migrations.CreateModel(
+            name='Main',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title_about', models.CharField(max_length=250)),
+                ('content_about', models.TextField(null=True)),
+            ],
+            options={
+                'verbose_name': 'Главная',
+                'verbose_name_plural': 'Главная',
+            },
+        ),
+        migrations.CreateModel(
+            name='Place',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=250)),
+                ('photo', models.ImageField(blank=True, null=True, upload_to='', verbose_name='Фото')),
+                ('address', models.CharField(blank=True, max_length=250, null=True)),
+                ('latitude', models.FloatField(blank=True, null=True)),
+                ('longitude', models.FloatField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Площадка',
+                'verbose_name_plural': 'Площадки',
+            },
+        ),
+        migrations.CreateModel(
+            name='Painting',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=250)),
+                ('photo', models.ImageField(blank=True, null=True, upload_to='', verbose_name='Фото')),
+                ('datetime', models.DateTimeField(auto_now=True)),
+                ('painting_date', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('description', models.TextField(blank=True, null=True)),
+                ('author', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='api.Artist')),
+                ('genres', models.ManyToManyField(blank=True, to='api.Genre')),
+            ],
+            options={
+                'verbose_name': 'Картина',
+                'verbose_name_plural': 'Картины',
+            },
+        ),
+        migrations.CreateModel(
+            name='Gallery',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=250)),
+                ('paintings', models.ManyToManyField(blank=True, to='api.Painting')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Event',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=250)),
+                ('photo', models.ImageField(blank=True, null=True, upload_to='', verbose_name='Фото')),
+                ('datetime', models.DateTimeField(auto_now=True)),
+                ('event_date', models.DateField(null=True)),
+                ('artists', models.ManyToManyField(blank=True, to='api.Artist')),
+                ('paintings', models.ManyToManyField(blank=True, to='api.Painting')),
+                ('place', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='api.Place')),
+            ],
+            options={
+                'verbose_name': 'Событие',
+                'verbose_name_plural': 'События',
+            },
+        ),
+        migrations.CreateModel(
+            name='Comment',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content', models.TextField()),
+                ('datetime', models.DateTimeField(auto_now=True)),
+                ('article', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='api.Article')),
+                ('parent', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='child_set', to='api.Comment')),
+            ],
+            options={
+                'verbose_name': 'Комментарий',
+                'verbose_name_plural': 'Комментарии',
+            },
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='artists',
+            field=models.ManyToManyField(blank=True, to='api.Artist'),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='events',
+            field=models.ManyToManyField(blank=True, to='api.Event'),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='paintings',
+            field=models.ManyToManyField(blank=True, to='api.Painting'),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='places',
+            field=models.ManyToManyField(blank=True, to='api.Place'),
+        ),
+    ]
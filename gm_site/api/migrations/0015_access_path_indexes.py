@@ -0,0 +1,68 @@
+# Generated by Django 3.0.2 on 2026-10-18 11:34
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_imagejob'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='article',
+            options={'ordering': ['datetime', 'id'], 'verbose_name': 'Статья', 'verbose_name_plural': 'Статьи'},
+        ),
+        migrations.AlterModelOptions(
+            name='comment',
+            options={'ordering': ['datetime', 'id'], 'verbose_name': 'Комментарий', 'verbose_name_plural': 'Комментарии'},
+        ),
+        migrations.AlterModelOptions(
+            name='event',
+            options={'ordering': ['datetime', 'id'], 'verbose_name': 'Событие', 'verbose_name_plural': 'События'},
+        ),
+        migrations.AlterModelOptions(
+            name='painting',
+            options={'ordering': ['datetime', 'id'], 'verbose_name': 'Картина', 'verbose_name_plural': 'Картины'},
+        ),
+        migrations.AlterField(
+            model_name='comment',
+            name='article',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='api.Article'),
+        ),
+        migrations.AlterField(
+            model_name='painting',
+            name='author',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, to='api.Artist'),
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['datetime', 'id'], name='api_article_datetime_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['datetime', 'id'], name='api_comment_datetime_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['article', 'parent', 'id'], name='api_comment_thread_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['datetime', 'id'], name='api_event_datetime_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['event_date', 'id'], name='api_event_event_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='painting',
+            index=models.Index(fields=['datetime', 'id'], name='api_painting_datetime_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='painting',
+            index=models.Index(fields=['author', 'datetime', 'id'], name='api_painting_author_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.0.2 on 2026-10-18 11:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_access_path_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='painting',
+            index=models.Index(fields=['painting_date', 'id'], name='api_painting_date_idx'),
+        ),
+    ]
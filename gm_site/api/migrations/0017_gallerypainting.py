@@ -0,0 +1,77 @@
+# Generated by Django 3.0.2 on 2026-10-18 11:34
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def copy_to_positions(apps, schema_editor):
+    """Картины галерей из прежней таблицы api_gallery_paintings: позиция - порядок добавления."""
+    Gallery = apps.get_model('api', 'Gallery')
+    GalleryPainting = apps.get_model('api', 'GalleryPainting')
+    through = Gallery._meta.get_field('paintings').remote_field.through
+    db = schema_editor.connection.alias
+    rows, positions = [], {}
+    for gallery_id, painting_id in through.objects.using(db).order_by('gallery_id', 'id') \
+            .values_list('gallery_id', 'painting_id').iterator():
+        position = positions[gallery_id] = positions.get(gallery_id, -1) + 1
+        rows.append(GalleryPainting(gallery_id=gallery_id, painting_id=painting_id, position=position))
+    GalleryPainting.objects.using(db).bulk_create(rows, batch_size=500)
+
+
+def copy_from_positions(apps, schema_editor):
+    Gallery = apps.get_model('api', 'Gallery')
+    GalleryPainting = apps.get_model('api', 'GalleryPainting')
+    through = Gallery._meta.get_field('paintings').remote_field.through
+    db = schema_editor.connection.alias
+    rows = [through(gallery_id=gallery_id, painting_id=painting_id)
+            for gallery_id, painting_id in GalleryPainting.objects.using(db)
+            .order_by('gallery_id', 'position', 'id').values_list('gallery_id', 'painting_id').iterator()]
+    through.objects.using(db).bulk_create(rows, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0016_painting_date_idx'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='gallery',
+            options={'verbose_name': 'Галерея', 'verbose_name_plural': 'Галереи'},
+        ),
+        migrations.CreateModel(
+            name='GalleryPainting',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveIntegerField(default=0)),
+                ('gallery', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='api.Gallery')),
+                ('painting', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='api.Painting')),
+            ],
+            options={
+                'verbose_name': 'Картина в галерее',
+                'verbose_name_plural': 'Картины в галерее',
+                'ordering': ['gallery', 'position', 'id'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='gallerypainting',
+            index=models.Index(fields=['gallery', 'position', 'id'], name='api_gallery_position_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='gallerypainting',
+            constraint=models.UniqueConstraint(fields=('gallery', 'painting'), name='api_gallery_painting_unique'),
+        ),
+        migrations.RunPython(copy_to_positions, copy_from_positions),
+        # Сменить промежуточную таблицу у ManyToMany через AlterField нельзя: прежняя
+        # таблица удаляется вместе с полем, поле с through таблиц не создаёт.
+        migrations.RemoveField(
+            model_name='gallery',
+            name='paintings',
+        ),
+        migrations.AddField(
+            model_name='gallery',
+            name='paintings',
+            field=models.ManyToManyField(blank=True, through='api.GalleryPainting', to='api.Painting'),
+        ),
+    ]
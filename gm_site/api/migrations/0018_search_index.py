@@ -0,0 +1,29 @@
+# Generated by Django 3.0.2 on 2026-10-18 16:10
+
+from django.db import migrations
+
+from api import search
+
+
+def create_index(apps, schema_editor):
+    """Индекс поиска - таблица FTS5, только на SQLite. Существующие объекты индексируются сразу."""
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(search.CREATE_SQL)
+    search.rebuild(apps=apps)
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(f'DROP TABLE IF EXISTS {search.INDEX_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0017_gallerypainting'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,447 @@
+import hashlib
+import json
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Max, Model, prefetch_related_objects
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from rest_framework.decorators import action
+from rest_framework.exceptions import MethodNotAllowed, ValidationError
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+from . import bulk as bulk_write, compression
+from .cache import get_cache, get_generations, get_timeout, make_response_key, model_label, stats
+from .metrics import timed
+from .queryplan import build_related_plan, collect_models
+from .rows import compile_rows
+
+
+class BulkMixin:
+    """Пакетные операции на <prefix>/bulk/.
+
+    GET ?ids=3,1,2 - объекты по списку id одним запросом. Порядок ответа совпадает
+    с порядком ids, на месте ненайденных объектов стоит null, их id - в 'missing'.
+    POST [{...}, ...] - создание, PATCH [{"id": 1, ...}, ...] - частичное изменение,
+    DELETE ?ids= - удаление. Запись идёт одной транзакцией через bulk_create/bulk_update
+    (api.bulk); если хотя бы один элемент не прошёл проверку, не сохраняется ничего,
+    а ответ 400 содержит 'errors' - список ошибок по элементам (null у корректных).
+    Модели со своим save() (синглтон Main) пакетно не создаются и не изменяются: 405."""
+    bulk_ids_query_param = 'ids'
+    bulk_max_ids = 500
+    bulk_max_items = 5000
+
+    def get_bulk_ids(self, request):
+        raw = ','.join(request.query_params.getlist(self.bulk_ids_query_param))
+        ids = []
+        for item in raw.split(','):
+            item = item.strip()
+            if not item:
+                continue
+            try:
+                pk = int(item)
+            except ValueError:
+                raise ValidationError({self.bulk_ids_query_param: f'Неверный id: {item}.'})
+            if pk not in ids:
+                ids.append(pk)
+        if not ids:
+            raise ValidationError({self.bulk_ids_query_param: 'Не передан ни один id.'})
+        if len(ids) > self.bulk_max_ids:
+            raise ValidationError(
+                {self.bulk_ids_query_param: f'Не больше {self.bulk_max_ids} id за запрос.'})
+        return ids
+
+    @action(detail=False, methods=['get'], url_path='bulk')
+    def bulk(self, request, *args, **kwargs):
+        ids = self.get_bulk_ids(request)
+        found = {obj.pk: obj for obj in self.filter_queryset(self.get_queryset()).filter(pk__in=ids)}
+        serializer = self.get_serializer([found[pk] for pk in ids if pk in found], many=True)
+        rows = iter(serializer.data)
+        return Response({
+            'results': [next(rows) if pk in found else None for pk in ids],
+            'missing': [pk for pk in ids if pk not in found],
+        })
+
+    def get_bulk_items(self, request):
+        if not isinstance(request.data, list):
+            raise ValidationError({'non_field_errors': ['Ожидается список объектов.']})
+        if not request.data:
+            raise ValidationError({'non_field_errors': ['Пустой список.']})
+        if len(request.data) > self.bulk_max_items:
+            raise ValidationError({'non_field_errors': [f'Не больше {self.bulk_max_items} объектов за запрос.']})
+        return request.data
+
+    def check_batch_unique(self, model, validated, errors):
+        """Уникальные поля не должны повторяться внутри пакета: UniqueValidator
+        сравнивает каждый элемент только с базой."""
+        for field in model._meta.fields:
+            if not field.unique or field.primary_key:
+                continue
+            seen = set()
+            for index, data in enumerate(validated):
+                if data is None or field.name not in data:
+                    continue
+                if data[field.name] in seen:
+                    errors[index] = dict(errors[index] or {}, **{field.name: ['Значение повторяется в пакете.']})
+                seen.add(data[field.name])
+
+    def save_bulk(self, save):
+        try:
+            with transaction.atomic():
+                return save()
+        except IntegrityError as error:
+            raise ValidationError({'non_field_errors': [str(error)]})
+
+    def validate_bulk(self, pairs, partial=False):
+        """pairs: [(объект или None, данные)]. Возвращает (validated_data, ошибки) по элементам.
+        Связанные объекты по pk загружаются для всего пакета сразу."""
+        preloaded = bulk_write.preload_relations(self.get_serializer(), [data for _, data in pairs])
+        validated, errors = [], []
+        for instance, data in pairs:
+            serializer = bulk_write.use_preloaded(
+                self.get_serializer(instance, data=data, partial=partial), preloaded)
+            if serializer.is_valid():
+                validated.append(serializer.validated_data)
+                errors.append(None)
+            else:
+                validated.append(None)
+                errors.append(serializer.errors)
+        self.check_batch_unique(self.get_queryset().model, validated, errors)
+        return validated, errors
+
+    def check_bulk_write(self, request, model):
+        # bulk_create/bulk_update обходят Model.save() и его правила.
+        if model.save is not Model.save:
+            raise MethodNotAllowed(request.method, detail=f'{model._meta.verbose_name_plural}: '
+                                                          f'пакетная запись не поддерживается.')
+
+    def bulk_error_response(self, errors):
+        # Не через ValidationError: она превратила бы null корректных элементов в строку.
+        return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+    @bulk.mapping.post
+    def bulk_create(self, request, *args, **kwargs):
+        model = self.get_queryset().model
+        self.check_bulk_write(request, model)
+        validated, errors = self.validate_bulk([(None, data) for data in self.get_bulk_items(request)])
+        if any(errors):
+            return self.bulk_error_response(errors)
+
+        def save():
+            rows = [bulk_write.split_m2m(model, data) for data in validated]
+            objects = bulk_write.insert(model, [model(**plain) for plain, _ in rows])
+            for name in {name for _, m2m in rows for name in m2m}:
+                bulk_write.set_m2m(model, name, [(instance, m2m[name]) for instance, (_, m2m)
+                                                 in zip(objects, rows) if name in m2m])
+            bulk_write.finish(model, objects)
+            return objects
+
+        objects = self.save_bulk(save)
+        return Response({'ids': [instance.pk for instance in objects]}, status=status.HTTP_201_CREATED)
+
+    @bulk.mapping.patch
+    def bulk_update(self, request, *args, **kwargs):
+        model = self.get_queryset().model
+        self.check_bulk_write(request, model)
+        items = self.get_bulk_items(request)
+        ids = [item.get('id') if isinstance(item, dict) else None for item in items]
+        found = model._default_manager.in_bulk([pk for pk in ids if isinstance(pk, int)])
+        id_errors = []
+        for index, pk in enumerate(ids):
+            if not isinstance(pk, int):
+                id_errors.append({'id': ['Ожидается целое число.']})
+            elif pk not in found:
+                id_errors.append({'id': ['Объект не найден.']})
+            elif pk in ids[:index]:
+                id_errors.append({'id': ['id повторяется в пакете.']})
+            else:
+                id_errors.append(None)
+        if any(id_errors):
+            return self.bulk_error_response(id_errors)
+        validated, errors = self.validate_bulk(
+            [(found[pk], {key: value for key, value in item.items() if key != 'id'})
+             for pk, item in zip(ids, items)], partial=True)
+        if any(errors):
+            return self.bulk_error_response(errors)
+
+        def save():
+            objects, fields, links = [], set(), {}
+            for pk, data in zip(ids, validated):
+                instance = found[pk]
+                plain, m2m = bulk_write.split_m2m(model, data)
+                for name, value in plain.items():
+                    setattr(instance, name, value)
+                fields.update(plain)
+                for name, related in m2m.items():
+                    links.setdefault(name, []).append((instance, related))
+                objects.append(instance)
+            bulk_write.update(model, objects, fields)
+            for name, pairs in links.items():
+                bulk_write.set_m2m(model, name, pairs, replace=True)
+            bulk_write.finish(model, objects)
+            return objects
+
+        objects = self.save_bulk(save)
+        return Response({'ids': [instance.pk for instance in objects]})
+
+    @bulk.mapping.delete
+    def bulk_destroy(self, request, *args, **kwargs):
+        ids = self.get_bulk_ids(request)
+        queryset = self.get_queryset().model._default_manager.filter(pk__in=ids)
+        with transaction.atomic():
+            deleted = list(queryset.values_list('pk', flat=True))
+            # QuerySet.delete() шлёт pre/post_delete для каждого объекта: кэш и индекс обновятся.
+            queryset.delete()
+        return Response({'deleted': [pk for pk in ids if pk in deleted],
+                         'missing': [pk for pk in ids if pk not in deleted]})
+
+
+class StreamingExportMixin:
+    """Потоковая выгрузка всей коллекции: GET <prefix>/export/?output=ndjson|json.
+    ndjson (по умолчанию) - объект на строку, json - массив, отдаваемый по частям.
+    Фильтры списка действуют. Строки читаются iterator() пачками по export_chunk_size,
+    связи ManyToMany подгружаются отдельно для каждой пачки, поэтому память
+    не зависит от размера таблицы."""
+    export_chunk_size = 500
+    export_output_param = 'output'
+    export_content_types = {
+        'ndjson': 'application/x-ndjson; charset=utf-8',
+        'json': 'application/json; charset=utf-8',
+    }
+
+    def perform_content_negotiation(self, request, force=False):
+        # Ответ выгрузки не проходит через рендереры DRF, Accept: application/x-ndjson допустим.
+        return super().perform_content_negotiation(request, force=force or self.action == 'export')
+
+    def encode_item(self, item):
+        return json.dumps(item, cls=JSONEncoder, ensure_ascii=False, separators=(',', ':'))
+
+    def iter_export_chunks(self):
+        plan = self.get_related_plan()
+        # iterator() не выполняет prefetch_related, связи подгружаются на каждую пачку.
+        queryset = self.filter_queryset(self.get_queryset()).prefetch_related(None).order_by('pk')
+        chunk = []
+        for instance in queryset.iterator(chunk_size=self.export_chunk_size):
+            chunk.append(instance)
+            if len(chunk) >= self.export_chunk_size:
+                prefetch_related_objects(chunk, *plan.prefetch)
+                yield self.get_serializer(chunk, many=True).data
+                chunk = []
+        if chunk:
+            prefetch_related_objects(chunk, *plan.prefetch)
+            yield self.get_serializer(chunk, many=True).data
+
+    def stream_ndjson(self):
+        for items in self.iter_export_chunks():
+            yield ''.join(self.encode_item(item) + '\n' for item in items).encode()
+
+    def stream_json(self):
+        opened = False
+        for items in self.iter_export_chunks():
+            parts = []
+            for item in items:
+                parts.append((',' if opened else '[') + self.encode_item(item))
+                opened = True
+            yield ''.join(parts).encode()
+        yield b']' if opened else b'[]'
+
+    @action(detail=False, methods=['get'], url_path='export')
+    def export(self, request, *args, **kwargs):
+        output = request.query_params.get(self.export_output_param, 'ndjson')
+        if output not in self.export_content_types:
+            raise ValidationError({self.export_output_param: f'Неизвестный формат: {output}.'})
+        stream = self.stream_ndjson() if output == 'ndjson' else self.stream_json()
+        response = StreamingHttpResponse(stream, content_type=self.export_content_types[output])
+        response['Content-Disposition'] = f'attachment; filename="{self.basename}.{output}"'
+        return response
+
+
+class ValuesListMixin:
+    """Быстрый путь list для представлений с values_list_rows = True: строки из values()
+    и id ManyToMany одним запросом на поле (api.rows), без экземпляров моделей и полей
+    сериализатора на каждую запись. Ответ совпадает с обычным побайтно; если сериализатор
+    к пути не сводится (?expand=, вложенные поля) или формат не JSON, используется обычный list."""
+    values_list_rows = False
+
+    def get_row_plan(self):
+        if not self.values_list_rows or getattr(self.request.accepted_renderer, 'format', None) != 'json':
+            return None
+        return compile_rows(self.get_serializer())
+
+    def get_row_columns(self, plan):
+        """Колонки строк и поля сортировки: по ним пагинация строит курсор."""
+        meta = plan.model._meta
+        names = [*getattr(self, 'cursor_ordering', ()), *getattr(self, 'ordering_fields', ())]
+        for name in names:
+            name = name.lstrip('-')
+            plan.add_column(meta.pk.attname if name == 'pk' else meta.get_field(name).attname)
+        return plan.columns
+
+    def list(self, request, *args, **kwargs):
+        plan = self.get_row_plan()
+        if plan is None:
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset()).prefetch_related(None) \
+            .values(*self.get_row_columns(plan))
+        page = self.paginate_queryset(queryset)
+        rows = page if page is not None else list(queryset)
+        with timed('serialize'):
+            data = plan.build(rows)
+        return self.get_paginated_response(data) if page is not None else Response(data)
+
+
+class RelatedPlanMixin:
+    """Автоматически добавляет к queryset представления select_related/prefetch_related
+    по связям, объявленным в его сериализаторе, чтобы список не порождал N+1 запросов.
+    На действиях чтения выбираются только колонки, которые выводит сериализатор."""
+    restricted_actions = ('list', 'retrieve', 'bulk', 'export')
+
+    def get_related_plan(self):
+        return build_related_plan(self.get_serializer())
+
+    def get_queryset(self):
+        return self.get_related_plan().apply(super().get_queryset(),
+                                             restrict=self.action in self.restricted_actions)
+
+
+class CachedResponseMixin:
+    """Кэширование отрендеренных JSON-ответов list/retrieve. Ключ строится из маршрута,
+    схемы и хоста, пути, параметров запроса и версий всех моделей, попадающих в ответ;
+    версии меняются сигналами post_save/post_delete/m2m_changed (см. api.cache).
+    Версии должны быть общими для процессов: кэш в памяти процесса - только для
+    разработки (проверка check --deploy, api.W002).
+    Изменения через QuerySet.update() сигналов не шлют и кэш не сбрасывают."""
+    cache_responses = False
+    cached_actions = ('list', 'retrieve')
+    cached_headers = ('Link', 'ETag')
+    cached_formats = ('json',)
+    cache_timeout = None  # Секунды; None - settings.API_CACHE_TIMEOUT.
+
+    def get_cache_models(self):
+        return collect_models(self.get_serializer())
+
+    def is_cacheable(self, request):
+        return self.cache_responses and self.action in self.cached_actions \
+            and request.method == 'GET' \
+            and getattr(request.accepted_renderer, 'format', None) in self.cached_formats
+
+    def get_response_cache_key(self, request):
+        generations = get_generations(model_label(model) for model in self.get_cache_models())
+        return make_response_key(f'{self.basename}-{self.action}', request.accepted_renderer.format,
+                                 f'{request.scheme}://{request.get_host()}', request.path,
+                                 request.query_params, generations)
+
+    def get_cached_hit(self, request, key):
+        """Ответ из кэша или None. Обращений к БД нет, поэтому метод вызывается
+        и из цикла событий (api.asgi)."""
+        entry = get_cache().get(key)
+        if entry is None:
+            return None
+        stats.hit(f'{self.basename}-{self.action}')
+        # ETag сохранён вместе с ответом, условный запрос отвечается без БД.
+        response = get_conditional_response(request._request, etag=dict(entry['headers']).get('ETag'))
+        if response is None:
+            response = HttpResponse(entry['content'], status=entry['status'],
+                                    content_type=entry['content_type'])
+        for header, value in entry['headers']:
+            response[header] = value
+        if response.status_code == 200:
+            self.use_precompressed(request, response, entry)
+        response['X-Cache'] = 'HIT'
+        return response
+
+    def use_precompressed(self, request, response, entry):
+        """Сжатая копия из записи кэша, если клиент принимает её кодировку."""
+        compressed = entry.get('compressed') or {}
+        encoding = compression.choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING'), tuple(compressed))
+        if encoding is not None and compression.is_compressed_path(request.path_info):
+            compression.use_compressed(response, encoding, compressed[encoding])
+
+    def get_cached_response(self, handler, request, *args, **kwargs):
+        if not self.is_cacheable(request):
+            return handler(request, *args, **kwargs)
+
+        route = f'{self.basename}-{self.action}'
+        key = self.get_response_cache_key(request)
+        response = self.get_cached_hit(request, key)
+        if response is not None:
+            return response
+
+        stats.miss(route)
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            response.accepted_renderer = request.accepted_renderer
+            response.accepted_media_type = request.accepted_media_type
+            response.renderer_context = self.get_renderer_context()
+            response.render()
+            entry = {
+                'content': response.content,
+                'status': response.status_code,
+                'content_type': response['Content-Type'],
+                'headers': [(header, response[header]) for header in self.cached_headers
+                            if response.has_header(header)],
+                # Сжатые копии хранятся рядом с исходными байтами: попадание не пересжимает ответ.
+                'compressed': compression.precompress(response.content),
+            }
+            get_cache().set(key, entry, self.cache_timeout or get_timeout())
+            self.use_precompressed(request, response, entry)
+        response['X-Cache'] = 'MISS'
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(super().retrieve, request, *args, **kwargs)
+
+
+class ConditionalGetMixin:
+    """Условные GET-запросы (If-None-Match) для list/retrieve.
+
+    Валидатор считается без сериализации: для списка - максимум `conditional_field`
+    и число строк одним агрегатным запросом, для объекта - значение поля строки.
+    В ETag также входят версии связанных моделей из api.cache, т.к. изменение
+    ManyToMany не обновляет auto_now-поле владельца. Last-Modified не отдаётся:
+    удаление строки или изменение ManyToMany не сдвигает максимум даты, и
+    If-Modified-Since вернул бы 304 с устаревшими данными."""
+    conditional_field = None
+
+    def get_validator(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset()).order_by()
+        if self.action == 'list':
+            result = queryset.aggregate(last=Max(self.conditional_field), count=Count('pk'))
+            last_modified, count = result['last'], result['count']
+        else:
+            lookup = self.lookup_url_kwarg or self.lookup_field
+            last_modified = queryset.filter(**{self.lookup_field: kwargs[lookup]}) \
+                .values_list(self.conditional_field, flat=True).first()
+            if last_modified is None:
+                return None
+            count = 1
+        generations = get_generations(model_label(model) for model in self.get_cache_models())
+        parts = [self.action, getattr(request.accepted_renderer, 'format', ''),
+                 request.get_full_path(), repr(last_modified), str(count),
+                 repr(sorted(generations.items()))]
+        return quote_etag(hashlib.md5('|'.join(parts).encode()).hexdigest())
+
+    def get_validated_response(self, handler, request, *args, **kwargs):
+        if self.conditional_field is None or request.method != 'GET':
+            return handler(request, *args, **kwargs)
+        etag = self.get_validator(request, *args, **kwargs)
+        if etag is None:
+            return handler(request, *args, **kwargs)
+
+        response = get_conditional_response(request._request, etag=etag)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.get_validated_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_validated_response(super().retrieve, request, *args, **kwargs)
@@ -38,7 +38,7 @@ class Painting(models.Model):
     photo = models.ImageField(upload_to="", verbose_name="Фото",
                               null=True, blank=True, unique=False)
     author = models.ForeignKey(Artist, on_delete=models.SET_NULL,
-                               null=True, blank=True)
+                               null=True, blank=True, db_index=False)  # Индекс - (author, datetime).
     genres = models.ManyToManyField(Genre, blank=True)
     datetime = models.DateTimeField(auto_now=True)
     painting_date = models.PositiveSmallIntegerField(null=True, blank=True)
@@ -50,12 +50,49 @@ class Painting(models.Model):
     class Meta:
         verbose_name = "Картина"
         verbose_name_plural = "Картины"
+        ordering = ['datetime', 'id']
+        indexes = [
+            models.Index(fields=['datetime', 'id'], name='api_painting_datetime_idx'),
+            models.Index(fields=['author', 'datetime', 'id'], name='api_painting_author_idx'),
+            models.Index(fields=['painting_date', 'id'], name='api_painting_date_idx'),
+        ]
 
 
 class Gallery(models.Model):
-    """Класс-галерея для тематической агрегации картин"""
+    """Класс-галерея для тематической агрегации картин.
+    Порядок картин в галерее задаёт GalleryPainting.position."""
     name = models.CharField(max_length=250)
-    paintings = models.ManyToManyField(Painting, blank=True)
+    paintings = models.ManyToManyField(Painting, blank=True, through='GalleryPainting')
+
+    def __str__(self):
+        return self.name
+
+    class Meta:
+        verbose_name = "Галерея"
+        verbose_name_plural = "Галереи"
+
+
+class GalleryPainting(models.Model):
+    """Картина в галерее. Страница картин галереи читается по индексу
+    (gallery, position, id); одинаковые позиции упорядочиваются по id."""
+    gallery = models.ForeignKey(Gallery, on_delete=models.CASCADE,
+                                db_index=False)  # Индекс - (gallery, position, id).
+    painting = models.ForeignKey(Painting, on_delete=models.CASCADE)
+    position = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.gallery_id}: {self.painting_id} ({self.position})"
+
+    class Meta:
+        verbose_name = "Картина в галерее"
+        verbose_name_plural = "Картины в галерее"
+        ordering = ['gallery', 'position', 'id']
+        constraints = [
+            models.UniqueConstraint(fields=['gallery', 'painting'], name='api_gallery_painting_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['gallery', 'position', 'id'], name='api_gallery_position_idx'),
+        ]
 
 
 class Place(models.Model):
@@ -94,6 +131,11 @@ class Event(models.Model):
     class Meta:
         verbose_name = "Событие"
         verbose_name_plural = "События"
+        ordering = ['datetime', 'id']
+        indexes = [
+            models.Index(fields=['datetime', 'id'], name='api_event_datetime_idx'),
+            models.Index(fields=['event_date', 'id'], name='api_event_event_date_idx'),
+        ]
 
 
 class Article(models.Model):
@@ -113,17 +155,27 @@ class Article(models.Model):
     class Meta:
         verbose_name = "Статья"
         verbose_name_plural = "Статьи"
+        ordering = ['datetime', 'id']
+        indexes = [
+            models.Index(fields=['datetime', 'id'], name='api_article_datetime_idx'),
+        ]
 
 
 class Main(models.Model):
     """Класс 'Главная'. Используется для заполнения контентом главной страницы.
-    TODO: сделать реализацию синглтоном, либо придумать как подругому хранить контент на главной."""
+    Синглтон: запись всегда одна, с pk=SINGLETON_PK. Для чтения - api.singleton.main_singleton."""
+    SINGLETON_PK = 1
+
     title_about = models.CharField(max_length=250)
     content_about = models.TextField(null=True)
 
     def __str__(self):
         return self.title_about
 
+    def save(self, *args, **kwargs):
+        self.pk = self.SINGLETON_PK
+        super().save(*args, **kwargs)
+
     class Meta:
         verbose_name = "Главная"
         verbose_name_plural = "Главная"
@@ -133,7 +185,7 @@ class Comment(models.Model):
     """Класс Комментарий. Привязывается к статье и к родительскому комментарию, если есть.
     TODO: Переработать с учетом аутентификации через соцсети."""
     article = models.ForeignKey(Article, on_delete=models.CASCADE,
-                                null=False, blank=False)
+                                null=False, blank=False, db_index=False)  # Индекс - (article, parent, id).
     parent = models.ForeignKey('self', on_delete=models.SET_NULL,
                                blank=True, null=True, related_name='child_set')
     content = models.TextField()
@@ -145,3 +197,42 @@ class Comment(models.Model):
     class Meta:
         verbose_name = "Комментарий"
         verbose_name_plural = "Комментарии"
+        ordering = ['datetime', 'id']
+        indexes = [
+            models.Index(fields=['datetime', 'id'], name='api_comment_datetime_idx'),
+            # Ветка обсуждения: корни статьи (parent IS NULL) или ответы, по порядку id.
+            models.Index(fields=['article', 'parent', 'id'], name='api_comment_thread_idx'),
+        ]
+
+
+class ImageJob(models.Model):
+    """Класс Задача обработки изображения. Очередь хранится в БД и разбирается
+    командой run_image_worker: построение вариантов и извлечение метаданных фото."""
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Готово'),
+        (FAILED, 'Ошибка'),
+    )
+
+    model_name = models.CharField(max_length=50)
+    object_id = models.PositiveIntegerField()
+    photo = models.CharField(max_length=250)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING, db_index=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    metadata = models.TextField(null=True, blank=True)  # JSON: размеры, формат, EXIF.
+    error = models.TextField(null=True, blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+    started = models.DateTimeField(null=True, blank=True)
+    finished = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.model_name} #{self.object_id} - {self.photo} ({self.status})"
+
+    class Meta:
+        verbose_name = "Задача обработки изображения"
+        verbose_name_plural = "Задачи обработки изображений"
@@ -0,0 +1,177 @@
+import base64
+import binascii
+import json
+from types import SimpleNamespace
+
+from django.core.exceptions import ValidationError
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError as RequestValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Постраничный вывод по ключу (keyset). Вместо OFFSET используется условие
+    по полям сортировки последней строки страницы, поэтому стоимость запроса
+    не зависит от номера страницы. Тело ответа остаётся списком, ссылка на
+    следующую страницу передаётся в заголовке Link (rel="next").
+
+    Поля сортировки берутся из атрибута представления `cursor_ordering`,
+    последним полем должен быть уникальный ключ (обычно pk). ?ordering=<поле> или
+    ?ordering=-<поле> заменяет её на (поле, pk), если поле есть в `ordering_fields`
+    представления. Строки с NULL в поле сортировки стоят там, где их ставит база
+    (SQLite - первыми по возрастанию, PostgreSQL - последними): тогда ORDER BY
+    совпадает с индексом (поле, id) и страница не сортируется целиком. NULL и значения
+    читаются отдельными диапазонами индекса (get_segments): условие с IS NULL внутри OR
+    SQLite выполняет без индексного порядка."""
+    cursor_query_param = 'cursor'
+    ordering_query_param = 'ordering'
+    page_size_query_param = 'page_size'
+    page_size = api_settings.PAGE_SIZE
+    max_page_size = 500
+    ordering = ('pk',)
+    invalid_cursor_message = 'Неверный курсор.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.model = queryset.model
+        self.ordering = self.get_ordering(request, view)
+        self.nullable = [name != 'pk' and queryset.model._meta.get_field(name).null
+                         for name in (field.lstrip('-') for field in self.ordering)]
+        self.nulls_largest = connections[queryset.db].features.nulls_order_largest
+        self.page_size_value = self.get_page_size(request)
+
+        queryset = queryset.order_by(*self.ordering)
+        position = self.decode_cursor(request)
+        try:
+            segments = self.get_segments(queryset, position)
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+        limit = self.page_size_value + 1
+        rows = []
+        for segment in segments:
+            rows += segment[:limit - len(rows)]
+            if len(rows) == limit:
+                break
+        self.has_next = len(rows) > self.page_size_value
+        self.page = rows[:self.page_size_value]
+        return self.page
+
+    def get_ordering(self, request, view):
+        ordering = tuple(getattr(view, 'cursor_ordering', self.ordering))
+        param = request.query_params.get(self.ordering_query_param)
+        if param is None:
+            return ordering
+        if param.lstrip('-') not in getattr(view, 'ordering_fields', ()):
+            raise RequestValidationError({self.ordering_query_param: f'Сортировка по {param} недоступна.'})
+        return param, '-pk' if param.startswith('-') else 'pk'
+
+    def get_segments(self, queryset, position):
+        """Запросы, строки которых по порядку составляют продолжение выдачи.
+        Первая страница - один проход по индексу. Дальше при NULL в первом поле
+        сортировки блок NULL и блок значений читаются по отдельности, начиная с
+        блока курсора: второй запрос нужен только на странице, где блоки сменяются."""
+        if position is None:
+            return [queryset]
+        if not self.nullable[0]:
+            return [queryset.filter(self.get_position_filter(position))]
+        name = self.ordering[0].lstrip('-')
+        blocks = [queryset.filter(**{name + '__isnull': False}), queryset.filter(**{name + '__isnull': True})]
+        if not self.nulls_after(self.ordering[0]):
+            blocks.reverse()
+        if (position[0] is None) == self.nulls_after(self.ordering[0]):
+            blocks = blocks[1:]
+        blocks[0] = blocks[0].filter(self.get_position_filter(position))
+        return blocks
+
+    def nulls_after(self, field):
+        """Идут ли NULL после значений в порядке страниц."""
+        return self.nulls_largest != field.startswith('-')
+
+    def get_page_size(self, request):
+        page_size = self.page_size or self.max_page_size
+        if self.page_size_query_param in request.query_params:
+            try:
+                page_size = int(request.query_params[self.page_size_query_param])
+            except (TypeError, ValueError):
+                pass
+        return max(1, min(page_size, self.max_page_size))
+
+    def get_position_filter(self, position):
+        """Лексикографическое условие (a, b, ...) > (x, y, ...) через цепочку OR внутри
+        блока get_segments: строки с NULL и со значениями в первом поле сюда не смешиваются."""
+        condition = Q()
+        for index, field in enumerate(self.ordering):
+            name = field.lstrip('-')
+            if position[index] is None:
+                continue
+            lookup = '__lt' if field.startswith('-') else '__gt'
+            step = Q(**{name + lookup: position[index]})
+            for prev_field, prev_value in zip(self.ordering[:index], position):
+                prev_name = prev_field.lstrip('-')
+                step &= Q(**{prev_name + '__isnull': True} if prev_value is None else {prev_name: prev_value})
+            condition |= step
+        return condition
+
+    def get_position(self, instance):
+        if isinstance(instance, dict):
+            # Строка values() (api.rows): value_to_string читает поле как атрибут.
+            instance = SimpleNamespace(**instance)
+        position = []
+        for field in self.ordering:
+            name = field.lstrip('-')
+            model_field = self.model._meta.pk if name == 'pk' else self.model._meta.get_field(name)
+            if name == 'pk':
+                position.append(getattr(instance, model_field.attname))
+            elif getattr(instance, model_field.attname) is None:
+                position.append(None)
+            else:
+                position.append(model_field.value_to_string(instance))
+        return position
+
+    def encode_cursor(self, position):
+        data = json.dumps(position, separators=(',', ':')).encode()
+        return base64.urlsafe_b64encode(data).decode('ascii').rstrip('=')
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            position = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        except (TypeError, ValueError, UnicodeError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or len(position) != len(self.ordering) \
+                or any(value == '' or (value is None and not nullable)
+                       for value, nullable in zip(position, self.nullable)):
+            raise NotFound(self.invalid_cursor_message)
+        return position
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        cursor = self.encode_cursor(self.get_position(self.page[-1]))
+        return replace_query_param(self.base_url, self.cursor_query_param, cursor)
+
+    def get_paginated_response(self, data):
+        headers = {}
+        next_link = self.get_next_link()
+        if next_link is not None:
+            headers['Link'] = f'<{next_link}>; rel="next"'
+        return Response(data, headers=headers)
+
+
+class GalleryPaintingPagination(KeysetPagination):
+    """Картины галереи в порядке показа. Ключ (position, id) совпадает с хвостом
+    индекса (gallery, position, id), поэтому страница - один проход по индексу."""
+    ordering = ('position', 'pk')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        # Порядок задаёт только сама пагинация: cursor_ordering представления к ней не относится.
+        return super().paginate_queryset(queryset, request)
@@ -0,0 +1,118 @@
+"""Проверка SQL-запросов API в разработке и тестах: N+1, медленные запросы, бюджеты.
+
+QueryCheckMiddleware (включается API_QUERY_CHECK, по умолчанию при DEBUG) собирает
+запросы каждого запроса к API и группирует их по форме: SQL без значений параметров,
+списки IN (...) схлопнуты. Форма, повторённая API_QUERY_CHECK_REPEAT и более раз
+при выводе одного и того же поля сериализатора, - это N+1; поле определяется по стеку
+вызовов DRF Serializer.to_representation. Бюджет запросов объявляется в представлении:
+query_budgets = {'list': 3, ...}. В строгом режиме (API_QUERY_CHECK_STRICT, его включает
+api.testing.QueryCheckTestRunner) превышение бюджета или N+1 поднимает QueryCheckFailed, и тест падает."""
+import logging
+import re
+import sys
+from collections import Counter, namedtuple
+from time import perf_counter
+
+from django.conf import settings
+from rest_framework.serializers import Serializer
+
+logger = logging.getLogger(__name__)
+
+CapturedQuery = namedtuple('CapturedQuery', 'sql shape origin duration')
+RepeatedQuery = namedtuple('RepeatedQuery', 'shape origin count')
+
+IN_LIST_RE = re.compile(r'\(\s*%s(?:\s*,\s*%s)*\s*\)')
+STRING_RE = re.compile(r"'(?:[^']|'')*'")
+NUMBER_RE = re.compile(r'(?<![\w"])-?\d+(?:\.\d+)?(?![\w"])')
+SPACE_RE = re.compile(r'\s+')
+
+
+class QueryCheckFailed(AssertionError):
+    """Запрос к API превысил бюджет запросов или выполнил N+1."""
+
+
+def is_enabled():
+    return getattr(settings, 'API_QUERY_CHECK', settings.DEBUG)
+
+
+def is_strict():
+    return getattr(settings, 'API_QUERY_CHECK_STRICT', False)
+
+
+def normalize(sql):
+    """Форма запроса: 'WHERE id IN (%s, %s)' и 'WHERE id IN (%s)' дают одну и ту же."""
+    sql = IN_LIST_RE.sub('(...)', sql)
+    sql = STRING_RE.sub('?', sql)
+    sql = NUMBER_RE.sub('?', sql)
+    return SPACE_RE.sub(' ', sql).strip()
+
+
+def find_origin():
+    """Поле сериализатора, при выводе которого выполняется запрос: 'PaintingSerializer.genres'."""
+    frame = sys._getframe(2)
+    while frame is not None:
+        if frame.f_code.co_name == 'to_representation' and 'field' in frame.f_locals:
+            serializer = frame.f_locals.get('self')
+            field = frame.f_locals['field']
+            if isinstance(serializer, Serializer) and getattr(field, 'field_name', None):
+                return f'{type(serializer).__name__}.{field.field_name}'
+        frame = frame.f_back
+    return None
+
+
+class QueryCapture:
+    """execute_wrapper: запоминает каждый запрос с формой, полем-источником и временем."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        origin = find_origin()
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append(CapturedQuery(sql, normalize(sql), origin, perf_counter() - start))
+
+    def report(self):
+        return QueryReport(self.queries)
+
+
+class QueryReport:
+    def __init__(self, queries):
+        self.queries = queries
+        self.count = len(queries)
+        self.shapes = Counter(query.shape for query in queries)
+
+    def repeated(self, threshold=None):
+        """Формы, повторённые threshold и более раз при выводе одного поля сериализатора."""
+        threshold = threshold or getattr(settings, 'API_QUERY_CHECK_REPEAT', 3)
+        by_origin = Counter((query.shape, query.origin) for query in self.queries if query.origin)
+        return [RepeatedQuery(shape, origin, count)
+                for (shape, origin), count in by_origin.most_common() if count >= threshold]
+
+    def slow(self, threshold_ms=None):
+        threshold_ms = threshold_ms if threshold_ms is not None else getattr(settings, 'API_SLOW_QUERY_MS', 100)
+        return [query for query in self.queries if query.duration * 1000 >= threshold_ms]
+
+
+def get_budget(view_class, action):
+    return (getattr(view_class, 'query_budgets', None) or {}).get(action)
+
+
+def check(report, label, budget=None):
+    """Пишет в лог N+1 и медленные запросы; возвращает описания нарушений
+    (N+1 и превышение бюджета) для строгого режима."""
+    problems = []
+    for item in report.repeated():
+        message = f'{label}: N+1 в поле {item.origin} - {item.count} одинаковых запросов: {item.shape}'
+        logger.warning(message)
+        problems.append(message)
+    for query in report.slow():
+        logger.warning('%s: медленный запрос %.1f мс: %s', label, query.duration * 1000, query.sql)
+    if budget is not None and report.count > budget:
+        message = f'{label}: {report.count} SQL-запросов при бюджете {budget}'
+        logger.warning(message)
+        problems.append(message + '\n' + '\n'.join(f'    {shape} x{count}'
+                                                   for shape, count in report.shapes.most_common()))
+    return problems
@@ -0,0 +1,141 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+from rest_framework.relations import ManyRelatedField, PrimaryKeyRelatedField, RelatedField
+
+
+class RelatedPlan:
+    """План загрузки для сериализатора: списки для select_related и prefetch_related
+    и набор колонок для only(), собранные по объявленным полям. `only` равен None,
+    если хотя бы одно поле верхнего уровня не сводится к колонке модели."""
+
+    def __init__(self):
+        self.select = []
+        self.prefetch = []
+        self.only = []
+
+    def apply(self, queryset, restrict=False):
+        if self.select:
+            queryset = queryset.select_related(*self.select)
+        if self.prefetch:
+            queryset = queryset.prefetch_related(*self.prefetch)
+        if restrict and self.only:
+            queryset = queryset.only(*self.only)
+        return queryset
+
+    def __bool__(self):
+        return bool(self.select or self.prefetch)
+
+
+def _get_model_field(model, source):
+    if model is None:
+        return None
+    try:
+        return model._meta.get_field(source)
+    except FieldDoesNotExist:
+        return None
+
+
+def _is_forward_single(model_field):
+    return model_field is not None and not model_field.auto_created \
+        and (model_field.many_to_one or model_field.one_to_one)
+
+
+def _nested_queryset(serializer, model_field):
+    """Queryset для Prefetch вложенного сериализатора со своим планом и only()."""
+    queryset = model_field.related_model._default_manager.all()
+    return build_related_plan(serializer).apply(queryset, restrict=True)
+
+
+def build_related_plan(serializer, prefix='', plan=None):
+    """Обходит поля сериализатора и решает, какие связи подгрузить заранее и какие
+    колонки выбрать.
+
+    Внешние ключи, выводимые как pk, запросов не требуют (DRF берёт `<field>_id`),
+    ManyToMany и обратные связи уходят в prefetch_related (для списков pk - только
+    колонка pk, для вложенных сериализаторов - Prefetch с собственным планом),
+    вложенные сериализаторы по FK - в select_related с колонками через `__`."""
+    plan = plan if plan is not None else RelatedPlan()
+    model = getattr(getattr(serializer, 'Meta', None), 'model', None)
+    only = [] if model is not None else None
+
+    for field in serializer.fields.values():
+        if field.write_only:
+            continue
+        if field.source == '*' or '.' in field.source:
+            only = None
+            continue
+        model_field = _get_model_field(model, field.source)
+        path = prefix + field.source
+
+        if isinstance(field, serializers.BaseSerializer):
+            child = field.child if isinstance(field, serializers.ListSerializer) else field
+            if _is_forward_single(model_field) and child is field:
+                plan.select.append(path)
+                if only is not None:
+                    only.append(path)
+                build_related_plan(field, path + '__', plan)
+            elif model_field is not None and model_field.related_model is not None:
+                plan.prefetch.append(Prefetch(path, queryset=_nested_queryset(child, model_field)))
+            else:
+                plan.prefetch.append(path)
+        elif isinstance(field, ManyRelatedField):
+            child = field.child_relation
+            if isinstance(child, PrimaryKeyRelatedField) and model_field is not None \
+                    and model_field.related_model is not None:
+                queryset = model_field.related_model._default_manager.only('pk')
+                if not queryset.ordered:
+                    # Список id в определённом порядке: так же его строит api.rows.
+                    queryset = queryset.order_by('pk')
+                plan.prefetch.append(Prefetch(path, queryset=queryset))
+            else:
+                plan.prefetch.append(path)
+        elif isinstance(field, RelatedField):
+            if model_field is None:
+                only = None
+                continue
+            if only is not None and _is_forward_single(model_field):
+                only.append(path)
+            if field.use_pk_only_optimization():
+                continue
+            if _is_forward_single(model_field):
+                plan.select.append(path)
+            else:
+                plan.prefetch.append(path)
+        elif model_field is not None and model_field.concrete and not model_field.many_to_many:
+            if only is not None:
+                only.append(path)
+        else:
+            only = None
+
+    if only is None:
+        # Колонки этой модели определить нельзя: грузим её целиком. Для корня это
+        # значит отказ от only(), для модели из select_related - убрать её пути.
+        if prefix:
+            plan.only = [name for name in plan.only if not name.startswith(prefix)]
+        else:
+            plan.only = None
+    elif plan.only is not None:
+        plan.only.extend(only + [prefix + model._meta.pk.name])
+    return plan
+
+
+def collect_models(serializer, models=None):
+    """Модели, данные которых попадают в вывод сериализатора: его собственная
+    и все модели, на которые ссылаются связанные поля."""
+    models = models if models is not None else set()
+    model = getattr(getattr(serializer, 'Meta', None), 'model', None)
+    if model is not None:
+        models.add(model)
+    for field in serializer.fields.values():
+        if field.write_only or field.source == '*' or '.' in field.source:
+            continue
+        if isinstance(field, serializers.ListSerializer):
+            collect_models(field.child, models)
+        elif isinstance(field, serializers.BaseSerializer):
+            collect_models(field, models)
+        elif isinstance(field, (ManyRelatedField, RelatedField)):
+            model_field = _get_model_field(model, field.source)
+            if model_field is not None and model_field.related_model is not None:
+                models.add(model_field.related_model)
+    return models
@@ -0,0 +1,26 @@
+import json
+
+from rest_framework import renderers
+
+from .metrics import timed
+
+
+class JSONRenderer(renderers.JSONRenderer):
+    """JSONRenderer DRF с замером времени рендеринга (api.metrics)."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with timed('render'):
+            return super().render(data, accepted_media_type, renderer_context)
+
+
+class PrometheusRenderer(renderers.BaseRenderer):
+    """Текстовый формат Prometheus: данные ответа - готовая строка (api.metrics.registry.render)."""
+    media_type = 'text/plain'
+    format = 'prometheus'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if not isinstance(data, str):
+            # Ошибки (например, 403) приходят словарём.
+            data = json.dumps(data, ensure_ascii=False)
+        return data.encode(self.charset)
@@ -0,0 +1,116 @@
+"""Быстрый путь списков: строки ответа собираются из values() без экземпляров моделей
+и без обхода полей сериализатора для каждой записи.
+
+Сериализатор один раз на запрос разбирается в план: колонка values() и преобразование
+для каждого поля, отдельный запрос id для каждого ManyToMany. Поля, чей вывод DRF
+не совпадает со значением колонки (даты, файлы, варианты фото), преобразуются тем же
+to_representation, что и в сериализаторе, поэтому ответ совпадает побайтно.
+Вложенные сериализаторы, SerializerMethodField и пути через точку не поддерживаются:
+для них compile_rows возвращает None и представление идёт обычным путём."""
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import FileField as ModelFileField
+from rest_framework import serializers
+from rest_framework.relations import ManyRelatedField, PrimaryKeyRelatedField
+
+from .serializers import ImageVariantsField
+
+# Значение колонки уже совпадает с выводом поля DRF.
+PLAIN_FIELDS = (serializers.CharField, serializers.IntegerField, serializers.FloatField,
+                serializers.BooleanField, serializers.NullBooleanField)
+
+
+def _plain(value):
+    return value
+
+
+class RowPlan:
+    def __init__(self, model):
+        self.model = model
+        self.columns = [model._meta.pk.attname]
+        self.fields = []  # (имя в ответе, колонка или None для ManyToMany, преобразование)
+        self.many = {}  # имя в ответе -> поле модели ManyToMany
+
+    def add_column(self, column):
+        if column not in self.columns:
+            self.columns.append(column)
+
+    def fetch_many(self, owner_ids):
+        """id связанных объектов по владельцам: один запрос к промежуточной таблице на поле.
+        Порядок - сортировка связанной модели, как у Prefetch из api.queryplan."""
+        related = {}
+        for name, model_field in self.many.items():
+            through = model_field.remote_field.through
+            source, target = model_field.m2m_field_name(), model_field.m2m_reverse_field_name()
+            rows = through._default_manager.filter(**{source + '__in': owner_ids}) \
+                .order_by(source + '_id', target).values_list(source + '_id', target + '_id')
+            ids = related[name] = {}
+            for owner_id, related_id in rows:
+                ids.setdefault(owner_id, []).append(related_id)
+        return related
+
+    def build(self, rows):
+        pk = self.model._meta.pk.attname
+        related = self.fetch_many([row[pk] for row in rows]) if self.many and rows else {}
+        data = []
+        for row in rows:
+            item = {}
+            for name, column, convert in self.fields:
+                if column is None:
+                    item[name] = related[name].get(row[pk], [])
+                    continue
+                value = row[column]
+                item[name] = None if value is None else convert(value)
+            data.append(item)
+        return data
+
+
+def _file_converter(field, model_field):
+    def convert(name):
+        return field.to_representation(model_field.attr_class(None, model_field, name))
+    return convert
+
+
+def compile_rows(serializer):
+    """RowPlan для сериализатора модели или None, если быстрый путь к нему неприменим."""
+    model = getattr(getattr(serializer, 'Meta', None), 'model', None)
+    if model is None:
+        return None
+    plan = RowPlan(model)
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if field.source == '*' or '.' in field.source or isinstance(field, serializers.BaseSerializer):
+            return None
+        try:
+            model_field = model._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            return None
+
+        if isinstance(field, ManyRelatedField):
+            child = field.child_relation
+            if type(child) is not PrimaryKeyRelatedField or child.pk_field is not None \
+                    or not model_field.many_to_many or model_field.auto_created:
+                return None
+            plan.fields.append((name, None, None))
+            plan.many[name] = model_field
+            continue
+        if not model_field.concrete or model_field.many_to_many:
+            return None
+
+        column = model_field.attname
+        if isinstance(field, PrimaryKeyRelatedField):
+            if type(field) is not PrimaryKeyRelatedField or field.pk_field is not None:
+                return None
+            convert = _plain
+        elif isinstance(field, (serializers.FileField, ImageVariantsField)) \
+                and isinstance(model_field, ModelFileField):
+            convert = _file_converter(field, model_field)
+        elif isinstance(field, (serializers.RelatedField, serializers.SerializerMethodField)):
+            return None
+        elif type(field) in PLAIN_FIELDS:
+            convert = _plain
+        else:
+            convert = field.to_representation
+        plan.add_column(column)
+        plan.fields.append((name, column, convert))
+    return plan
@@ -0,0 +1,176 @@
+"""Полнотекстовый поиск по картинам, статьям, художникам и событиям.
+
+Индекс - виртуальная таблица SQLite FTS5. Тексты хранятся в ней уже приведёнными
+к основам русским стеммером (api.stemmer), запрос проходит тот же путь, поэтому
+'картинами' находит 'картина'. rowid строки индекса однозначно кодирует тип
+и pk объекта, так что обновление и удаление одного объекта - поиск по ключу.
+Таблицу создаёт и заполняет миграция 0018_search_index. На других базах поиск
+выключен, о чём предупреждает проверка api.W001."""
+from django.core import checks
+from django.db import connection
+from django.utils.html import strip_tags
+
+from .models import Artist, Painting, Event, Article
+from .stemmer import tokenize
+
+INDEX_TABLE = 'api_search_index'
+CREATE_SQL = (f"CREATE VIRTUAL TABLE IF NOT EXISTS {INDEX_TABLE} USING fts5("
+              f"kind UNINDEXED, title, body, tokenize='unicode61 remove_diacritics 0')")
+INSERT_SQL = f'INSERT INTO {INDEX_TABLE} (rowid, kind, title, body) VALUES (%s, %s, %s, %s)'
+
+# Тип -> (модель, поле заголовка, поля текста). Порядок задаёт код типа в rowid.
+SOURCES = {
+    'painting': (Painting, 'title', ('description',)),
+    'article': (Article, 'title', ('content',)),
+    'artist': (Artist, 'name', ()),
+    'event': (Event, 'name', ()),
+}
+KINDS = tuple(SOURCES)
+
+# Вес совпадения в заголовке относительно текста для bm25().
+TITLE_WEIGHT = 5.0
+
+
+class SearchUnavailable(Exception):
+    """Текущая база данных не поддерживает FTS5."""
+
+
+def is_supported():
+    return connection.vendor == 'sqlite'
+
+
+def require_supported():
+    if not is_supported():
+        raise SearchUnavailable(f'Полнотекстовый поиск не поддерживается для {connection.vendor}.')
+
+
+def encode_rowid(kind, pk):
+    return pk * len(KINDS) + KINDS.index(kind)
+
+
+def decode_rowid(rowid):
+    return KINDS[rowid % len(KINDS)], rowid // len(KINDS)
+
+
+def get_kind(model):
+    for kind, (source_model, _, _) in SOURCES.items():
+        if model is source_model:
+            return kind
+    return None
+
+
+def document(kind, instance):
+    _, title_field, body_fields = SOURCES[kind]
+    title = getattr(instance, title_field) or ''
+    body = ' '.join(strip_tags(getattr(instance, field) or '') for field in body_fields)
+    return ' '.join(tokenize(title)), ' '.join(tokenize(body))
+
+
+def index_instance(instance):
+    kind = get_kind(type(instance))
+    require_supported()
+    title, body = document(kind, instance)
+    rowid = encode_rowid(kind, instance.pk)
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {INDEX_TABLE} WHERE rowid = %s', [rowid])
+        cursor.execute(INSERT_SQL, [rowid, kind, title, body])
+
+
+def index_instances(instances):
+    """Индексирует объекты одной модели пачкой (пакетная запись без сигналов)."""
+    if not instances:
+        return
+    kind = get_kind(type(instances[0]))
+    require_supported()
+    rows = [[encode_rowid(kind, instance.pk), kind, *document(kind, instance)] for instance in instances]
+    with connection.cursor() as cursor:
+        cursor.executemany(f'DELETE FROM {INDEX_TABLE} WHERE rowid = %s', [row[:1] for row in rows])
+        cursor.executemany(INSERT_SQL, rows)
+
+
+def unindex_instance(instance):
+    kind = get_kind(type(instance))
+    require_supported()
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {INDEX_TABLE} WHERE rowid = %s', [encode_rowid(kind, instance.pk)])
+
+
+def rebuild(batch_size=500, apps=None):
+    """Полная перестройка индекса. Возвращает число проиндексированных объектов.
+    apps - реестр моделей миграции, когда индекс заполняет миграция."""
+    require_supported()
+    total = 0
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {INDEX_TABLE}')
+        for kind, (model, title_field, body_fields) in SOURCES.items():
+            if apps is not None:
+                model = apps.get_model(model._meta.label)
+            queryset = model.objects.only('pk', title_field, *body_fields).order_by('pk')
+            rows = []
+            for instance in queryset.iterator(chunk_size=batch_size):
+                rows.append([encode_rowid(kind, instance.pk), kind, *document(kind, instance)])
+                if len(rows) >= batch_size:
+                    cursor.executemany(INSERT_SQL, rows)
+                    total += len(rows)
+                    rows = []
+            if rows:
+                cursor.executemany(INSERT_SQL, rows)
+                total += len(rows)
+    return total
+
+
+def build_match(query):
+    """Выражение MATCH: все основы слов запроса, каждая как префикс.
+    Кавычки экранируют синтаксис FTS5 в пользовательском вводе."""
+    terms = []
+    for term in tokenize(query):
+        quoted = '"' + term.replace('"', '""') + '"*'
+        if quoted not in terms:
+            terms.append(quoted)
+    return ' AND '.join(terms)
+
+
+def search(query, kinds=None, limit=20, offset=0):
+    """Возвращает (всего совпадений, [(тип, pk, релевантность), ...]), лучшие первыми."""
+    match = build_match(query)
+    if not match:
+        return 0, []
+    require_supported()
+    kinds = [kind for kind in (kinds or KINDS) if kind in SOURCES]
+    where = f'{INDEX_TABLE} MATCH %s'
+    params = [match]
+    if len(kinds) < len(KINDS):
+        where += ' AND kind IN ({})'.format(', '.join(['%s'] * len(kinds)))
+        params += kinds
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT count(*) FROM {INDEX_TABLE} WHERE {where}', params)
+        total = cursor.fetchone()[0]
+        cursor.execute(
+            f'SELECT rowid, bm25({INDEX_TABLE}, 0, %s, 1.0) AS rank FROM {INDEX_TABLE} '
+            f'WHERE {where} ORDER BY rank LIMIT %s OFFSET %s',
+            [TITLE_WEIGHT, *params, limit, offset])
+        hits = [(*decode_rowid(rowid), -rank) for rowid, rank in cursor.fetchall()]
+    return total, hits
+
+
+def check_supported(app_configs, **kwargs):
+    """Проверка Django (check, runserver, migrate): без FTS5 поиск не работает,
+    а сохранения не индексируются - об этом нужно знать до запуска, а не по 503."""
+    if is_supported():
+        return []
+    return [checks.Warning(
+        f'Полнотекстовый поиск не поддерживается для {connection.vendor}: '
+        f'search/ отвечает 503, изменения объектов не индексируются.',
+        hint='Поиск работает на SQLite (DB_ENGINE=sqlite). После переноса данных '
+             'индекс строится заново командой rebuild_search_index.',
+        id='api.W001')]
+
+
+def update_on_save(sender, instance, **kwargs):
+    if get_kind(sender) is not None and is_supported() and not kwargs.get('raw'):
+        index_instance(instance)
+
+
+def update_on_delete(sender, instance, **kwargs):
+    if get_kind(sender) is not None and is_supported():
+        unindex_instance(instance)
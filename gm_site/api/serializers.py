@@ -1,50 +1,241 @@
-from rest_framework import serializers
-from .models import Artist, Genre, Painting, Place, Event, Article, Comment, Main
+import json
 
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+from .images import variant_names
+from .jobs import unfinished_photos
+from .metrics import timed
+from .models import Artist, Genre, Painting, Gallery, GalleryPainting, Place, Event, Article, Comment, Main, \
+    ImageJob
+
+
+class ImageVariantsField(serializers.Field):
+    """Ссылки на уменьшенные копии изображения: {'thumb': {'jpeg': url, 'webp': url}, ...}.
+    Как и ImageField, отдаёт абсолютные URL, если в контексте есть запрос.
+    Пока задача обработки фото (api.jobs) не выполнена, файлов вариантов нет - null."""
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def get_unfinished(self):
+        # Одно чтение на ответ: контекст общий для всех вложенных сериализаторов.
+        context = self.context
+        if '_unfinished_photos' not in context:
+            context['_unfinished_photos'] = unfinished_photos()
+        return context['_unfinished_photos']
+
+    def to_representation(self, value):
+        if not value or value.name in self.get_unfinished():
+            return None
+        request = self.context.get('request', None)
+        variants = {}
+        for variant, formats in variant_names(value.name).items():
+            variants[variant] = {}
+            for image_format, name in formats.items():
+                url = value.storage.url(name)
+                variants[variant][image_format] = request.build_absolute_uri(url) if request else url
+        return variants
+
+
+def _split_paths(paths):
+    """['title', 'author.name', 'author.photo'] -> {'title': [], 'author': ['name', 'photo']}"""
+    tree = {}
+    for path in paths:
+        head, _, rest = path.partition('.')
+        tree.setdefault(head, [])
+        if rest:
+            tree[head].append(rest)
+    return tree
+
+
+class DynamicFieldsMixin:
+    """Выборочные поля и раскрытие связей из параметров GET-запроса:
+    ?fields=title,author.name - оставить только перечисленные поля,
+    ?expand=author,genres - вывести связанные объекты вместо pk.
+
+    Раскрываемые связи перечислены в Meta.expandable: имя поля -> (имя сериализатора, many).
+    Вложенные сериализаторы получают свою часть путей через аргументы fields/expand."""
+    fields_query_param = 'fields'
+    expand_query_param = 'expand'
+
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is None and expand is None:
+            fields, expand = self.get_requested_paths()
+        if expand:
+            self.expand_fields(_split_paths(expand), _split_paths(fields or []))
+        if fields:
+            self.restrict_fields(_split_paths(fields))
+
+    def to_representation(self, instance):
+        # Для списка замеряется каждая строка: DRF вызывает дочерний сериализатор построчно.
+        with timed('serialize'):
+            return super().to_representation(instance)
+
+    def get_requested_paths(self):
+        request = self._context.get('request')
+        if request is None or request.method not in SAFE_METHODS:
+            return None, None
+        params = getattr(request, 'query_params', request.GET)
+        return [[path for path in params.get(name, '').split(',') if path] or None
+                for name in (self.fields_query_param, self.expand_query_param)]
+
+    def expand_fields(self, expand, nested_fields):
+        expandable = getattr(self.Meta, 'expandable', {})
+        unknown = sorted(set(expand) - set(expandable))
+        if unknown:
+            raise serializers.ValidationError({self.expand_query_param: f'Нельзя раскрыть: {", ".join(unknown)}.'})
+        for name, nested_expand in expand.items():
+            serializer_name, many = expandable[name]
+            serializer_class = globals()[serializer_name]
+            self.fields[name] = serializer_class(many=many, read_only=True,
+                                                 fields=nested_fields.get(name) or None,
+                                                 expand=nested_expand)
+
+    def restrict_fields(self, fields):
+        unknown = sorted(set(fields) - set(self.fields))
+        if unknown:
+            raise serializers.ValidationError({self.fields_query_param: f'Неизвестные поля: {", ".join(unknown)}.'})
+        for name in list(self.fields):
+            if name not in fields:
+                self.fields.pop(name)
+            elif fields[name] and not isinstance(self.fields[name], serializers.BaseSerializer):
+                raise serializers.ValidationError(
+                    {self.fields_query_param: f'Поле {name} не раскрыто, вложенные поля недоступны.'})
+
+
+class ArtistSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    photo_variants = ImageVariantsField(source='photo')
 
-class ArtistSerializer(serializers.ModelSerializer):
     class Meta:
         model = Artist
-        fields = ('is_master', 'name', 'photo', 'artist_date')
+        fields = ('is_master', 'name', 'photo', 'photo_variants', 'artist_date')
 
 
-class GenreSerializer(serializers.ModelSerializer):
+class GenreSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Genre
         fields = ('genre_name',)
 
 
-class PaintingSerializer(serializers.ModelSerializer):
+class PaintingSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    photo_variants = ImageVariantsField(source='photo')
+
     class Meta:
         model = Painting
-        fields = ('title', 'photo', 'author', 'genres', 'datetime', 'painting_date')
+        fields = ('title', 'photo', 'photo_variants', 'author', 'genres', 'datetime', 'painting_date')
+        expandable = {'author': ('ArtistSerializer', False), 'genres': ('GenreSerializer', True)}
+
+
+class GallerySerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    """Галерея без списка картин: он бывает длинным и читается постранично
+    через galleries/<id>/paintings/."""
+
+    class Meta:
+        model = Gallery
+        fields = ('id', 'name')
+
 
+class GalleryItemPaintingSerializer(PaintingSerializer):
+    class Meta(PaintingSerializer.Meta):
+        fields = ('id',) + PaintingSerializer.Meta.fields
+
+
+class GalleryPaintingSerializer(serializers.ModelSerializer):
+    """Элемент страницы картин галереи: позиция и картина с id для ссылки на её страницу."""
+    painting = GalleryItemPaintingSerializer(read_only=True)
+
+    class Meta:
+        model = GalleryPainting
+        fields = ('position', 'painting')
+
+
+class PlaceSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    photo_variants = ImageVariantsField(source='photo')
 
-class PlaceSerializer(serializers.ModelSerializer):
     class Meta:
         model = Place
-        fields = ('name', 'photo', 'address', 'latitude', 'longitude')
+        fields = ('name', 'photo', 'photo_variants', 'address', 'latitude', 'longitude')
 
 
-class EventSerializer(serializers.ModelSerializer):
+class EventSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    photo_variants = ImageVariantsField(source='photo')
+
     class Meta:
         model = Event
-        fields = ('name', 'photo', 'place', 'paintings', 'artists', 'datetime', 'event_date')
+        fields = ('name', 'photo', 'photo_variants', 'place', 'paintings', 'artists', 'datetime', 'event_date')
+        expandable = {'place': ('PlaceSerializer', False), 'paintings': ('PaintingSerializer', True),
+                      'artists': ('ArtistSerializer', True)}
 
 
-class ArticleSerializer(serializers.ModelSerializer):
+class ArticleSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Article
         fields = ('title', 'places', 'paintings', 'artists', 'events', 'datetime', 'content')
+        expandable = {'places': ('PlaceSerializer', True), 'paintings': ('PaintingSerializer', True),
+                      'artists': ('ArtistSerializer', True), 'events': ('EventSerializer', True)}
 
 
-class MainSerializer(serializers.ModelSerializer):
+class MainSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Main
         fields = ('title_about', 'content_about')
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Comment
         fields = ('article', 'parent', 'content', 'datetime')
+        expandable = {'article': ('ArticleSerializer', False), 'parent': ('CommentSerializer', False)}
+
+
+class CommentTreeSerializer(CommentSerializer):
+    """Узел дерева комментариев. Ожидает объекты из api.comments.fetch_comment_tree;
+    число выводимых ответов на узел ограничивает context['replies_limit']."""
+    depth = serializers.IntegerField(read_only=True)
+    replies_count = serializers.IntegerField(read_only=True)
+    replies = serializers.SerializerMethodField()
+
+    def get_replies(self, obj):
+        replies = obj.replies[:self.context.get('replies_limit')]
+        return CommentTreeSerializer(replies, many=True, context=self.context).data
+
+    class Meta(CommentSerializer.Meta):
+        fields = ('id',) + CommentSerializer.Meta.fields + ('depth', 'replies_count', 'replies')
+
+
+class HomeArticleSerializer(ArticleSerializer):
+    class Meta(ArticleSerializer.Meta):
+        fields = ('id',) + ArticleSerializer.Meta.fields
+
+
+class HomeEventSerializer(EventSerializer):
+    class Meta(EventSerializer.Meta):
+        fields = ('id',) + EventSerializer.Meta.fields
+
+
+class HomePaintingSerializer(PaintingSerializer):
+    class Meta(PaintingSerializer.Meta):
+        fields = ('id',) + PaintingSerializer.Meta.fields
+
+
+class HomeSerializer(serializers.Serializer):
+    """Главная страница целиком. Ожидает словарь разделов из ApiHomeViewSet.get_sections();
+    элементы списков дополнены id для ссылок на страницы объектов."""
+    main = MainSerializer(allow_null=True)
+    articles = HomeArticleSerializer(many=True)
+    events = HomeEventSerializer(many=True)
+    paintings = HomePaintingSerializer(many=True)
+
+
+class ImageJobSerializer(serializers.ModelSerializer):
+    metadata = serializers.SerializerMethodField()
+
+    def get_metadata(self, obj):
+        return json.loads(obj.metadata) if obj.metadata else None
+
+    class Meta:
+        model = ImageJob
+        fields = ('id', 'model_name', 'object_id', 'photo', 'status', 'attempts', 'metadata', 'error',
+                  'created', 'started', 'finished')
@@ -0,0 +1,52 @@
+import threading
+from time import monotonic
+
+from django.conf import settings
+
+from .cache import get_generations, model_label
+from .models import Main
+
+NOT_LOADED = object()
+
+
+def get_max_age():
+    return getattr(settings, 'API_SINGLETON_MAX_AGE', 60)
+
+
+class SingletonCache:
+    """Объект-синглтон в памяти процесса. Перед выдачей сверяется версия модели
+    из api.cache - одно чтение из кэша, без БД; версия меняется сигналами при
+    сохранении и удалении. Версию видят все процессы, только если кэш
+    (settings.API_CACHE_ALIAS) общий, например Redis или Memcached; с кэшем в памяти
+    процесса изменения из других процессов видны не позже чем через
+    settings.API_SINGLETON_MAX_AGE секунд - дольше объект не живёт без перечитывания.
+    Кэш без хранения (DummyCache) версий не даёт, тогда объект читается каждый раз."""
+
+    def __init__(self, model):
+        self.model = model
+        self._lock = threading.Lock()
+        self._version = NOT_LOADED
+        self._instance = None
+        self._loaded = 0.0
+
+    def get(self):
+        """Текущий объект или None, если он ещё не создан. Объект общий для потоков,
+        изменять его нельзя."""
+        label = model_label(self.model)
+        # Версия читается до запроса к БД: данные, прочитанные раньше записи,
+        # могут получить только старую версию и будут перечитаны.
+        version = get_generations([label])[label]
+        with self._lock:
+            if version is not None and self._version == version and monotonic() - self._loaded < get_max_age():
+                return self._instance
+        instance = self.model.objects.filter(pk=self.model.SINGLETON_PK).first()
+        with self._lock:
+            self._version, self._instance, self._loaded = version, instance, monotonic()
+        return instance
+
+    def clear(self):
+        with self._lock:
+            self._version, self._instance = NOT_LOADED, None
+
+
+main_singleton = SingletonCache(Main)
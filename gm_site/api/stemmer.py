@@ -0,0 +1,101 @@
+"""Стеммер русского языка по алгоритму Snowball (Russian stemming algorithm, M. Porter).
+https://snowballstem.org/algorithms/russian/stemmer.html"""
+import re
+
+VOWELS = 'аеиоуыэюя'
+
+PERFECTIVE_GERUND = (('в', 'вши', 'вшись'), ('ив', 'ивши', 'ившись', 'ыв', 'ывши', 'ывшись'))
+ADJECTIVE = ((), ('ее', 'ие', 'ые', 'ое', 'ими', 'ыми', 'ей', 'ий', 'ый', 'ой', 'ем', 'им', 'ым', 'ом',
+                  'его', 'ого', 'ему', 'ому', 'их', 'ых', 'ую', 'юю', 'ая', 'яя', 'ою', 'ею'))
+PARTICIPLE = (('ем', 'нн', 'вш', 'ющ', 'щ'), ('ивш', 'ывш', 'ующ'))
+REFLEXIVE = ((), ('ся', 'сь'))
+VERB = (('ла', 'на', 'ете', 'йте', 'ли', 'й', 'л', 'ем', 'н', 'ло', 'но', 'ет', 'ют', 'ны', 'ть', 'ешь',
+         'нно'),
+        ('ила', 'ыла', 'ена', 'ейте', 'уйте', 'ите', 'или', 'ыли', 'ей', 'уй', 'ил', 'ыл', 'им', 'ым', 'ен',
+         'ило', 'ыло', 'ено', 'ят', 'ует', 'уют', 'ит', 'ыт', 'ены', 'ить', 'ыть', 'ишь', 'ую', 'ю'))
+NOUN = ((), ('а', 'ев', 'ов', 'ие', 'ье', 'е', 'иями', 'ями', 'ами', 'еи', 'ии', 'и', 'ией', 'ей', 'ой',
+             'ий', 'й', 'иям', 'ям', 'ием', 'ем', 'ам', 'ом', 'о', 'у', 'ах', 'иях', 'ях', 'ы', 'ь', 'ию',
+             'ью', 'ю', 'ия', 'ья', 'я'))
+SUPERLATIVE = ('ейше', 'ейш')
+DERIVATIONAL = ('ость', 'ост')
+
+WORD_RE = re.compile(r'\w+')
+
+
+def _region(word, start):
+    """Начало области после первой согласной, следующей за гласной (R1/R2)."""
+    for index in range(start + 1, len(word)):
+        if word[index] not in VOWELS and word[index - 1] in VOWELS:
+            return index + 1
+    return len(word)
+
+
+def _remove_ending(rv, endings):
+    """Удаляет самое длинное окончание из группы. Окончания первой группы требуют
+    перед собой 'а' или 'я' (сама буква остаётся); если условие не выполнено,
+    более короткие окончания не пробуются - как в among() Snowball."""
+    group1, group2 = endings
+    best = max((ending for ending in group1 + group2 if rv.endswith(ending)), key=len, default=None)
+    if best is None:
+        return None
+    if best in group1 and best not in group2:
+        preceding = rv[:-len(best)]
+        if not preceding or preceding[-1] not in 'ая':
+            return None
+    return rv[:-len(best)]
+
+
+def stem(word):
+    word = word.lower().replace('ё', 'е')
+    rv_start = next((index + 1 for index, char in enumerate(word) if char in VOWELS), len(word))
+    r2_start = _region(word, _region(word, 0))
+    prefix, rv = word[:rv_start], word[rv_start:]
+
+    # Шаг 1.
+    result = _remove_ending(rv, PERFECTIVE_GERUND)
+    if result is not None:
+        rv = result
+    else:
+        result = _remove_ending(rv, REFLEXIVE)
+        if result is not None:
+            rv = result
+        result = _remove_ending(rv, ADJECTIVE)
+        if result is not None:
+            rv = result
+            participle = _remove_ending(rv, PARTICIPLE)
+            if participle is not None:
+                rv = participle
+        else:
+            for endings in (VERB, NOUN):
+                result = _remove_ending(rv, endings)
+                if result is not None:
+                    rv = result
+                    break
+
+    # Шаг 2.
+    if rv.endswith('и'):
+        rv = rv[:-1]
+
+    # Шаг 3: словообразовательный суффикс целиком в R2.
+    for ending in DERIVATIONAL:
+        if rv.endswith(ending) and len(prefix) + len(rv) - len(ending) >= r2_start:
+            rv = rv[:-len(ending)]
+            break
+
+    # Шаг 4.
+    superlative = next((ending for ending in SUPERLATIVE if rv.endswith(ending)), None)
+    if superlative is not None:
+        rv = rv[:-len(superlative)]
+        if rv.endswith('нн'):
+            rv = rv[:-1]
+    elif rv.endswith('нн'):
+        rv = rv[:-1]
+    elif rv.endswith('ь'):
+        rv = rv[:-1]
+
+    return prefix + rv
+
+
+def tokenize(text):
+    """Слова текста в нижнем регистре, приведённые к основе."""
+    return [stem(word) for word in WORD_RE.findall(text or '')]
@@ -0,0 +1,12 @@
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+
+
+class QueryCheckTestRunner(DiscoverRunner):
+    """Тесты со строгой проверкой запросов (api.querycheck): превышение бюджета
+    или N+1 в ответе API роняет тест."""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        settings.API_QUERY_CHECK = True
+        settings.API_QUERY_CHECK_STRICT = True
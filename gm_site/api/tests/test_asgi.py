@@ -0,0 +1,104 @@
+import json
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIHandler
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+
+from ..asgi import ApiASGIHandler, AsyncReadApplication, get_api_application
+from ..cache import stats
+from ..models import Artist, Genre, Painting
+from ..views import ApiPaintingViewSet
+
+application = AsyncReadApplication(ApiASGIHandler())
+
+
+def asgi_get(path, query_string='', headers=()):
+    """GET через ASGI-приложение. Возвращает (статус, заголовки, тело)."""
+    scope = {
+        'type': 'http', 'method': 'GET', 'path': path, 'query_string': query_string.encode(),
+        'headers': [(name.lower().encode(), value.encode()) for name, value in headers],
+        'server': ('testserver', 80), 'scheme': 'http',
+    }
+    incoming = [{'type': 'http.request', 'body': b''}]
+    sent = []
+
+    async def receive():
+        return incoming.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    async_to_sync(application)(scope, receive, send)
+    start = sent[0]
+    response_headers = {name.decode().lower(): value.decode() for name, value in start['headers']}
+    return start['status'], response_headers, b''.join(m.get('body', b'') for m in sent[1:])
+
+
+class AsyncReadTest(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        stats.reset()
+        self.author = Artist.objects.create(name='Герард Дау')
+        self.hermit = Painting.objects.create(title='Отшельник', author=self.author)
+        self.hermit.genres.add(Genre.objects.create(genre_name='Пейзаж'))
+
+    def test_hit_is_served_without_queries(self):
+        path = reverse('paintings-list')
+        status_code, headers, first = asgi_get(path)
+        self.assertEqual((status_code, headers['x-cache']), (status.HTTP_200_OK, 'MISS'))
+        with self.assertNumQueries(0):
+            status_code, headers, second = asgi_get(path, headers=[('Origin', 'http://localhost:3000')])
+        self.assertEqual((status_code, headers['x-cache']), (status.HTTP_200_OK, 'HIT'))
+        self.assertEqual(second, first)
+        self.assertEqual(headers['access-control-allow-origin'], '*')
+        self.assertIn('Accept', headers['vary'])
+        self.assertEqual(stats.snapshot()['paintings-list'], {'hits': 1, 'misses': 1})
+
+    def test_not_modified_from_event_loop(self):
+        path = reverse('paintings-detail', kwargs={'pk': self.hermit.pk})
+        etag = asgi_get(path)[1]['etag']
+        with self.assertNumQueries(0):
+            status_code, _, body = asgi_get(path, headers=[('If-None-Match', etag)])
+        self.assertEqual((status_code, body), (status.HTTP_304_NOT_MODIFIED, b''))
+
+    def test_invalidated_entry_goes_to_view(self):
+        path = reverse('paintings-list')
+        asgi_get(path)
+        self.hermit.title = 'Старик'
+        self.hermit.save()
+        _, headers, body = asgi_get(path)
+        self.assertEqual(headers['x-cache'], 'MISS')
+        self.assertIn('Старик', body.decode())
+
+    def test_uncached_route_and_html_go_to_view(self):
+        _, headers, _ = asgi_get(reverse('places-list'))
+        self.assertNotIn('x-cache', headers)
+        asgi_get(reverse('paintings-list'))
+        _, headers, _ = asgi_get(reverse('paintings-list'), headers=[('Accept', 'text/html')])
+        self.assertNotIn('x-cache', headers)
+
+    def test_bad_fields_param_goes_to_view(self):
+        status_code, _, _ = asgi_get(reverse('paintings-list'), 'fields=nope')
+        self.assertEqual(status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_streaming_export(self):
+        # Пачки выгрузки читаются из БД по мере отправки: не в цикле событий.
+        for index in range(4):
+            Painting.objects.create(title=f'Картина {index}', author=self.author)
+        with mock.patch.object(ApiPaintingViewSet, 'export_chunk_size', 2):
+            status_code, headers, body = asgi_get(reverse('paintings-export'))
+        self.assertEqual(status_code, status.HTTP_200_OK)
+        self.assertEqual(headers['content-type'], 'application/x-ndjson; charset=utf-8')
+        self.assertEqual([json.loads(line)['title'] for line in body.decode().splitlines()],
+                         ['Отшельник'] + [f'Картина {index}' for index in range(4)])
+
+    def test_setting_selects_application(self):
+        handler = ASGIHandler()
+        with override_settings(API_ASYNC_READS=False):
+            self.assertIs(get_api_application(handler), handler)
+        with override_settings(API_ASYNC_READS=True):
+            self.assertIsInstance(get_api_application(handler), AsyncReadApplication)
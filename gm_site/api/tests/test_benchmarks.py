@@ -0,0 +1,196 @@
+"""Нагрузочные замеры REST API на реалистичном объёме данных.
+
+Запускаются только явно, т.к. наполнение базы занимает заметное время:
+
+    API_BENCHMARK=1 python manage.py test api.tests.test_benchmarks
+
+Множитель объёма данных задаётся переменной API_BENCHMARK_SCALE (по умолчанию 1:
+2000 художников, 5000 картин, 500 событий, 1000 статей, 6000 комментариев).
+Для каждого маршрута из api/urls.py замеряются число SQL-запросов, пиковая память
+и p50/p99 времени ответа. Превышение порогов из BUDGETS валит тест только по запросам
+и памяти: время зависит от машины и её загрузки, поэтому оно лишь попадает в отчёт
+(логгер api.tests.test_benchmarks, stderr)."""
+import datetime
+import logging
+import os
+import statistics
+import time
+import tracemalloc
+from unittest import skipUnless
+
+from django.db import connection, reset_queries
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Artist, Genre, Painting, Place, Event, Article, Comment, Main
+
+client = Client()
+
+SCALE = float(os.environ.get('API_BENCHMARK_SCALE', '1'))
+WARMUP = int(os.environ.get('API_BENCHMARK_WARMUP', '5'))
+REPEATS = int(os.environ.get('API_BENCHMARK_REPEATS', '100'))
+
+# Отчёт нужен и без настройки LOGGING: замеры запускаются вручную.
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.StreamHandler())
+logger.setLevel(logging.INFO)
+logger.propagate = False
+
+# Маршрут -> (максимум запросов, пиковая память в КиБ) для list и detail.
+BUDGETS = {
+    'artists': ((1, 4096), (1, 512)),
+    'genres': ((1, 2048), (1, 512)),
+    'paintings': ((3, 6144), (3, 512)),
+    'places': ((1, 4096), (1, 512)),
+    'events': ((4, 6144), (4, 512)),
+    'articles': ((6, 8192), (6, 512)),
+    'comments': ((2, 4096), (2, 512)),
+    'main': ((1, 2048), (1, 512)),
+}
+
+
+def _count(base):
+    return max(1, int(base * SCALE))
+
+
+def _bulk_create(model, objects):
+    """bulk_create на SQLite не возвращает pk, поэтому строки перечитываются из базы."""
+    model.objects.bulk_create(objects, batch_size=500)
+    return list(model.objects.order_by('pk'))
+
+
+def _percentile(samples, percent):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(percent / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _timings(url):
+    """Времена ответов в мс после прогрева: первые запросы заполняют кэши Django и SQLite."""
+    for _ in range(WARMUP):
+        client.get(url)
+    samples = []
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        client.get(url)
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+@skipUnless(os.environ.get('API_BENCHMARK'), 'задайте API_BENCHMARK=1 для запуска замеров')
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}})
+class ApiBenchmarkTest(TestCase):
+    report = []
+
+    @classmethod
+    def setUpTestData(cls):
+        genres = _bulk_create(Genre, [Genre(genre_name=f'Жанр {index}') for index in range(30)])
+        artists = _bulk_create(Artist, [
+            Artist(name=f'Художник {index}', is_master=index % 10 == 0,
+                   artist_date=datetime.date(1600 + index % 400, 1, 1))
+            for index in range(_count(2000))])
+        places = _bulk_create(Place, [
+            Place(name=f'Площадка {index}', address=f'Адрес {index}', latitude=56.8, longitude=53.2)
+            for index in range(_count(50))])
+        paintings = _bulk_create(Painting, [
+            Painting(title=f'Картина {index}', author=artists[index % len(artists)],
+                     painting_date=1500 + index % 500, description='Описание ' * 20)
+            for index in range(_count(5000))])
+        events = _bulk_create(Event, [
+            Event(name=f'Событие {index}', place=places[index % len(places)],
+                  event_date=datetime.date(2020, 1, 1) + datetime.timedelta(days=index))
+            for index in range(_count(500))])
+        articles = _bulk_create(Article, [
+            Article(title=f'Статья {index}', content='Текст статьи. ' * 200)
+            for index in range(_count(1000))])
+
+        links = (
+            (Painting.genres.through, 'painting_id', paintings, 'genre_id', genres, 3),
+            (Event.paintings.through, 'event_id', events, 'painting_id', paintings, 10),
+            (Event.artists.through, 'event_id', events, 'artist_id', artists, 5),
+            (Article.places.through, 'article_id', articles, 'place_id', places, 3),
+            (Article.paintings.through, 'article_id', articles, 'painting_id', paintings, 3),
+            (Article.artists.through, 'article_id', articles, 'artist_id', artists, 3),
+            (Article.events.through, 'article_id', articles, 'event_id', events, 3),
+        )
+        for through, source_column, sources, target_column, targets, per_row in links:
+            through.objects.bulk_create([
+                through(**{source_column: source.pk,
+                           target_column: targets[(index * per_row + shift) % len(targets)].pk})
+                for index, source in enumerate(sources) for shift in range(per_row)
+            ], batch_size=500, ignore_conflicts=True)
+
+        # Треды глубиной до 20 комментариев: каждый следующий отвечает на предыдущий.
+        thread_articles = articles[:_count(300)]
+        for article in thread_articles:
+            parent = None
+            for depth in range(20):
+                parent = Comment.objects.create(article=article, parent=parent,
+                                                content=f'Комментарий уровня {depth}')
+
+        Main.objects.create(title_about='О нас', content_about='Текст главной. ' * 100)
+
+        cls.detail_pks = {
+            'artists': artists[0].pk, 'genres': genres[0].pk, 'paintings': paintings[0].pk,
+            'places': places[0].pk, 'events': events[0].pk, 'articles': articles[0].pk,
+            'comments': Comment.objects.order_by('pk').first().pk,
+            'main': Main.objects.get().pk,
+        }
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        if cls.report:
+            lines = ['{:<22}{:>9}{:>11}{:>11}{:>12}'.format('route', 'queries', 'p50, ms', 'p99, ms', 'peak, KiB')]
+            lines += ['{:<22}{:>9}{:>11.1f}{:>11.1f}{:>12.0f}'.format(*row) for row in cls.report]
+            logger.info('\n'.join(lines))
+
+    def measure(self, url):
+        # Журнал запросов ограничен 9000 записями и уже заполнен наполнением базы,
+        # без очистки CaptureQueriesContext насчитает ноль.
+        reset_queries()
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+        query_count = len(queries)
+        self.assertEqual(response.status_code, 200)
+
+        samples = _timings(url)
+
+        tracemalloc.start()
+        client.get(url)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return query_count, _percentile(samples, 50), _percentile(samples, 99), peak / 1024
+
+    def check_route(self, name, url, budget):
+        max_queries, max_peak = budget
+        queries, p50, p99, peak = self.measure(url)
+        self.report.append((name, queries, p50, p99, peak))
+        self.assertLessEqual(queries, max_queries, f'{name}: {queries} SQL-запросов')
+        self.assertLessEqual(peak, max_peak, f'{name}: пик памяти {peak:.0f} КиБ')
+
+    def test_list_routes(self):
+        for basename, (budget, _) in BUDGETS.items():
+            with self.subTest(route=basename):
+                self.check_route(f'{basename}-list', reverse(f'{basename}-list'), budget)
+
+    def test_detail_routes(self):
+        for basename, (_, budget) in BUDGETS.items():
+            with self.subTest(route=basename):
+                url = reverse(f'{basename}-detail', kwargs={'pk': self.detail_pks[basename]})
+                self.check_route(f'{basename}-detail', url, budget)
+
+    def test_keyset_page_cost_is_flat(self):
+        """Стоимость первой и дальней страницы keyset-пагинации не должна заметно различаться.
+        Сравниваются медианы с трёхкратным запасом, одиночные задержки на них не влияют."""
+        def median_ms(url):
+            return statistics.median(_timings(url))
+
+        first_url = far_url = reverse('paintings-list') + '?page_size=50'
+        for _ in range(40):
+            link = client.get(far_url).get('Link')
+            if link is None:
+                break
+            far_url = link[1:link.index('>')]
+        self.assertLess(median_ms(far_url), median_ms(first_url) * 3)
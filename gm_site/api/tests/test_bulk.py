@@ -0,0 +1,138 @@
+import json
+
+from django.core.cache import cache
+from django.test import TestCase, Client
+from django.urls import reverse
+from rest_framework import status
+
+from .. import search
+from ..models import Article, Artist, Genre, Main, Painting
+from ..serializers import ArticleSerializer
+
+client = Client()
+
+
+class BulkRetrieveTest(TestCase):
+    def setUp(self) -> None:
+        self.articles = [Article.objects.create(title=f'Статья {index}', content='Текст')
+                         for index in range(3)]
+
+    def test_bulk_preserves_order_and_reports_missing(self):
+        first, second, third = self.articles
+        missing = third.pk + 100
+        url = reverse('articles-bulk') + f'?ids={third.pk},{missing},{first.pk},{third.pk}'
+        response = client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'], [
+            ArticleSerializer(third).data,
+            None,
+            ArticleSerializer(first).data,
+        ])
+        self.assertEqual(response.data['missing'], [missing])
+
+    def test_bulk_single_query(self):
+        genres = [Genre.objects.create(genre_name=name) for name in ('Пейзаж', 'Портрет')]
+        url = reverse('genres-bulk') + '?ids=' + ','.join(str(genre.pk) for genre in genres)
+        with self.assertNumQueries(1):
+            response = client.get(url)
+        self.assertEqual([row['genre_name'] for row in response.data['results']],
+                         ['Пейзаж', 'Портрет'])
+
+    def test_bulk_without_ids(self):
+        response = client.get(reverse('articles-bulk'))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_invalid_id(self):
+        response = client.get(reverse('genres-bulk') + '?ids=1,abc')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class BulkWriteTest(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.author = Artist.objects.create(name='Рембрандт')
+        self.genres = [Genre.objects.create(genre_name=name) for name in ('Пейзаж', 'Портрет')]
+
+    def post(self, url, items):
+        return client.post(url, json.dumps(items), content_type='application/json')
+
+    def test_create_with_m2m(self):
+        items = [{'title': f'Картина {index}', 'author': self.author.pk,
+                  'genres': [genre.pk for genre in self.genres[:index % 2 + 1]]} for index in range(40)]
+        # Связи для проверки, max(pk), вставка, чтение pk, связи, индекс поиска и savepoint:
+        # число запросов не зависит от числа элементов.
+        with self.assertNumQueries(10):
+            response = self.post(reverse('paintings-bulk'), items)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        created = Painting.objects.in_bulk(response.data['ids'])
+        self.assertEqual([created[pk].title for pk in response.data['ids']],
+                         [item['title'] for item in items])
+        self.assertEqual(list(created[response.data['ids'][1]].genres.values_list('pk', flat=True)),
+                         [genre.pk for genre in self.genres])
+        self.assertEqual(search.search('Картина', ['painting'])[0], 40)
+
+    def test_errors_per_item_and_nothing_saved(self):
+        items = [{'title': 'Хорошая'}, {'title': 'Без автора', 'author': 999}, {'genres': ['x']}]
+        response = self.post(reverse('paintings-bulk'), items)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        errors = response.data['errors']
+        self.assertIsNone(errors[0])
+        self.assertIn('author', errors[1])
+        self.assertEqual(set(errors[2]), {'title', 'genres'})
+        self.assertFalse(Painting.objects.exists())
+
+    def test_unique_inside_batch(self):
+        response = self.post(reverse('genres-bulk'), [{'genre_name': 'Жанр'}, {'genre_name': 'Жанр'},
+                                                      {'genre_name': 'Пейзаж'}])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual([bool(error) for error in response.data['errors']], [False, True, True])
+
+    def test_update(self):
+        first = Painting.objects.create(title='Первая')
+        second = Painting.objects.create(title='Вторая')
+        second.genres.add(self.genres[0])
+        before = second.datetime
+        response = client.patch(reverse('paintings-bulk'), json.dumps([
+            {'id': first.pk, 'author': self.author.pk},
+            {'id': second.pk, 'title': 'Изменена', 'genres': [self.genres[1].pk]},
+        ]), content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual((first.title, first.author), ('Первая', self.author))
+        self.assertEqual(second.title, 'Изменена')
+        self.assertGreater(second.datetime, before)
+        self.assertEqual(list(second.genres.all()), [self.genres[1]])
+
+    def test_update_unknown_id(self):
+        response = client.patch(reverse('paintings-bulk'), json.dumps([{'id': 999, 'title': 'x'}, {}]),
+                                content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(len(response.data['errors']), 2)
+
+    def test_refused_for_custom_save(self):
+        # Main.save() держит единственную запись: пакетная запись его обошла бы.
+        Main.objects.create(title_about='Главная')
+        response = self.post(reverse('main-bulk'), [{'title_about': 'b'}, {'title_about': 'c'}])
+        self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+        response = client.patch(reverse('main-bulk'), json.dumps([{'id': 1, 'title_about': 'b'}]),
+                                content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+        self.assertEqual(list(Main.objects.values_list('title_about', flat=True)), ['Главная'])
+
+    def test_delete(self):
+        genre = self.genres[0]
+        response = client.delete(reverse('genres-bulk') + f'?ids={genre.pk},999')
+        self.assertEqual(response.data, {'deleted': [genre.pk], 'missing': [999]})
+        self.assertFalse(Genre.objects.filter(pk=genre.pk).exists())
+
+    def test_write_invalidates_cache(self):
+        client.get(reverse('paintings-list'))
+        self.post(reverse('paintings-bulk'), [{'title': 'Новая'}])
+        response = client.get(reverse('paintings-list'))
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual([row['title'] for row in response.data], ['Новая'])
+
+    def test_not_a_list(self):
+        response = self.post(reverse('paintings-bulk'), {'title': 'x'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
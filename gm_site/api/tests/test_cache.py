@@ -0,0 +1,95 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+from rest_framework import status
+
+from ..cache import check_shared_cache, stats
+from ..models import Artist, Genre, Painting
+
+client = Client()
+
+
+class ResponseCacheTest(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        stats.reset()
+        self.landscape = Genre.objects.create(genre_name='Пейзаж')
+        self.author = Artist.objects.create(name='Герард Дау')
+        self.hermit = Painting.objects.create(title='Отшельник', author=self.author)
+        self.hermit.genres.add(self.landscape)
+
+    def test_second_request_is_served_from_cache(self):
+        first = client.get(reverse('paintings-list'))
+        self.assertEqual(first['X-Cache'], 'MISS')
+        with self.assertNumQueries(0):
+            second = client.get(reverse('paintings-list'))
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(stats.snapshot()['paintings-list'], {'hits': 1, 'misses': 1})
+
+    def test_not_modified_from_cache(self):
+        etag = client.get(reverse('paintings-list'))['ETag']
+        with self.assertNumQueries(0):
+            response = client.get(reverse('paintings-list'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_query_params_are_part_of_key(self):
+        client.get(reverse('paintings-list'))
+        response = client.get(reverse('paintings-list') + '?page_size=1')
+        self.assertEqual(response['X-Cache'], 'MISS')
+
+    @override_settings(ALLOWED_HOSTS=['first.example', 'second.example'])
+    def test_origin_is_part_of_key(self):
+        Painting.objects.create(title='Старик', author=self.author)
+        url = reverse('paintings-list') + '?page_size=1'
+        client.get(url, HTTP_HOST='first.example')
+        for host, secure in (('second.example', False), ('first.example', True)):
+            response = client.get(url, HTTP_HOST=host, secure=secure)
+            self.assertEqual(response['X-Cache'], 'MISS')
+            scheme = 'https' if secure else 'http'
+            self.assertIn(f'{scheme}://{host}/', response['Link'])
+
+    def test_process_local_cache_warning(self):
+        [warning] = check_shared_cache(None)
+        self.assertEqual(warning.id, 'api.W002')
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}):
+            self.assertEqual(check_shared_cache(None), [])
+
+    def test_save_invalidates(self):
+        client.get(reverse('paintings-detail', kwargs={'pk': self.hermit.pk}))
+        self.hermit.title = 'Старик'
+        self.hermit.save()
+        response = client.get(reverse('paintings-detail', kwargs={'pk': self.hermit.pk}))
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['title'], 'Старик')
+
+    def test_m2m_change_invalidates(self):
+        client.get(reverse('paintings-list'))
+        still_live = Genre.objects.create(genre_name='Натюрморт')
+        self.hermit.genres.add(still_live)
+        response = client.get(reverse('paintings-list'))
+        self.assertEqual(response.data[0]['genres'], [self.landscape.pk, still_live.pk])
+
+    def test_related_delete_invalidates(self):
+        client.get(reverse('paintings-list'))
+        self.landscape.delete()
+        response = client.get(reverse('paintings-list'))
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data[0]['genres'], [])
+
+    def test_uncached_route(self):
+        response = client.get(reverse('events-list'))
+        self.assertFalse(response.has_header('X-Cache'))
+
+    def test_stats_endpoint_requires_admin(self):
+        response = client.get(reverse('cache-stats'))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        admin = Client()
+        admin.login(username='admin', password='password')
+        client.get(reverse('genres-list'))
+        response = admin.get(reverse('cache-stats'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['genres-list'], {'hits': 0, 'misses': 1})
@@ -0,0 +1,108 @@
+import gzip
+import io
+import os
+import shutil
+import tempfile
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+
+from ..catalogue import CatalogueError, export_catalogue, export_media, import_catalogue, import_media
+from ..models import Artist, Article, Comment, Event, Gallery, Genre, Main, Painting, Place
+
+
+def snapshot():
+    return {
+        'paintings': list(Painting.objects.order_by('pk').values('pk', 'title', 'author', 'datetime', 'photo')),
+        'genres': sorted(Painting.genres.through.objects.values_list('painting', 'genre')),
+        'galleries': sorted(Gallery.paintings.through.objects.values_list('gallery', 'painting')),
+        'events': list(Event.objects.values('pk', 'place', 'event_date', 'datetime')),
+        'articles': sorted(Article.events.through.objects.values_list('article', 'event')),
+        'comments': list(Comment.objects.order_by('pk').values('pk', 'article', 'parent', 'datetime')),
+        'main': list(Main.objects.values()),
+    }
+
+
+class CatalogueTest(TestCase):
+    def setUp(self) -> None:
+        artist = Artist.objects.create(name='Рембрандт', artist_date='1606-07-15')
+        genre = Genre.objects.create(genre_name='Портрет')
+        paintings = [Painting.objects.create(title=f'Картина {index}', author=artist, photo=f'p{index}.png')
+                     for index in range(3)]
+        paintings[0].genres.add(genre)
+        Gallery.objects.create(name='Избранное').paintings.set(paintings[:2])
+        place = Place.objects.create(name='Эрмитаж')
+        event = Event.objects.create(name='Выставка', place=place, event_date='2020-01-01')
+        article = Article.objects.create(title='Статья', content='Текст')
+        article.events.add(event)
+        root = Comment.objects.create(article=article, content='Первый')
+        reply = Comment.objects.create(article=article, content='Ответ')
+        # Родитель ниже ребёнка по файлу: проверка отложенных ограничений.
+        root.parent = reply
+        root.save()
+        Main.objects.create(title_about='О нас', content_about='Текст')
+
+    def export(self):
+        stream = io.StringIO()
+        export_catalogue(stream)
+        stream.seek(0)
+        return stream
+
+    def test_round_trip(self):
+        before = snapshot()
+        stream = self.export()
+        counts = import_catalogue(stream, clear=True, batch_size=2)
+        self.assertEqual(snapshot(), before)
+        self.assertEqual(counts['api.painting'], 3)
+        self.assertEqual(counts['api.gallerypainting'], 2)
+        # Последовательности продолжают нумерацию после загруженных pk.
+        self.assertGreater(Painting.objects.create(title='Новая').pk, before['paintings'][-1]['pk'])
+
+    def test_conflict_without_clear_rolls_back(self):
+        stream = self.export()
+        Painting.objects.filter(pk=Painting.objects.first().pk).delete()
+        with self.assertRaises(Exception):
+            import_catalogue(stream)
+        self.assertEqual(Painting.objects.count(), 2)
+
+    def test_broken_file(self):
+        with self.assertRaises(CatalogueError):
+            import_catalogue(io.StringIO('{"model":"api.painting","columns":["id"]}\n'))
+        with self.assertRaises(CatalogueError):
+            import_catalogue(io.StringIO('{"catalogue":1}\n{"model":"api.unknown","columns":[]}\n'))
+
+    def test_commands_gzip(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'catalogue.jsonl.gz')
+        before = snapshot()
+        call_command('export_catalogue', path, stderr=io.StringIO())
+        with gzip.open(path, 'rt', encoding='utf-8') as stream:
+            self.assertEqual(stream.readline(), '{"catalogue":1}\n')
+        call_command('import_catalogue', path, '--clear', stdout=io.StringIO())
+        self.assertEqual(snapshot(), before)
+        with self.assertRaises(CommandError):
+            call_command('import_catalogue', path, stdout=io.StringIO())
+
+
+class CatalogueMediaTest(TestCase):
+    def test_parallel_copy(self):
+        source, target, copy = tempfile.mkdtemp(), tempfile.mkdtemp(), tempfile.mkdtemp()
+        for directory in (source, target, copy):
+            self.addCleanup(shutil.rmtree, directory)
+        with override_settings(MEDIA_ROOT=source):
+            default_storage.save('a.png', ContentFile(b'a'))
+            default_storage.save('a.png.thumb.webp', ContentFile(b'thumb'))
+            default_storage.save('unused.png', ContentFile(b'x'))
+            Painting.objects.create(title='С фото', photo='a.png')
+            Painting.objects.create(title='Без фото')
+            self.assertEqual(export_media(copy, workers=2), 2)
+            self.assertEqual(export_media(copy, workers=2), 0)
+        self.assertEqual(sorted(os.listdir(copy)), ['a.png', 'a.png.thumb.webp'])
+        with override_settings(MEDIA_ROOT=target):
+            self.assertEqual(import_media(copy, workers=2), 2)
+            self.assertEqual(import_media(copy, workers=2), 0)
+            with default_storage.open('a.png.thumb.webp') as stored:
+                self.assertEqual(stored.read(), b'thumb')
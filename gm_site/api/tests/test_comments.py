@@ -0,0 +1,61 @@
+from django.test import TestCase, Client
+from django.urls import reverse
+from rest_framework import status
+
+from ..models import Article, Comment
+
+client = Client()
+
+
+class CommentTreeTest(TestCase):
+    def setUp(self) -> None:
+        self.article = Article.objects.create(title='Выставка', content='Текст')
+        self.other = Article.objects.create(title='Другая статья', content='Текст')
+        self.first = Comment.objects.create(article=self.article, content='Первый')
+        self.second = Comment.objects.create(article=self.article, content='Второй')
+        self.reply = Comment.objects.create(article=self.article, parent=self.first, content='Ответ')
+        self.deep = Comment.objects.create(article=self.article, parent=self.reply, content='Ответ на ответ')
+        Comment.objects.create(article=self.other, content='Чужой')
+
+    def url(self, article=None):
+        return reverse('articles-comment-tree', kwargs={'pk': (article or self.article).pk})
+
+    def test_whole_thread_in_one_query(self):
+        with self.assertNumQueries(1):
+            response = client.get(self.url())
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        roots = response.data['results']
+        self.assertEqual([node['content'] for node in roots], ['Первый', 'Второй'])
+        reply = roots[0]['replies'][0]
+        self.assertEqual((reply['id'], reply['depth'], reply['parent']), (self.reply.pk, 1, self.first.pk))
+        self.assertEqual(reply['replies'][0]['content'], 'Ответ на ответ')
+        self.assertEqual(roots[1]['replies'], [])
+        self.assertIsNone(response.data['next_after'])
+
+    def test_depth_limit_keeps_counts(self):
+        roots = client.get(self.url(), {'depth': 1}).data['results']
+        reply = roots[0]['replies'][0]
+        self.assertEqual(reply['replies'], [])
+        self.assertEqual(reply['replies_count'], 1)
+
+    def test_root_pagination(self):
+        data = client.get(self.url(), {'limit': 1}).data
+        self.assertEqual([node['id'] for node in data['results']], [self.first.pk])
+        data = client.get(self.url(), {'limit': 1, 'after': data['next_after']}).data
+        self.assertEqual([node['id'] for node in data['results']], [self.second.pk])
+
+    def test_replies_page(self):
+        Comment.objects.create(article=self.article, parent=self.first, content='Ещё ответ')
+        data = client.get(self.url(), {'replies_limit': 1}).data
+        self.assertEqual(len(data['results'][0]['replies']), 1)
+        self.assertEqual(data['results'][0]['replies_count'], 2)
+        data = client.get(self.url(), {'parent': self.first.pk, 'after': self.reply.pk}).data
+        self.assertEqual([node['content'] for node in data['results']], ['Ещё ответ'])
+
+    def test_missing_article(self):
+        response = client.get(reverse('articles-comment-tree', kwargs={'pk': self.other.pk + 10}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_invalid_param(self):
+        response = client.get(self.url(), {'depth': 'deep'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,80 @@
+import gzip
+import unittest
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, Client
+from django.urls import reverse
+from rest_framework import status
+
+from .. import compression
+from ..models import Article, Painting
+
+client = Client()
+
+
+class ChooseEncodingTest(unittest.TestCase):
+    def test_negotiation(self):
+        self.assertEqual(compression.choose_encoding('gzip, deflate', ('br', 'gzip')), 'gzip')
+        self.assertEqual(compression.choose_encoding('gzip;q=0.5, br', ('br', 'gzip')), 'br')
+        self.assertEqual(compression.choose_encoding('br;q=0, *', ('br', 'gzip')), 'gzip')
+        self.assertEqual(compression.choose_encoding('gzip;q=0', ('gzip',)), None)
+        self.assertEqual(compression.choose_encoding('', ('gzip',)), None)
+        self.assertEqual(compression.choose_encoding('identity', ('gzip',)), None)
+
+
+class CompressionTest(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        for index in range(5):
+            Article.objects.create(title=f'Статья {index}', content='Длинный текст статьи. ' * 100)
+        for index in range(30):
+            Painting.objects.create(title=f'Картина {index}')
+
+    def test_large_response_is_gzipped(self):
+        plain = client.get(reverse('articles-list'))
+        self.assertFalse(plain.has_header('Content-Encoding'))
+        self.assertIn('Accept-Encoding', plain['Vary'])
+
+        response = client.get(reverse('articles-list'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(int(response['Content-Length']), len(response.content))
+        self.assertLess(len(response.content), len(plain.content) / 5)
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        self.assertTrue(response['ETag'].startswith('W/"'))
+
+    def test_small_response_and_refused_encoding(self):
+        Article.objects.all().delete()
+        Article.objects.create(title='Коротко', content='Текст')
+        response = client.get(reverse('articles-list'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        response = client.get(reverse('comments-list'), HTTP_ACCEPT_ENCODING='gzip;q=0')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_cache_hit_uses_precompressed_bytes(self):
+        url = reverse('paintings-list')
+        first = client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual((first['X-Cache'], first['Content-Encoding']), ('MISS', 'gzip'))
+        with mock.patch.object(compression, 'compress', side_effect=AssertionError('сжатие при попадании')):
+            second = client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+            plain = client.get(url)
+        self.assertEqual((second['X-Cache'], second['Content-Encoding']), ('HIT', 'gzip'))
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(gzip.decompress(second.content), plain.content)
+        self.assertFalse(plain.has_header('Content-Encoding'))
+        self.assertIn('Accept-Encoding', second['Vary'])
+
+    def test_streaming_export(self):
+        plain = client.get(reverse('paintings-export'))
+        response = client.get(reverse('paintings-export'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        body = b''.join(response.streaming_content)
+        self.assertEqual(gzip.decompress(body), b''.join(plain.streaming_content))
+
+    @unittest.skipIf(compression.brotli is None, 'Brotli не установлен')
+    def test_brotli_preferred(self):
+        plain = client.get(reverse('articles-list'))
+        response = client.get(reverse('articles-list'), HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(compression.brotli.decompress(response.content), plain.content)
@@ -0,0 +1,58 @@
+from django.core.cache import cache
+from django.test import TestCase, Client
+from django.urls import reverse
+from rest_framework import status
+
+from ..models import Article, Artist
+
+client = Client()
+
+
+class ConditionalGetTest(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.article = Article.objects.create(title='Выставка', content='Текст')
+
+    def test_list_not_modified(self):
+        response = client.get(reverse('articles-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        with self.assertNumQueries(1):
+            response = client.get(reverse('articles-list'), HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b'')
+
+    def test_list_changes_after_insert(self):
+        etag = client.get(reverse('articles-list'))['ETag']
+        Article.objects.create(title='Новая статья', content='Текст')
+        response = client.get(reverse('articles-list'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 2)
+
+    def test_detail_changes_after_m2m_update(self):
+        url = reverse('articles-detail', kwargs={'pk': self.article.pk})
+        etag = client.get(url)['ETag']
+        self.assertEqual(client.get(url, HTTP_IF_NONE_MATCH=etag).status_code,
+                         status.HTTP_304_NOT_MODIFIED)
+        self.article.artists.add(Artist.objects.create(name='Герард Дау'))
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['artists']), 1)
+
+    def test_no_last_modified(self):
+        # Удаление старой записи не сдвигает MAX(datetime): If-Modified-Since отдал бы устаревший список.
+        Article.objects.create(title='Новая статья', content='Текст')
+        response = client.get(reverse('articles-list'))
+        self.assertFalse(response.has_header('Last-Modified'))
+        self.article.delete()
+        response = client.get(reverse('articles-list'), HTTP_IF_MODIFIED_SINCE='Sat, 01 Jan 2050 00:00:00 GMT')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 1)
+
+        url = reverse('paintings-list')
+        for _ in range(2):
+            response = client.get(url)
+            self.assertFalse(response.has_header('Last-Modified'))  # Второй раз - из кэша.
+
+    def test_missing_detail(self):
+        response = client.get(reverse('articles-detail', kwargs={'pk': self.article.pk + 1}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
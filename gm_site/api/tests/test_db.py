@@ -0,0 +1,67 @@
+import os
+import tempfile
+
+from django.db import connection
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from ..db import ReplicaRouter, replica_reads
+from ..middleware import ReplicaReadsMiddleware
+from ..models import Painting
+
+router = ReplicaRouter()
+
+
+@override_settings(API_READ_REPLICAS=['replica_1'])
+class ReplicaRouterTest(SimpleTestCase):
+    def test_reads_go_to_primary_by_default(self):
+        self.assertEqual(router.db_for_read(Painting), 'default')
+
+    def test_reads_go_to_replica_when_enabled(self):
+        with replica_reads():
+            self.assertEqual(router.db_for_read(Painting), 'replica_1')
+        self.assertEqual(router.db_for_read(Painting), 'default')
+
+    def test_writes_go_to_primary(self):
+        painting = Painting(title='Отшельник')
+        painting._state.db = 'replica_1'
+        with replica_reads():
+            self.assertEqual(router.db_for_write(Painting, instance=painting), 'default')
+
+    def test_no_migrations_on_replicas(self):
+        self.assertFalse(router.allow_migrate('replica_1', 'api'))
+        self.assertIsNone(router.allow_migrate('default', 'api'))
+
+    def test_middleware_enables_replicas_for_safe_methods(self):
+        seen = []
+        middleware = ReplicaReadsMiddleware(lambda request: seen.append(router.db_for_read(Painting)))
+        factory = RequestFactory()
+        middleware(factory.get('/api/v1/paintings/'))
+        middleware(factory.post('/api/v1/paintings/'))
+        self.assertEqual(seen, ['replica_1', 'default'])
+
+
+class SqliteWalTest(SimpleTestCase):
+    def journal_mode(self, executed=None):
+        with tempfile.TemporaryDirectory() as directory:
+            settings_dict = dict(connection.settings_dict, NAME=os.path.join(directory, 'wal.sqlite3'))
+            wrapper = DatabaseWrapper(settings_dict, alias='wal_test')
+            try:
+                with wrapper.execute_wrapper(lambda execute, sql, *args: executed.append(sql) or execute(sql, *args)):
+                    wrapper.ensure_connection()
+                with wrapper.cursor() as cursor:
+                    cursor.execute('PRAGMA journal_mode')
+                    return cursor.fetchone()[0]
+            finally:
+                wrapper.close()
+
+    @override_settings(API_SQLITE_WAL=True)
+    def test_file_database_uses_wal(self):
+        executed = []
+        self.assertEqual(self.journal_mode(executed), 'wal')
+        # PRAGMA при подключении не видны execute_wrapper: запросов запроса к API не добавляют.
+        self.assertEqual(executed, [])
+
+    def test_wal_is_opt_in(self):
+        # Файл db.sqlite3 в репозитории не должен переходить в WAL от любой команды.
+        self.assertEqual(self.journal_mode([]), 'delete')
@@ -0,0 +1,66 @@
+import json
+
+from django.test import TestCase, Client
+from django.urls import reverse
+from rest_framework import status
+
+from ..models import Artist, Genre, Painting
+from ..serializers import PaintingSerializer
+from ..views import ApiPaintingViewSet
+
+client = Client()
+
+
+class StreamingExportTest(TestCase):
+    def setUp(self) -> None:
+        self.author = Artist.objects.create(name='Рембрандт')
+        self.genre = Genre.objects.create(genre_name='Портрет')
+        for index in range(5):
+            painting = Painting.objects.create(title=f'Картина {index}',
+                                               author=self.author if index % 2 else None)
+            painting.genres.add(self.genre)
+
+    def expected(self, queryset):
+        return json.loads(json.dumps(PaintingSerializer(queryset.order_by('pk'), many=True).data))
+
+    def get_stream(self, url):
+        response = client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_ndjson(self):
+        response, body = self.get_stream(reverse('paintings-export'))
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson; charset=utf-8')
+        self.assertIn('paintings.ndjson', response['Content-Disposition'])
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual(rows, self.expected(Painting.objects.all()))
+
+    def test_json_array_with_filters(self):
+        _, body = self.get_stream(reverse('paintings-export') + f'?output=json&author={self.author.pk}')
+        self.assertEqual(json.loads(body), self.expected(Painting.objects.filter(author=self.author)))
+        _, body = self.get_stream(reverse('genres-export') + '?output=json')
+        self.assertEqual(json.loads(body), [{'genre_name': 'Портрет'}])
+        Genre.objects.all().delete()
+        _, body = self.get_stream(reverse('genres-export') + '?output=json')
+        self.assertEqual(json.loads(body), [])
+
+    def test_prefetch_per_chunk(self):
+        chunk_size = ApiPaintingViewSet.export_chunk_size
+        ApiPaintingViewSet.export_chunk_size = 2
+        try:
+            response = client.get(reverse('paintings-export'))
+            # Один запрос строк и по одному запросу жанров на каждую из трёх пачек.
+            with self.assertNumQueries(4):
+                lines = b''.join(response.streaming_content).splitlines()
+        finally:
+            ApiPaintingViewSet.export_chunk_size = chunk_size
+        self.assertEqual(len(lines), 5)
+
+    def test_unknown_output(self):
+        response = client.get(reverse('paintings-export') + '?output=xml')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_ndjson_accept_header(self):
+        response = client.get(reverse('paintings-export'), HTTP_ACCEPT='application/x-ndjson')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
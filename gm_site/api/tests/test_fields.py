@@ -0,0 +1,82 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+
+from ..models import Artist, Genre, Painting, Place, Event, Article, Comment
+
+client = Client()
+
+
+class SparseFieldsetTest(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.rembrandt = Artist.objects.create(name='Рембрандт Харменс ван Рейн', is_master=True)
+        self.landscape = Genre.objects.create(genre_name='Пейзаж')
+        self.painting = Painting.objects.create(title='Ночной дозор', author=self.rembrandt,
+                                                description='Длинное описание')
+        self.painting.genres.add(self.landscape)
+        self.place = Place.objects.create(name='Ижад')
+        self.event = Event.objects.create(name='Выставка', place=self.place)
+        self.event.paintings.add(self.painting)
+        self.article = Article.objects.create(title='Статья', content='Очень длинный текст')
+        self.article.events.add(self.event)
+        self.article.artists.add(self.rembrandt)
+
+    def test_fields_trim_output_and_columns(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(reverse('articles-list'), {'fields': 'title'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, [{'title': 'Статья'}])
+        select = [query['sql'] for query in queries if '"api_article"."title"' in query['sql']][-1]
+        self.assertNotIn('"content"', select)
+
+    def test_expand_fk_and_m2m(self):
+        response = client.get(reverse('paintings-list'), {'expand': 'author,genres',
+                                                         'fields': 'title,author.name,genres'})
+        self.assertEqual(response.data, [{
+            'title': 'Ночной дозор',
+            'author': {'name': 'Рембрандт Харменс ван Рейн'},
+            'genres': [{'genre_name': 'Пейзаж'}],
+        }])
+
+    def test_nested_expand_query_count_is_constant(self):
+        for index in range(5):
+            article = Article.objects.create(title=f'Статья {index}', content='Текст')
+            article.events.add(self.event)
+        params = {'expand': 'events.place,events.paintings.author', 'fields': 'title,events'}
+        # Агрегат ETag, статьи, события (с площадкой через JOIN), картины (с автором через JOIN),
+        # pk жанров картин и pk художников событий - независимо от числа статей.
+        with self.assertNumQueries(6):
+            response = client.get(reverse('articles-list'), params)
+        event = response.data[0]['events'][0]
+        self.assertEqual(event['place']['name'], 'Ижад')
+        self.assertEqual(event['paintings'][0]['author']['name'], 'Рембрандт Харменс ван Рейн')
+
+    def test_expand_nullable_parent(self):
+        root = Comment.objects.create(article=self.article, content='Вопрос')
+        Comment.objects.create(article=self.article, parent=root, content='Ответ')
+        response = client.get(reverse('comments-list'), {'expand': 'parent', 'fields': 'content,parent.content'})
+        self.assertEqual(response.data, [
+            {'content': 'Вопрос', 'parent': None},
+            {'content': 'Ответ', 'parent': {'content': 'Вопрос'}},
+        ])
+
+    def test_detail_and_bulk(self):
+        url = reverse('events-detail', kwargs={'pk': self.event.pk})
+        response = client.get(url, {'expand': 'place', 'fields': 'name,place.address'})
+        self.assertEqual(response.data, {'name': 'Выставка', 'place': {'address': None}})
+        response = client.get(reverse('events-bulk'), {'ids': self.event.pk, 'fields': 'name'})
+        self.assertEqual(response.data['results'], [{'name': 'Выставка'}])
+
+    def test_invalid_params(self):
+        for params in ({'fields': 'nope'}, {'expand': 'title'}, {'fields': 'author.name'}):
+            response = client.get(reverse('paintings-list'), params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, params)
+
+    def test_writes_ignore_fields(self):
+        response = client.post(reverse('genres-list') + '?fields=nope', {'genre_name': 'Портрет'},
+                               content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
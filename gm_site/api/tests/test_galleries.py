@@ -0,0 +1,95 @@
+import json
+
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+
+from ..models import Artist, Gallery, GalleryPainting, Genre, Painting
+
+client = Client()
+
+
+class GalleryTest(TestCase):
+    def setUp(self) -> None:
+        author = Artist.objects.create(name='Рембрандт')
+        genre = Genre.objects.create(genre_name='Портрет')
+        self.paintings = [Painting.objects.create(title=f'Картина {index}', author=author) for index in range(7)]
+        for painting in self.paintings:
+            painting.genres.add(genre)
+        self.gallery = Gallery.objects.create(name='Избранное')
+        # Порядок показа обратен порядку создания.
+        GalleryPainting.objects.bulk_create(
+            GalleryPainting(gallery=self.gallery, painting=painting, position=len(self.paintings) - index)
+            for index, painting in enumerate(self.paintings))
+        self.url = reverse('galleries-paintings', kwargs={'pk': self.gallery.pk})
+
+    def read_all(self, url):
+        ids = []
+        while url:
+            response = client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK, response.content)
+            ids.extend(item['painting']['id'] for item in response.data)
+            link = response.get('Link')
+            url = link[1:link.index('>')] if link else None
+        return ids
+
+    def test_list_hides_membership(self):
+        response = client.get(reverse('galleries-detail', kwargs={'pk': self.gallery.pk}))
+        self.assertEqual(response.data, {'id': self.gallery.pk, 'name': 'Избранное'})
+
+    def test_paintings_in_order_by_pages(self):
+        expected = [painting.pk for painting in reversed(self.paintings)]
+        self.assertEqual(self.read_all(self.url + '?page_size=3'), expected)
+
+    def test_one_query_per_page(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(self.url + '?page_size=3')
+        self.assertEqual(len(response.data), 3)
+        self.assertEqual(response.data[0]['painting']['genres'], [self.paintings[-1].genres.get().pk])
+        # Страница (по индексу, с картиной через JOIN) и жанры её картин.
+        self.assertEqual(len(queries), 2)
+        self.assertIn('api_gallerypainting', queries[0]['sql'])
+        self.assertIn('INNER JOIN "api_painting"', queries[0]['sql'])
+
+    def test_unknown_gallery(self):
+        response = client.get(reverse('galleries-paintings', kwargs={'pk': self.gallery.pk + 1}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        empty = Gallery.objects.create(name='Пустая')
+        response = client.get(reverse('galleries-paintings', kwargs={'pk': empty.pk}))
+        self.assertEqual(response.data, [])
+
+    def test_set_paintings(self):
+        first, second, third = self.paintings[:3]
+        newcomer = Painting.objects.create(title='Новая')
+        order = [third.pk, newcomer.pk, first.pk]
+        response = client.put(self.url, json.dumps(order), content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.content)
+        self.assertEqual(response.data, {'added': 1, 'removed': 5, 'moved': 2})
+        self.assertEqual(self.read_all(self.url), order)
+        self.assertEqual(list(GalleryPainting.objects.filter(gallery=self.gallery)
+                              .values_list('position', flat=True)), [0, 1, 2])
+
+    def test_set_paintings_rejects_bad_input(self):
+        for body in ({'paintings': []}, [1, 1], ['x']):
+            response = client.put(self.url, json.dumps(body), content_type='application/json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = client.put(self.url, json.dumps([self.paintings[0].pk, 9999]), content_type='application/json')
+        self.assertEqual(response.data, {'missing': [9999]})
+        self.assertEqual(GalleryPainting.objects.filter(gallery=self.gallery).count(), 7)
+
+    def test_move_paintings(self):
+        first, last = self.paintings[0], self.paintings[-1]
+        body = [{'painting': first.pk, 'position': 0}, {'painting': last.pk, 'position': 100}]
+        response = client.patch(self.url, json.dumps(body), content_type='application/json')
+        self.assertEqual(response.data, {'moved': 2})
+        ids = self.read_all(self.url)
+        self.assertEqual((ids[0], ids[-1]), (first.pk, last.pk))
+
+        outsider = Painting.objects.create(title='Чужая')
+        body = [{'painting': first.pk, 'position': 5}, {'painting': outsider.pk, 'position': 1}]
+        response = client.patch(self.url, json.dumps(body), content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data, {'missing': [outsider.pk]})
+        self.assertEqual(GalleryPainting.objects.get(painting=first).position, 0)
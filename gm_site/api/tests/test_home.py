@@ -0,0 +1,75 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+
+from ..models import Artist, Genre, Painting, Event, Article, Main
+from ..singleton import main_singleton
+
+client = Client()
+
+# Статьи с четырьмя ManyToMany, события с двумя, картины с жанрами; Main - из памяти.
+HOME_QUERIES = 10
+
+
+class HomeTest(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        Main.objects.create(title_about='О нас', content_about='Галерея')
+        self.master = Artist.objects.create(name='Рембрандт', is_master=True)
+        self.student = Artist.objects.create(name='Герард Дау')
+        self.genre = Genre.objects.create(genre_name='Портрет')
+
+    def add_content(self, count):
+        today = timezone.localdate()
+        for index in range(count):
+            painting = Painting.objects.create(title=f'Картина {index}', author=self.master)
+            painting.genres.add(self.genre)
+            Painting.objects.create(title=f'Этюд {index}', author=self.student)
+            event = Event.objects.create(name=f'Выставка {index}', event_date=today + timedelta(days=index))
+            event.paintings.add(painting)
+            Event.objects.create(name=f'Прошедшая {index}', event_date=today - timedelta(days=index + 1))
+            article = Article.objects.create(title=f'Статья {index}', content='Текст')
+            article.events.add(event)
+
+    def test_sections(self):
+        self.add_content(3)
+        response = client.get(reverse('home-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['main']['title_about'], 'О нас')
+        self.assertEqual([row['title'] for row in response.data['articles']],
+                         ['Статья 2', 'Статья 1', 'Статья 0'])
+        self.assertEqual([row['name'] for row in response.data['events']],
+                         ['Выставка 0', 'Выставка 1', 'Выставка 2'])
+        self.assertEqual([row['title'] for row in response.data['paintings']],
+                         ['Картина 2', 'Картина 1', 'Картина 0'])
+        self.assertEqual(response.data['paintings'][0]['genres'], [self.genre.pk])
+
+    def test_query_budget_does_not_grow(self):
+        for count in (1, 10):
+            self.add_content(count)
+            cache.clear()
+            main_singleton.get()
+            with self.assertNumQueries(HOME_QUERIES):
+                response = client.get(reverse('home-list'))
+            self.assertEqual(len(response.data['paintings']), min(Painting.objects.filter(
+                author=self.master).count(), 12))
+
+    def test_cached_and_invalidated(self):
+        self.add_content(1)
+        client.get(reverse('home-list'))
+        with self.assertNumQueries(0):
+            self.assertEqual(client.get(reverse('home-list'))['X-Cache'], 'HIT')
+        Main.objects.update(title_about='Изменено')  # update() сигналов не шлёт
+        Article.objects.create(title='Новая статья')
+        response = client.get(reverse('home-list'))
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['articles'][0]['title'], 'Новая статья')
+
+    def test_empty_site(self):
+        Main.objects.all().delete()
+        response = client.get(reverse('home-list'))
+        self.assertEqual(response.data, {'main': None, 'articles': [], 'events': [], 'paintings': []})
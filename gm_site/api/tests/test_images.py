@@ -0,0 +1,56 @@
+import io
+import shutil
+import tempfile
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from ..images import variant_names
+from ..models import Painting
+from ..serializers import PaintingSerializer
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def make_image(size=(2000, 1000), image_format='PNG', mode='RGBA'):
+    buffer = io.BytesIO()
+    Image.new(mode, size, (200, 100, 50, 255)[:len(mode)]).save(buffer, format=image_format)
+    return SimpleUploadedFile(f'painting.{image_format.lower()}', buffer.getvalue())
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, API_IMAGE_JOBS_EAGER=True)
+class ImageVariantsTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def test_variants_generated_on_upload(self):
+        painting = Painting.objects.create(title='Аллегория музыки', photo=make_image())
+        names = variant_names(painting.photo.name)
+        for variant, size in (('thumb', 240), ('small', 640), ('medium', 1280)):
+            for image_format in ('jpeg', 'webp'):
+                with painting.photo.storage.open(names[variant][image_format]) as file:
+                    image = Image.open(file)
+                    self.assertEqual(image.format, image_format.upper())
+                    self.assertEqual(max(image.size), size)
+
+    def test_small_image_is_not_upscaled(self):
+        painting = Painting.objects.create(title='Эскиз', photo=make_image((100, 80), 'JPEG', 'RGB'))
+        with painting.photo.storage.open(variant_names(painting.photo.name)['medium']['jpeg']) as file:
+            self.assertEqual(Image.open(file).size, (100, 80))
+
+    def test_serializer_exposes_variant_urls(self):
+        painting = Painting.objects.create(title='Отшельник', photo=make_image())
+        data = PaintingSerializer(painting).data
+        self.assertEqual(data['photo_variants']['thumb']['webp'], f'{painting.photo.url}.thumb.webp')
+        self.assertEqual(PaintingSerializer(Painting(title='Без фото')).data['photo_variants'], None)
+
+    def test_command_rebuilds_missing_variants(self):
+        painting = Painting.objects.create(title='Отшельник', photo=make_image())
+        name = variant_names(painting.photo.name)['thumb']['webp']
+        painting.photo.storage.delete(name)
+        call_command('generate_image_variants', stdout=io.StringIO())
+        self.assertTrue(painting.photo.storage.exists(name))
@@ -0,0 +1,46 @@
+import io
+import os
+import tempfile
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+
+from ..indexes import Candidate, extract_candidates, find_missing_indexes, read_statements
+from ..models import Artist, Painting
+
+AUTHOR_PAGE = ('SELECT "api_painting"."id", "api_painting"."title" FROM "api_painting" '
+               'WHERE ("api_painting"."author_id" = %s AND ("api_painting"."datetime" > %s OR '
+               '("api_painting"."datetime" = %s AND "api_painting"."id" > %s))) '
+               'ORDER BY "api_painting"."datetime" ASC, "api_painting"."id" ASC LIMIT 101')
+BY_TITLE = ('SELECT "api_painting"."id" FROM "api_painting" '
+            'WHERE "api_painting"."title" = %s ORDER BY "api_painting"."painting_date" DESC')
+
+
+class MissingIndexTest(TestCase):
+    def test_extract_candidates(self):
+        self.assertEqual(extract_candidates(AUTHOR_PAGE),
+                         [Candidate('api_painting', ('author_id',), ('datetime', 'id'))])
+        self.assertEqual(extract_candidates(BY_TITLE),
+                         [Candidate('api_painting', ('title',), ('painting_date',))])
+
+    def test_read_statements_from_backend_log(self):
+        lines = [f'(0.002) {BY_TITLE}; args=(\'Отшельник\',)', 'Performing system checks...']
+        self.assertEqual(list(read_statements(lines)), [BY_TITLE])
+
+    def test_declared_indexes_cover_api_paths(self):
+        missing = find_missing_indexes([AUTHOR_PAGE, BY_TITLE, BY_TITLE], connection)
+        self.assertEqual([(item.model, item.fields, item.count) for item in missing],
+                         [(Painting, ['title', 'painting_date'], 2)])
+
+    def test_command_captures_urls(self):
+        author = Artist.objects.create(name='Герард Дау')
+        Painting.objects.create(title='Отшельник', author=author)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'queries.log')
+            with open(path, 'w', encoding='utf-8') as log:
+                log.write(f'(0.001) {BY_TITLE}; args=(1,)\n')
+            out = io.StringIO()
+            call_command('report_missing_indexes', path, url=['/api/v1/paintings/'], stdout=out)
+        self.assertIn("models.Index(fields=['title', 'painting_date'])", out.getvalue())
+        self.assertIn('кандидатов без индекса: 1.', out.getvalue())
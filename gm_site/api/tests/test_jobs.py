@@ -0,0 +1,83 @@
+import io
+import shutil
+import tempfile
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+
+from ..images import has_variants
+from ..jobs import claim_jobs, requeue_stale, run_worker
+from ..models import Painting, ImageJob
+from .test_images import make_image
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+client = Client()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ImageJobTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.painting = Painting.objects.create(title='Аллегория музыки', photo=make_image())
+
+    def test_save_enqueues_job_without_processing(self):
+        job = ImageJob.objects.get()
+        self.assertEqual((job.model_name, job.object_id, job.status),
+                         ('Painting', self.painting.pk, ImageJob.PENDING))
+        self.assertFalse(has_variants(self.painting.photo))
+        self.painting.save()
+        self.assertEqual(ImageJob.objects.count(), 1)
+
+    def test_worker_processes_queue(self):
+        call_command('run_image_worker', '--once', '--workers', '0', stdout=io.StringIO())
+        job = ImageJob.objects.get()
+        self.assertEqual(job.status, ImageJob.DONE)
+        self.assertTrue(has_variants(self.painting.photo))
+
+        response = client.get(reverse('image-jobs-list') + f'?model=painting&object_id={self.painting.pk}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data[0]['status'], ImageJob.DONE)
+        self.assertEqual(response.data[0]['metadata']['width'], 2000)
+        self.assertEqual(response.data[0]['metadata']['format'], 'PNG')
+
+    def test_variants_hidden_until_done(self):
+        url = reverse('paintings-detail', kwargs={'pk': self.painting.pk})
+        self.assertIsNone(client.get(url).data['photo_variants'])
+        self.assertIsNone(client.get(reverse('paintings-list')).data[0]['photo_variants'])
+        run_worker(workers=0, once=True)
+        # Выполненная задача сменила версию картин: закэшированные ответы не отдаются.
+        variants = client.get(url).data['photo_variants']
+        self.assertEqual(variants['thumb']['webp'], f'http://testserver{self.painting.photo.url}.thumb.webp')
+        self.assertIsNotNone(client.get(reverse('paintings-list')).data[0]['photo_variants'])
+
+    def test_process_pool(self):
+        self.assertEqual(run_worker(workers=1, once=True), 1)
+        self.assertEqual(ImageJob.objects.get().status, ImageJob.DONE)
+
+    def test_broken_file_fails_job(self):
+        self.painting.photo.storage.delete(self.painting.photo.name)
+        run_worker(workers=0, once=True)
+        job = ImageJob.objects.get()
+        self.assertEqual(job.status, ImageJob.FAILED)
+        self.assertTrue(job.error)
+
+    def test_job_is_claimed_once(self):
+        self.assertEqual(len(claim_jobs()), 1)
+        self.assertEqual(claim_jobs(), [])
+
+    def test_stale_job_is_requeued(self):
+        claim_jobs()
+        ImageJob.objects.update(started=timezone.now() - timedelta(hours=1))
+        self.assertEqual(requeue_stale(600), 1)
+        self.assertEqual(ImageJob.objects.get().status, ImageJob.PENDING)
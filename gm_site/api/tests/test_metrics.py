@@ -0,0 +1,74 @@
+import re
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+from rest_framework import status
+
+from ..metrics import MetricsRegistry, RequestMetrics, process_label, registry
+from ..models import Artist, Painting
+
+client = Client()
+
+
+class MetricsRegistryTest(TestCase):
+    def test_prometheus_text(self):
+        metrics_registry = MetricsRegistry()
+        current = RequestMetrics()
+        current.queries = 3
+        metrics_registry.observe('ApiPaintingViewSet', 'list', 200, current, 0.02, 2000)
+        metrics_registry.observe('ApiPaintingViewSet', 'list', 200, current, 0.2, None)
+        text = metrics_registry.render()
+        labels = f'process="{process_label()}",viewset="ApiPaintingViewSet",action="list"'
+        self.assertIn(f'api_requests_total{{{labels},status="200"}} 2', text)
+        self.assertIn('# TYPE api_request_duration_seconds histogram', text)
+        # Корзины накопительные.
+        self.assertIn(f'api_request_duration_seconds_bucket{{{labels},le="0.025"}} 1', text)
+        self.assertIn(f'api_request_duration_seconds_bucket{{{labels},le="0.25"}} 2', text)
+        self.assertIn(f'api_request_duration_seconds_bucket{{{labels},le="+Inf"}} 2', text)
+        self.assertIn(f'api_request_db_queries_sum{{{labels}}} 6', text)
+        self.assertIn(f'api_response_size_bytes_count{{{labels}}} 1', text)
+
+
+class MetricsMiddlewareTest(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        registry.reset()
+        author = Artist.objects.create(name='Рембрандт')
+        for index in range(3):
+            Painting.objects.create(title=f'Картина {index}', author=author)
+
+    @override_settings(API_SERVER_TIMING=True)
+    def test_server_timing(self):
+        with self.assertNumQueries(3):
+            response = client.get(reverse('paintings-list'))
+        timing = response['Server-Timing']
+        for phase in ('db', 'serialize', 'render', 'total'):
+            self.assertRegex(timing, phase + r';dur=\d+\.\d')
+        self.assertIn('desc="3 queries"', timing)
+
+        with override_settings(API_SERVER_TIMING=False):
+            self.assertFalse(client.get(reverse('paintings-list')).has_header('Server-Timing'))
+        self.assertFalse(client.get('/admin/login/').has_header('Server-Timing'))
+
+    def test_endpoint(self):
+        client.get(reverse('paintings-list'))
+        client.get(reverse('paintings-detail', kwargs={'pk': 999}))
+        client.get(reverse('search') + '?q=')
+        self.assertEqual(client.get(reverse('metrics')).status_code, status.HTTP_403_FORBIDDEN)
+
+        User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        admin = Client()
+        admin.login(username='admin', password='password')
+        response = admin.get(reverse('metrics'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        text = response.content.decode().replace(f'process="{process_label()}",', '')
+        self.assertIn('api_requests_total{viewset="ApiPaintingViewSet",action="list",status="200"} 1', text)
+        self.assertIn('api_requests_total{viewset="ApiPaintingViewSet",action="retrieve",status="404"} 1', text)
+        self.assertIn('api_requests_total{viewset="ApiSearchView",action="get",status="400"} 1', text)
+        self.assertIn('api_requests_total{viewset="ApiMetricsView",action="get",status="403"} 1', text)
+        queries = re.search(r'api_request_db_queries_sum\{viewset="ApiPaintingViewSet",action="list"\} (\d+)',
+                            text)
+        self.assertGreater(int(queries.group(1)), 0)
@@ -0,0 +1,68 @@
+from io import StringIO
+from unittest import mock, skipUnless
+
+from django.core.management import call_command
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase
+
+from .. import search
+
+
+class MigrationsTest(TestCase):
+    def test_models_match_migrations(self):
+        # Изменение схемы без миграции не доходит до существующих баз.
+        output = StringIO()
+        try:
+            call_command('makemigrations', 'api', check=True, dry_run=True, stdout=output)
+        except SystemExit:
+            self.fail('Модели api расходятся с миграциями:\n' + output.getvalue())
+
+
+class MigrationTestCase(TransactionTestCase):
+    """Данные до миграции создаются через историческое состояние моделей (before)."""
+    before = after = None
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        self.migrate(MigrationExecutor(connection).loader.graph.leaf_nodes())
+
+
+class GalleryPaintingMigrationTest(MigrationTestCase):
+    before = [('api', '0016_painting_date_idx')]
+    after = [('api', '0017_gallerypainting')]
+
+    def test_memberships_are_copied_with_positions(self):
+        apps = self.migrate(self.before)
+        Gallery, Painting = apps.get_model('api', 'Gallery'), apps.get_model('api', 'Painting')
+        paintings = [Painting.objects.create(title=f'Картина {index}') for index in range(3)]
+        first, second = Gallery.objects.create(name='Первая'), Gallery.objects.create(name='Вторая')
+        first.paintings.add(paintings[2])
+        first.paintings.add(paintings[0])
+        second.paintings.add(paintings[1])
+
+        apps = self.migrate(self.after)
+        rows = apps.get_model('api', 'GalleryPainting').objects.order_by('gallery_id', 'position') \
+            .values_list('gallery_id', 'painting_id', 'position')
+        self.assertEqual(list(rows), [(first.pk, paintings[2].pk, 0), (first.pk, paintings[0].pk, 1),
+                                      (second.pk, paintings[1].pk, 0)])
+        self.assertNotIn('api_gallery_paintings', connection.introspection.table_names())
+
+
+@skipUnless(connection.vendor == 'sqlite', 'индекс поиска - таблица SQLite FTS5')
+class SearchIndexMigrationTest(MigrationTestCase):
+    before = [('api', '0017_gallerypainting')]
+    after = [('api', '0018_search_index')]
+
+    def test_index_is_created_and_filled(self):
+        apps = self.migrate(self.before)
+        self.assertNotIn(search.INDEX_TABLE, connection.introspection.table_names())
+        painting = apps.get_model('api', 'Painting').objects.create(title='Ночной дозор')
+
+        self.migrate(self.after)
+        self.assertEqual(search.search('дозор'), (1, [('painting', painting.pk, mock.ANY)]))
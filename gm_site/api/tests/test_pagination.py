@@ -0,0 +1,60 @@
+from django.test import TestCase, Client
+from django.urls import reverse
+from rest_framework import status
+
+from ..models import Artist, Painting
+from ..pagination import KeysetPagination
+from ..serializers import PaintingSerializer
+
+client = Client()
+
+
+class KeysetPaginationTest(TestCase):
+    def setUp(self) -> None:
+        self.author = Artist.objects.create(name='Рембрандт Харменс ван Рейн')
+        for index in range(5):
+            Painting.objects.create(title=f'Картина {index}', author=self.author)
+
+    def _next_link(self, response):
+        link = response.get('Link')
+        if link is None:
+            return None
+        return link[1:link.index('>')]
+
+    def test_walk_all_pages(self):
+        url = reverse('paintings-list') + '?page_size=2'
+        titles = []
+        pages = 0
+        while url is not None:
+            response = client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(response.data), 2)
+            titles += [row['title'] for row in response.data]
+            url = self._next_link(response)
+            pages += 1
+        self.assertEqual(pages, 3)
+        expected = Painting.objects.order_by('datetime', 'pk')
+        self.assertEqual(titles, [painting.title for painting in expected])
+
+    def test_page_matches_serializer(self):
+        response = client.get(reverse('paintings-list') + '?page_size=3')
+        serializer = PaintingSerializer(Painting.objects.order_by('datetime', 'pk')[:3], many=True)
+        self.assertEqual(response.data, serializer.data)
+        self.assertIn('rel="next"', response['Link'])
+
+    def test_last_page_has_no_link(self):
+        response = client.get(reverse('paintings-list'))
+        self.assertEqual(len(response.data), 5)
+        self.assertFalse(response.has_header('Link'))
+
+    def test_page_size_is_capped(self):
+        cap = KeysetPagination.max_page_size
+        Artist.objects.bulk_create(Artist(name=f'Художник {index}') for index in range(cap))
+        response = client.get(reverse('artists-list') + '?page_size=100000')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), cap)
+        self.assertIn('rel="next"', response['Link'])
+
+    def test_invalid_cursor(self):
+        response = client.get(reverse('paintings-list') + '?cursor=garbage')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,56 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+
+from ..models import Artist, Genre, Painting
+from ..querycheck import QueryCapture, QueryCheckFailed, normalize
+from ..serializers import PaintingSerializer
+from ..views import ApiPaintingViewSet
+
+client = Client()
+
+
+class QueryCheckTest(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        author = Artist.objects.create(name='Рембрандт')
+        genre = Genre.objects.create(genre_name='Портрет')
+        for index in range(4):
+            Painting.objects.create(title=f'Картина {index}', author=author).genres.add(genre)
+
+    def test_normalize(self):
+        self.assertEqual(normalize('SELECT * FROM "t" WHERE "id" IN (%s, %s,%s) AND "n" = 5'),
+                         normalize('SELECT *  FROM "t"\nWHERE "id" IN (%s) AND "n" = 7'))
+        self.assertNotEqual(normalize('SELECT "a1" FROM "t"'), normalize('SELECT "a2" FROM "t"'))
+
+    def test_repeated_with_origin(self):
+        # Без prefetch_related жанры каждой картины читаются отдельным запросом.
+        capture = QueryCapture()
+        with connection.execute_wrapper(capture):
+            PaintingSerializer(Painting.objects.all(), many=True).data
+        report = capture.report()
+        self.assertEqual(report.count, 5)
+        [repeated] = report.repeated()
+        self.assertEqual(repeated.origin, 'PaintingSerializer.genres')
+        self.assertEqual(repeated.count, 4)
+        self.assertIn('"api_painting_genres"', repeated.shape)
+
+    def test_budget(self):
+        response = client.get(reverse('paintings-list'))
+        self.assertEqual(response.query_report.count, 3)
+        self.assertEqual(response.query_report.repeated(), [])
+
+        # Ответ из кэша запросов не делает: кэш очищается перед каждым проверяемым запросом.
+        with mock.patch.object(ApiPaintingViewSet, 'query_budgets', {'list': 2}):
+            cache.clear()
+            with self.assertRaisesRegex(QueryCheckFailed, r'ApiPaintingViewSet\.list\): 3 SQL-запросов при бюджете 2'), \
+                    self.assertLogs('api.querycheck', 'WARNING'):
+                client.get(reverse('paintings-list'))
+            cache.clear()
+            with override_settings(API_QUERY_CHECK_STRICT=False), self.assertLogs('api.querycheck', 'WARNING'):
+                self.assertEqual(client.get(reverse('paintings-list')).status_code, 200)
+        with override_settings(API_QUERY_CHECK=False):
+            self.assertFalse(hasattr(client.get(reverse('paintings-list')), 'query_report'))
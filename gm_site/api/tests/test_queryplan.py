@@ -0,0 +1,44 @@
+from django.test import TestCase, Client
+from django.urls import reverse
+from rest_framework import status
+
+from ..models import Artist, Genre, Painting, Place, Event, Article
+from ..queryplan import build_related_plan
+from ..serializers import ArticleSerializer, CommentSerializer
+
+client = Client()
+
+
+class RelatedPlanTest(TestCase):
+    def setUp(self) -> None:
+        genres = [Genre.objects.create(genre_name=f'Жанр {index}') for index in range(3)]
+        place = Place.objects.create(name='Ижад')
+        for index in range(10):
+            artist = Artist.objects.create(name=f'Художник {index}')
+            painting = Painting.objects.create(title=f'Картина {index}', author=artist)
+            painting.genres.set(genres)
+            event = Event.objects.create(name=f'Событие {index}', place=place)
+            event.paintings.add(painting)
+            event.artists.add(artist)
+            article = Article.objects.create(title=f'Статья {index}', content='Текст')
+            article.places.add(place)
+            article.paintings.add(painting)
+            article.artists.add(artist)
+            article.events.add(event)
+
+    def test_plan_for_m2m_serializer(self):
+        plan = build_related_plan(ArticleSerializer())
+        self.assertEqual(plan.select, [])
+        self.assertEqual([lookup.prefetch_through for lookup in plan.prefetch],
+                         ['places', 'paintings', 'artists', 'events'])
+
+    def test_fk_pk_fields_need_no_plan(self):
+        self.assertFalse(build_related_plan(CommentSerializer()))
+
+    def test_list_query_count_is_constant(self):
+        # Первый запрос в каждом случае - агрегат для ETag (ConditionalGetMixin).
+        for route, queries in (('paintings-list', 3), ('events-list', 4), ('articles-list', 6)):
+            with self.assertNumQueries(queries):
+                response = client.get(reverse(route))
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(len(response.data), 10)
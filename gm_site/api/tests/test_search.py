@@ -0,0 +1,100 @@
+import io
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+
+from ..models import Artist, Painting, Article, Event
+from ..search import INDEX_TABLE, check_supported
+from ..stemmer import stem
+
+client = Client()
+
+
+class RussianStemmerTest(TestCase):
+    def test_snowball_stems(self):
+        for word, expected in (('картины', 'картин'), ('картинами', 'картин'), ('художников', 'художник'),
+                               ('важнейшими', 'важн'), ('вбежала', 'вбежа'), ('возможность', 'возможн'),
+                               ('Ёлка', 'елк'), ('вагон', 'вагон')):
+            self.assertEqual(stem(word), expected)
+
+
+class SearchTest(TestCase):
+    def setUp(self) -> None:
+        self.rembrandt = Artist.objects.create(name='Рембрандт Харменс ван Рейн')
+        self.night_watch = Painting.objects.create(title='Ночной дозор', author=self.rembrandt,
+                                                   description='Групповой портрет стрелковой роты')
+        self.hermit = Painting.objects.create(title='Отшельник',
+                                              description='Старик читает книгу при свете ночной лампы')
+        self.article = Article.objects.create(title='Портреты голландских мастеров',
+                                              content='<p>О картинах Рембрандта и его учеников.</p>')
+        self.event = Event.objects.create(name='Выставка голландской живописи')
+
+    def search(self, query, **params):
+        response = client.get(reverse('search'), {'q': query, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_morphology(self):
+        data = self.search('портретах')
+        self.assertEqual({(hit['type'], hit['id']) for hit in data['results']},
+                         {('painting', self.night_watch.pk), ('article', self.article.pk)})
+
+    def test_title_ranks_higher(self):
+        data = self.search('ночной')
+        self.assertEqual([hit['id'] for hit in data['results']], [self.night_watch.pk, self.hermit.pk])
+        self.assertEqual(data['results'][0]['title'], 'Ночной дозор')
+
+    def test_type_filter_and_pagination(self):
+        data = self.search('голландский', type='event')
+        self.assertEqual(data['count'], 1)
+        self.assertEqual(data['results'][0]['type'], 'event')
+        data = self.search('ночной', page_size=1, page=2)
+        self.assertEqual(data['count'], 2)
+        self.assertEqual([hit['id'] for hit in data['results']], [self.hermit.pk])
+
+    def test_index_follows_updates_and_deletes(self):
+        self.hermit.title = 'Философ'
+        self.hermit.description = ''
+        self.hermit.save()
+        self.assertEqual(self.search('философа')['results'][0]['id'], self.hermit.pk)
+        self.assertEqual(self.search('отшельник')['count'], 0)
+        self.hermit.delete()
+        self.assertEqual(self.search('философ')['count'], 0)
+
+    def test_query_syntax_is_escaped(self):
+        self.assertEqual(self.search('"ночной" OR NEAR(')['count'], 0)
+
+    def test_invalid_params(self):
+        self.assertEqual(client.get(reverse('search')).status_code, status.HTTP_400_BAD_REQUEST)
+        response = client.get(reverse('search'), {'q': 'дозор', 'type': 'genre'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_rebuild_command(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {INDEX_TABLE}')
+        self.assertEqual(self.search('дозор')['count'], 0)
+        call_command('rebuild_search_index', stdout=io.StringIO())
+        self.assertEqual(self.search('дозор')['count'], 1)
+
+    def test_save_runs_no_ddl(self):
+        # Таблицу индекса создаёт миграция, сохранение только пишет в неё - и внутри atomic.
+        with transaction.atomic(), CaptureQueriesContext(connection) as queries:
+            Painting.objects.create(title='Мельница')
+        self.assertFalse([query for query in queries.captured_queries if 'CREATE' in query['sql']])
+        self.assertEqual(self.search('мельница')['count'], 1)
+
+
+class SearchBackendCheckTest(TestCase):
+    def test_warns_without_fts5(self):
+        self.assertEqual(check_supported(None), [])
+        with mock.patch.object(connection, 'vendor', 'postgresql'):
+            [warning] = check_supported(None)
+            self.assertEqual(warning.id, 'api.W001')
+            output = io.StringIO()
+            call_command('check', stdout=output, stderr=output)
+        self.assertIn('api.W001', output.getvalue())
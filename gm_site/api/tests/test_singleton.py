@@ -0,0 +1,73 @@
+from django.core.cache import cache
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+from rest_framework import status
+
+from ..cache import GENERATION_KEY
+from ..models import Main
+from ..singleton import main_singleton
+
+client = Client()
+
+
+class MainSingletonTest(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        main_singleton.clear()
+
+    def test_single_row(self):
+        Main.objects.create(title_about='О нас')
+        main = Main(title_about='Новая главная')
+        main.save()
+        self.assertEqual(Main.objects.count(), 1)
+        self.assertEqual(Main.objects.get().pk, Main.SINGLETON_PK)
+
+    def test_second_create_rejected(self):
+        response = client.post(reverse('main-list'), {'title_about': 'О нас'})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        response = client.post(reverse('main-list'), {'title_about': 'Вторая'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(list(Main.objects.values_list('title_about', flat=True)), ['О нас'])
+
+    def test_zero_queries_in_steady_state(self):
+        Main.objects.create(title_about='О нас', content_about='Галерея')
+        self.assertEqual(client.get(reverse('main-current')).data['title_about'], 'О нас')
+        with self.assertNumQueries(0):
+            response = client.get(reverse('main-current'))
+        self.assertEqual(response.data, {'title_about': 'О нас', 'content_about': 'Галерея'})
+
+    def test_save_refreshes(self):
+        main = Main.objects.create(title_about='О нас')
+        self.assertEqual(main_singleton.get().title_about, 'О нас')
+        main.title_about = 'О галерее'
+        main.save()
+        with self.assertNumQueries(1):
+            self.assertEqual(main_singleton.get().title_about, 'О галерее')
+
+    def test_other_process_change_via_version(self):
+        Main.objects.create(title_about='О нас')
+        main_singleton.get()
+        # Другой процесс обновил строку и сменил версию в общем кэше.
+        Main.objects.update(title_about='Из другого процесса')
+        cache.delete(GENERATION_KEY.format('api.main'))
+        self.assertEqual(main_singleton.get().title_about, 'Из другого процесса')
+
+    def test_other_process_change_after_max_age(self):
+        # Кэш в памяти процесса: версию, сменённую другим процессом, этот процесс не увидит.
+        Main.objects.create(title_about='О нас')
+        main_singleton.get()
+        Main.objects.update(title_about='Из другого процесса')
+        self.assertEqual(main_singleton.get().title_about, 'О нас')
+        with override_settings(API_SINGLETON_MAX_AGE=0):
+            self.assertEqual(main_singleton.get().title_about, 'Из другого процесса')
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}})
+    def test_without_cache(self):
+        self.assertIsNone(main_singleton.get())
+        Main.objects.create(title_about='О нас')
+        self.assertEqual(client.get(reverse('main-current')).data['title_about'], 'О нас')
+        self.assertEqual(client.get(reverse('home-list')).data['main']['title_about'], 'О нас')
+
+    def test_missing(self):
+        response = client.get(reverse('main-current'))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
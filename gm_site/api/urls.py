@@ -2,18 +2,25 @@ from rest_framework.routers import DefaultRouter
 from django.urls import path, include
 
 from .views import ApiArtistViewSet, ApiCommentViewSet, ApiArticleViewSet, \
-    ApiEventViewSet, ApiPlaceViewSet, ApiPaintingViewSet, ApiGenreViewSet, ApiMainViewSet
+    ApiEventViewSet, ApiPlaceViewSet, ApiPaintingViewSet, ApiGalleryViewSet, ApiGenreViewSet, ApiMainViewSet, \
+    ApiCacheStatsView, ApiMetricsView, ApiImageJobViewSet, ApiSearchView, ApiHomeViewSet
 
 router = DefaultRouter()
 router.register('artists', ApiArtistViewSet, basename='artists')
 router.register('genres', ApiGenreViewSet, basename='genres')
 router.register('paintings', ApiPaintingViewSet, basename='paintings')
+router.register('galleries', ApiGalleryViewSet, basename='galleries')
 router.register('places', ApiPlaceViewSet, basename='places')
 router.register('events', ApiEventViewSet, basename='events')
 router.register('articles', ApiArticleViewSet, basename='articles')
 router.register('comments', ApiCommentViewSet, basename='comments')
 router.register('main', ApiMainViewSet, basename='main')
+router.register('home', ApiHomeViewSet, basename='home')
+router.register('image-jobs', ApiImageJobViewSet, basename='image-jobs')
 
 urlpatterns = [
+    path('cache/stats/', ApiCacheStatsView.as_view(), name='cache-stats'),
+    path('metrics/', ApiMetricsView.as_view(), name='metrics'),
+    path('search/', ApiSearchView.as_view(), name='search'),
     path('', include(router.urls))
 ]
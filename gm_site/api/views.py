@@ -1,45 +1,365 @@
-from rest_framework.viewsets import ModelViewSet
+from django.db import IntegrityError, transaction
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from rest_framework.viewsets import GenericViewSet, ModelViewSet, ReadOnlyModelViewSet
 
-from .models import Artist, Genre, Painting, Place, Event, Article, Comment, Main
+from .models import Artist, Genre, Painting, Gallery, GalleryPainting, Place, Event, Article, Comment, Main, \
+    ImageJob
 from .serializers import ArtistSerializer, GenreSerializer, PaintingSerializer, PlaceSerializer, \
-    EventSerializer, ArticleSerializer, CommentSerializer, MainSerializer
+    EventSerializer, ArticleSerializer, CommentSerializer, MainSerializer, ImageJobSerializer, \
+    CommentTreeSerializer, HomeSerializer, GallerySerializer, GalleryPaintingSerializer
+from .mixins import BulkMixin, CachedResponseMixin, ConditionalGetMixin, RelatedPlanMixin, \
+    StreamingExportMixin, ValuesListMixin
+from .cache import stats as cache_stats
+from .metrics import registry as metrics_registry
+from .renderers import JSONRenderer, PrometheusRenderer
+from .filters import Filter
+from . import galleries, search
+from .comments import fetch_comment_tree
+from .pagination import GalleryPaintingPagination
+from .queryplan import build_related_plan
+from .singleton import main_singleton
 
 
-class ApiArtistViewSet(ModelViewSet):
+class ApiModelViewSet(CachedResponseMixin, ConditionalGetMixin, StreamingExportMixin, RelatedPlanMixin,
+                      BulkMixin, ValuesListMixin, ModelViewSet):
+    """Базовый ViewSet API: CRUD ModelViewSet и общие действия для всех ресурсов.
+    query_budgets - наибольшее число SQL-запросов на действие (api.querycheck),
+    не зависящее от объёма данных. У ответов с фото в него входит чтение
+    незавершённых задач обработки (api.jobs.unfinished_photos), обычно из кэша, а у list
+    с сортировкой по полю с NULL - второй запрос страницы на стыке NULL и значений
+    (KeysetPagination.get_segments)."""
+    query_budgets = {}
+
+
+class ApiArtistViewSet(ApiModelViewSet):
     queryset = Artist.objects.all()
     serializer_class = ArtistSerializer
+    query_budgets = {'list': 2, 'retrieve': 2}
+    cache_responses = True
+    query_filters = {'is_master': Filter()}
+    ordering_fields = ('name',)
 
 
-class ApiGenreViewSet(ModelViewSet):
+class ApiGenreViewSet(ApiModelViewSet):
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
+    query_budgets = {'list': 1, 'retrieve': 1}
+    cache_responses = True
 
 
-class ApiPaintingViewSet(ModelViewSet):
+class ApiPaintingViewSet(ApiModelViewSet):
     queryset = Painting.objects.all()
     serializer_class = PaintingSerializer
+    query_budgets = {'list': 5, 'retrieve': 4}
+    cache_responses = True
+    values_list_rows = True
+    cursor_ordering = ('datetime', 'pk')
+    conditional_field = 'datetime'
+    query_filters = {
+        'author': Filter('in'),
+        'genres': Filter('in'),
+        'painting_date': Filter('range'),
+    }
+    ordering_fields = ('datetime', 'painting_date')
+
+
+class ApiGalleryViewSet(ApiModelViewSet):
+    """Галереи. Картины галереи - вложенный ресурс galleries/<id>/paintings/:
+    GET - страница в порядке показа, PUT - состав и порядок целиком,
+    PATCH - новые позиции части картин."""
+    queryset = Gallery.objects.all()
+    serializer_class = GallerySerializer
+    query_budgets = {'list': 1, 'retrieve': 1, 'paintings': 4}
+    cache_responses = True
+    gallery_pagination_class = GalleryPaintingPagination
+    gallery_max_paintings = 5000
+
+    def get_gallery_id(self, pk):
+        try:
+            return int(pk)
+        except ValueError:
+            raise NotFound()
+
+    @action(detail=True, methods=['get'], url_path='paintings')
+    def paintings(self, request, pk=None):
+        """Картины галереи постранично (?cursor=, ?page_size=): один запрос по индексу
+        (gallery, position, id) на страницу и один запрос жанров её картин."""
+        gallery_id = self.get_gallery_id(pk)
+        context = self.get_serializer_context()
+        plan = build_related_plan(GalleryPaintingSerializer(context=context))
+        queryset = plan.apply(GalleryPainting.objects.filter(gallery_id=gallery_id), restrict=True)
+        paginator = self.gallery_pagination_class()
+        page = paginator.paginate_queryset(queryset, request)
+        if not page and not Gallery.objects.filter(pk=gallery_id).exists():
+            raise NotFound()
+        serializer = GalleryPaintingSerializer(page, many=True, context=context)
+        return paginator.get_paginated_response(serializer.data)
+
+    def get_painting_ids(self, ids):
+        if not isinstance(ids, list) or not all(isinstance(pk, int) and not isinstance(pk, bool) for pk in ids):
+            raise ValidationError({'non_field_errors': ['Ожидается список id картин.']})
+        if len(ids) > self.gallery_max_paintings:
+            raise ValidationError({'non_field_errors': [f'Не больше {self.gallery_max_paintings} картин.']})
+        if len(set(ids)) != len(ids):
+            raise ValidationError({'non_field_errors': ['id картины повторяется.']})
+        return ids
+
+    def missing_paintings_response(self, missing):
+        # Не через ValidationError: id остались бы числами, а не строками.
+        return Response({'missing': missing}, status=status.HTTP_400_BAD_REQUEST)
+
+    @paintings.mapping.put
+    def set_paintings(self, request, pk=None):
+        """Состав галереи в порядке показа: [id картины, ...]."""
+        gallery = self.get_object()
+        ids = self.get_painting_ids(request.data)
+        found = Painting.objects.only('pk').in_bulk(ids)
+        missing = [painting_id for painting_id in ids if painting_id not in found]
+        if missing:
+            return self.missing_paintings_response(missing)
+        return Response(galleries.set_paintings(gallery, ids))
 
+    @paintings.mapping.patch
+    def move_paintings(self, request, pk=None):
+        """Перестановка: [{"painting": id, "position": n}, ...]. Картины уже должны быть
+        в галерее; при равных позициях порядок определяет id строки."""
+        gallery = self.get_object()
+        items = request.data
+        if not isinstance(items, list) or not all(
+                isinstance(item, dict) and isinstance(item.get('position'), int) and item['position'] >= 0
+                for item in items):
+            raise ValidationError({'non_field_errors': [
+                'Ожидается список {"painting": id, "position": неотрицательное число}.']})
+        ids = self.get_painting_ids([item.get('painting') for item in items])
+        missing = galleries.move_paintings(gallery, {item['painting']: item['position'] for item in items})
+        if missing:
+            return self.missing_paintings_response(missing)
+        return Response({'moved': len(ids)})
 
-class ApiPlaceViewSet(ModelViewSet):
+
+class ApiPlaceViewSet(ApiModelViewSet):
     queryset = Place.objects.all()
     serializer_class = PlaceSerializer
+    query_budgets = {'list': 2, 'retrieve': 2}
 
 
-class ApiEventViewSet(ModelViewSet):
+class ApiEventViewSet(ApiModelViewSet):
     queryset = Event.objects.all()
     serializer_class = EventSerializer
+    query_budgets = {'list': 6, 'retrieve': 5}
+    cursor_ordering = ('datetime', 'pk')
+    conditional_field = 'datetime'
+    query_filters = {
+        'event_date': Filter('range'),
+        'place': Filter('in'),
+    }
+    ordering_fields = ('datetime', 'event_date')
 
 
-class ApiArticleViewSet(ModelViewSet):
+class ApiArticleViewSet(ApiModelViewSet):
     queryset = Article.objects.all()
     serializer_class = ArticleSerializer
+    query_budgets = {'list': 6, 'retrieve': 6, 'comment_tree': 2}
+    values_list_rows = True
+    cursor_ordering = ('datetime', 'pk')
+    conditional_field = 'datetime'
+    comment_tree_limits = {'depth': (10, 50), 'limit': (50, 200), 'replies_limit': (20, 200)}
+
+    def get_tree_param(self, name):
+        default, maximum = self.comment_tree_limits[name]
+        try:
+            value = int(self.request.query_params.get(name, default))
+        except ValueError:
+            raise ValidationError({name: 'Ожидается целое число.'})
+        if value < 0:
+            raise ValidationError({name: 'Значение не может быть отрицательным.'})
+        return min(value, maximum)
+
+    @action(detail=True, methods=['get'], url_path='comments')
+    def comment_tree(self, request, pk=None):
+        """Дерево комментариев статьи одним SQL-запросом (рекурсивный CTE).
+        ?depth= - глубина вложенности, ?limit=&after=<id> - страница веток верхнего
+        уровня, ?replies_limit= - ответов на узел, ?parent=<id> - ответы на комментарий."""
+        try:
+            article_id = int(pk)
+            parent_id = int(request.query_params['parent']) if 'parent' in request.query_params else None
+            after = int(request.query_params.get('after', 0))
+        except ValueError:
+            raise ValidationError('Идентификаторы должны быть целыми числами.')
+        limit = self.get_tree_param('limit')
+        roots = fetch_comment_tree(article_id, parent_id, max_depth=self.get_tree_param('depth'),
+                                   limit=limit, after=after)
+        if not roots and not Article.objects.filter(pk=article_id).exists():
+            raise NotFound()
+        context = dict(self.get_serializer_context(), replies_limit=self.get_tree_param('replies_limit'))
+        return Response({
+            'results': CommentTreeSerializer(roots, many=True, context=context).data,
+            'next_after': roots[-1].pk if len(roots) == limit and roots else None,
+        })
 
 
-class ApiMainViewSet(ModelViewSet):
+class ApiMainViewSet(ApiModelViewSet):
     queryset = Main.objects.all()
     serializer_class = MainSerializer
+    query_budgets = {'list': 1, 'retrieve': 1, 'current': 1}
+    cache_responses = True
+
+    def perform_create(self, serializer):
+        """Запись одна (Main.SINGLETON_PK): повторное создание - 400, а не ошибка вставки."""
+        try:
+            with transaction.atomic():
+                serializer.save()
+        except IntegrityError:
+            raise ValidationError({'non_field_errors': [
+                f'Главная уже создана, изменяйте её через main/{Main.SINGLETON_PK}/.']})
+
+    @action(detail=False, methods=['get'], url_path='current')
+    def current(self, request, *args, **kwargs):
+        """Содержимое главной без pk: GET main/current/. Берётся из памяти процесса."""
+        instance = main_singleton.get()
+        if instance is None:
+            raise NotFound()
+        return Response(self.get_serializer(instance).data)
+
+
+class ApiHomeViewSet(CachedResponseMixin, GenericViewSet):
+    """Главная страница одним ответом: блок Main, последние статьи, ближайшие события
+    (event_date не раньше сегодняшнего дня) и последние картины мастеров.
+    Число SQL-запросов фиксировано и не зависит от объёма данных; ответ кэшируется
+    на cache_timeout секунд или до изменения любой из моделей."""
+    serializer_class = HomeSerializer
+    query_budgets = {'list': 12}
+    cache_responses = True
+    cache_timeout = 60
+    home_limits = {'articles': 5, 'events': 5, 'paintings': 12}
+
+    def get_section_querysets(self):
+        return {
+            'articles': Article.objects.order_by('-datetime', '-pk'),
+            'events': Event.objects.filter(event_date__gte=timezone.localdate()).order_by('event_date', 'pk'),
+            'paintings': Painting.objects.filter(author__is_master=True).order_by('-datetime', '-pk'),
+        }
+
+    def get_sections(self):
+        fields = self.get_serializer().fields
+        sections = {'main': main_singleton.get()}
+        for name, queryset in self.get_section_querysets().items():
+            plan = build_related_plan(fields[name].child)
+            sections[name] = list(plan.apply(queryset, restrict=True)[:self.home_limits[name]])
+        return sections
 
+    def get_home(self, request, *args, **kwargs):
+        return Response(self.get_serializer(self.get_sections()).data)
 
-class ApiCommentViewSet(ModelViewSet):
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(self.get_home, request, *args, **kwargs)
+
+
+class ApiCommentViewSet(ApiModelViewSet):
     queryset = Comment.objects.all()
     serializer_class = CommentSerializer
+    query_budgets = {'list': 2, 'retrieve': 2}
+    cursor_ordering = ('datetime', 'pk')
+    conditional_field = 'datetime'
+
+
+class ApiImageJobViewSet(ReadOnlyModelViewSet):
+    """Статусы фоновой обработки фото. Фильтры: ?status=, ?model=painting&object_id=5."""
+    queryset = ImageJob.objects.all()
+    serializer_class = ImageJobSerializer
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        params = self.request.query_params
+        if 'status' in params:
+            queryset = queryset.filter(status=params['status'])
+        if 'model' in params:
+            queryset = queryset.filter(model_name__iexact=params['model'])
+        if params.get('object_id', '').isdigit():
+            queryset = queryset.filter(object_id=params['object_id'])
+        return queryset
+
+
+class ApiCacheStatsView(APIView):
+    """Счётчики попаданий/промахов кэша ответов текущего процесса."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(cache_stats.snapshot())
+
+
+class ApiMetricsView(APIView):
+    """Гистограммы времени ответа, SQL-запросов, сериализации и размера ответов
+    по представлениям и действиям текущего процесса в текстовом формате Prometheus."""
+    permission_classes = [IsAdminUser]
+    renderer_classes = [PrometheusRenderer, JSONRenderer]
+
+    def get(self, request):
+        return Response(metrics_registry.render(),
+                        content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+class ApiSearchView(APIView):
+    """Полнотекстовый поиск: ?q=<запрос>&type=painting,article&page=1&page_size=20.
+    Результаты упорядочены по релевантности (bm25, совпадения в заголовке весомее)."""
+    page_size = 20
+    max_page_size = 100
+    detail_routes = {
+        'painting': 'paintings-detail',
+        'article': 'articles-detail',
+        'artist': 'artists-detail',
+        'event': 'events-detail',
+    }
+
+    def get_int_param(self, name, default, maximum=None):
+        try:
+            value = int(self.request.query_params.get(name, default))
+        except ValueError:
+            raise ValidationError({name: 'Ожидается целое число.'})
+        if value < 1:
+            raise ValidationError({name: 'Значение должно быть положительным.'})
+        return min(value, maximum) if maximum else value
+
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            raise ValidationError({'q': 'Пустой поисковый запрос.'})
+        kinds = [kind for kind in request.query_params.get('type', '').split(',') if kind]
+        unknown = [kind for kind in kinds if kind not in search.SOURCES]
+        if unknown:
+            raise ValidationError({'type': f'Неизвестные типы: {", ".join(unknown)}.'})
+        page = self.get_int_param('page', 1)
+        page_size = self.get_int_param('page_size', self.page_size, self.max_page_size)
+
+        try:
+            count, hits = search.search(query, kinds, limit=page_size, offset=(page - 1) * page_size)
+        except search.SearchUnavailable as error:
+            return Response({'detail': str(error)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+        objects = {}
+        for kind in {kind for kind, _, _ in hits}:
+            model, title_field, _ = search.SOURCES[kind]
+            ids = [pk for hit_kind, pk, _ in hits if hit_kind == kind]
+            objects[kind] = model.objects.only('pk', title_field).in_bulk(ids)
+
+        results = []
+        for kind, pk, score in hits:
+            instance = objects[kind].get(pk)
+            if instance is None:
+                continue
+            url = reverse(self.detail_routes[kind], kwargs={'pk': pk})
+            results.append({
+                'type': kind,
+                'id': pk,
+                'title': getattr(instance, search.SOURCES[kind][1]),
+                'score': round(score, 4),
+                'url': request.build_absolute_uri(url),
+            })
+        return Response({'count': count, 'page': page, 'results': results})
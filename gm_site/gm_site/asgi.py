@@ -9,8 +9,14 @@ https://docs.djangoproject.com/en/3.0/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+import django
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'gm_site.settings')
 
-application = get_asgi_application()
+# As django.core.asgi.get_asgi_application(), with the handler that streams responses
+# from a worker thread (export/ reads the database while sending).
+django.setup(set_prefix=False)
+
+from api.asgi import ApiASGIHandler, get_api_application  # noqa: E402 - after django.setup()
+
+application = get_api_application(ApiASGIHandler())
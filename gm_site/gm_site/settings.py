@@ -44,6 +44,9 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'api.middleware.MetricsMiddleware',
+    'api.middleware.QueryCheckMiddleware',
+    'api.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -51,6 +54,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'api.middleware.ReplicaReadsMiddleware',
 ]
 
 ROOT_URLCONF = 'gm_site.urls'
@@ -77,12 +81,53 @@ WSGI_APPLICATION = 'gm_site.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/3.0/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+#
+# DB_ENGINE=sqlite (default) is the local/test profile: a file database. DB_SQLITE_WAL=1
+# switches it to WAL mode, which lets readers and a writer work concurrently; it is off
+# by default because WAL rewrites the header of the checked-in db.sqlite3 for good and
+# keeps -wal/-shm files next to it.
+# DB_ENGINE=postgresql takes DB_NAME, DB_USER, DB_PASSWORD, DB_HOST, DB_PORT; each worker
+# keeps its connections open for DB_CONN_MAX_AGE seconds. Django 3.0 has no connection
+# pool of its own, so across many workers point DB_HOST at PgBouncer and set
+# DB_PGBOUNCER=1 (transaction pooling does not support server-side cursors).
+# DB_REPLICA_HOSTS is a comma separated list of read replicas, used by
+# api.db.ReplicaRouter for GET/HEAD requests; writes always go to 'default'.
+# Full-text search (api.search) is SQLite FTS5 only. It is NOT available on the
+# postgresql profile: search/ answers 503 and saves are not indexed (`manage.py check`
+# reports api.W001); run rebuild_search_index after moving the data back to SQLite.
+
+DB_ENGINE = os.environ.get('DB_ENGINE', 'sqlite')
+
+if DB_ENGINE == 'postgresql':
+    # No full-text search on this profile, see above.
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DB_NAME', 'gm_site'),
+            'USER': os.environ.get('DB_USER', 'gm_site'),
+            'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+            'HOST': os.environ.get('DB_HOST', 'localhost'),
+            'PORT': os.environ.get('DB_PORT', '5432'),
+            'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 600)),
+            'DISABLE_SERVER_SIDE_CURSORS': os.environ.get('DB_PGBOUNCER') == '1',
+        }
+    }
+    for number, host in enumerate(filter(None, os.environ.get('DB_REPLICA_HOSTS', '').split(',')), 1):
+        DATABASES[f'replica_{number}'] = dict(DATABASES['default'], HOST=host.strip(),
+                                               TEST={'MIRROR': 'default'})
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+            # Seconds a writer waits for the lock instead of failing with "database is locked".
+            'OPTIONS': {'timeout': 20},
+        }
     }
-}
+
+DATABASE_ROUTERS = ['api.db.ReplicaRouter']
+API_READ_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+API_SQLITE_WAL = os.environ.get('DB_SQLITE_WAL') == '1'
 
 
 # Password validation
@@ -140,8 +185,69 @@ REST_FRAMEWORK = {
     # Use Django's standard `django.contrib.auth` permissions,
     # or allow read-only access for unauthenticated users.
     'DEFAULT_PERMISSION_CLASSES': [],
+    # Keyset pagination for list routes: ?page_size= (capped by max_page_size) and ?cursor=.
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.KeysetPagination',
+    'PAGE_SIZE': 100,
+    # Declarative list filters: `query_filters` on the viewsets (api.filters).
+    'DEFAULT_FILTER_BACKENDS': ['api.filters.QueryFilterBackend'],
+    # JSONRenderer with render timing for the request metrics (api.metrics).
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.JSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
     'TEST_REQUEST_DEFAULT_FORMAT': 'json'
 }
 
+# Cache
+# https://docs.djangoproject.com/en/3.0/topics/cache/
+
+# The API response cache keeps its model versions here, so every worker must see the
+# same cache: the process-local LocMemCache is for development only. Production sets
+# CACHE_BACKEND/CACHE_LOCATION to a shared cache (`manage.py check --deploy` warns with api.W002).
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'gm_site'),
+    }
+}
+
+# Response cache of the read API routes (api.mixins.CachedResponseMixin).
+API_CACHE_ALIAS = 'default'
+API_CACHE_TIMEOUT = 300
+
+# Longest time a process keeps the Main singleton (api.singleton) without rereading it.
+# With the process-local LocMemCache this bounds how long other workers serve a stale copy.
+API_SINGLETON_MAX_AGE = 60
+
+# Under ASGI (gm_site.asgi) serve cached API reads on the event loop, see api.asgi.
+API_ASYNC_READS = True
+
+# gzip/Brotli compression of API responses (api.compression); Brotli needs the Brotli package.
+# Cached responses keep precompressed copies next to the raw bytes.
+API_COMPRESSION_URLS_REGEX = r'^/api/v1/'
+API_COMPRESSION_MIN_SIZE = 1024
+
+# Per-request metrics of the API routes (api.metrics), Prometheus text at /api/v1/metrics/
+# for staff users. Each worker process exports its own series, labelled with process.
+# API_SERVER_TIMING also reports them in the Server-Timing header of every response, which
+# any client can read, so it follows DEBUG.
+API_METRICS_URLS_REGEX = r'^/api/v1/'
+API_SERVER_TIMING = DEBUG
+
+# SQL checks of the API requests (api.querycheck): N+1 per serializer field, slow queries and
+# the `query_budgets` of the viewsets. Logged in development; the test runner makes them fail tests.
+API_QUERY_CHECK = DEBUG
+API_QUERY_CHECK_STRICT = False
+API_QUERY_CHECK_REPEAT = 3
+API_SLOW_QUERY_MS = 100
+TEST_RUNNER = 'api.testing.QueryCheckTestRunner'
+
+# Photo processing queue (api.jobs): run `manage.py run_image_worker`.
+# With API_IMAGE_JOBS_EAGER the job runs inline during the save instead.
+API_IMAGE_JOBS_EAGER = False
+
 CORS_ORIGIN_ALLOW_ALL = True
 CORS_URLS_REGEX = r'^/api/.*$'
+# Keyset pagination passes the next page in the Link header; let the browser client read it.
+CORS_EXPOSE_HEADERS = ['Link']